@@ -77,12 +77,75 @@ args = parser.parse_args()   # argument parsed assignement
 import cv2
 import numpy as np
 from copy import deepcopy
+from operator import itemgetter
 import math
 import statistics
 import time
 import datetime as dt
 import sys
+import os
+import threading
+import re
 import pathlib
+import queue
+import functools
+import atexit
+import socket
+import subprocess
+import concurrent.futures
+try:
+    import RPi.GPIO as GPIO       # GPIO module, only available at the robot (Rpi)
+except ImportError:
+    GPIO = None                   # case the script is running on a PC/laptop
+try:
+    from numba import njit        # optional, compiles the facelets ordering/distance numeric functions
+except ImportError:
+    def njit(*args, **kwargs):
+        """Replaces numba.njit when numba isn't installed: the decorated functions run as plain Python/NumPy."""
+        return lambda func: func
+import Cubotone_moves as rm       # RobotMoves: convert Kociemba solver solution in robot movements sequence
+
+active_folder = pathlib.Path().resolve()                               # active folder (should be home/pi/cube), resolved once
+collage_folder = os.path.join(active_folder, 'CubesStatusPictures')    # folder to store the collage pictures (made once at start_up)
+log_folder = os.path.join(active_folder, 'CubesDataLog')               # folder to store the relevant cube data (made once at start_up)
+log_fname = os.path.join(log_folder, 'Cubotone_solver_log_Rpi.txt')     # folder+filename for the cube data
+
+
+
+
+def log_worker():
+    """Writes the queued log texts to the terminal, on a separated thread.
+    All the texts queued in the meantime are written, and flushed, at once."""
+    
+    while True:
+        buf = [log_queue.get()]                  # waits for a text to be queued
+        while True:
+            try:
+                buf.append(log_queue.get_nowait())   # other queued texts are collected
+            except queue.Empty:
+                break
+        sys.stdout.write(''.join(buf))           # single write to the terminal
+        sys.stdout.flush()                       # single flush
+        for i in range(len(buf)):
+            log_queue.task_done()                # queued texts are marked as done
+
+
+
+
+def log_print(text):
+    """Queues a text to be printed by the log thread, so the caller doesn't wait for the terminal."""
+    log_queue.put(text + '\n')
+
+
+
+
+def log_flush():
+    """Waits for the queued texts to be printed, to keep them in order with the following (normal) prints."""
+    log_queue.join()
+
+
+log_queue = queue.Queue()   # texts to be printed by the log thread
+threading.Thread(target=log_worker, daemon=True).start()   # log thread, printing the queued texts
 
 
 
@@ -97,10 +160,10 @@ def import_parameters():
 
     
     # convenient choice for Andrea Favero, to upload the settings fitting my robot, via mac address check
-    import os.path, pathlib, json                                 # libraries needed for the json, and parameter import
+    import json                                                   # library needed for the json parameter import
     from getmac import get_mac_address                            # library to get the device MAC ddress
         
-    folder = pathlib.Path().resolve()                             # active folder (should be home/pi/cube)  
+    folder = active_folder                                        # active folder (should be home/pi/cube)  
     eth_mac = get_mac_address()                                   # mac address is retrieved
     if eth_mac == 'e4:5f:01:0a:31:ce':                            # case the script is running on AF (Andrea Favero) robot
         fname = os.path.join(folder,'Cubotone_settings_AF.txt')   # AF robot settings (do not use these at the start)
@@ -173,9 +236,7 @@ def import_parameters():
         solver_found = False                              # boolean to track exception on importing the copied solver
        
     if not solver_found:                                  # case the solver library is not in active folder
-        import os.path, pathlib                           # library to check file presence            
-        folder = pathlib.Path().resolve()                 # active folder (should be home/pi/cube)  
-        fname = os.path.join(folder,'twophase','solver.py')   # active folder + twophase' + solver name
+        fname = os.path.join(active_folder,'twophase','solver.py')   # active folder + twophase' + solver name
         if os.path.exists(fname):                         # case the solver exists in 'twophase' subfolder
             try:                                          # attempt
                 print()
@@ -211,7 +272,6 @@ def import_parameters():
 
 def check_screen_presence(debug, printout=False):
     """ Checks if a display is connected, eventually via VNC."""
-    import os
     if 'DISPLAY' in os.environ:                          # case the environment variable DISPLAY is set to 1 (there is a display)
         if debug and printout:                           # case debug variable is set true on __main__
             print('screen function is available')        # feedback is printed to the terminal
@@ -228,7 +288,7 @@ def check_screen_presence(debug, printout=False):
 def webcam():
     """Sets the camera and its resolution."""
     
-    global camera
+    global camera, frame_grabber
     
     if device == 'laptop':                                        # case the script is running on a PC/laptop (not the robot)
         camera = cv2.VideoCapture(0, cv2.CAP_DSHOW)               # laptop camera, when no USB webcam connected
@@ -237,8 +297,10 @@ def webcam():
         camera_hight_resolution = 360                             # laptop camera, height resolution setting
         camera.set(cv2.CAP_PROP_FRAME_WIDTH, camera_width_resolution)    # camera width resolution is set  
         camera.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_hight_resolution)   # camera height resolution is set
+        camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)                    # single frame driver buffer, the grabber always gets the freshest frame
         width = int(camera.get(cv2.CAP_PROP_FRAME_WIDTH))         # return the camera reading width 
         height = int(camera.get(cv2.CAP_PROP_FRAME_HEIGHT))       # return the camera reading higth 
+        frame_grabber = WebcamGrabber(camera)                     # frames are continuously captured on a separate thread
         if side == 0:
             print(f'Camera resolution: {width} x {height}\n')
         time.sleep(0.5)
@@ -255,6 +317,8 @@ def webcam():
         height =  camera_hight_res             # PiCamera height resolution setting
         camera.resolution = (width, height)    # camera's resolution is set
         
+        frame_grabber = PiCameraGrabber(camera, rawCapture)  # frames are continuously captured on a separate thread
+        
         binning = camera.sensor_mode           # PiCamera sensor_mode is checked
         
         # sensor_mode answer from the camera is interpreted
@@ -292,7 +356,7 @@ def robot_camera_warmup():
         print('\nPiCamera: waiting for AWB and Exposure gains to get stable')  # feedback is printed to the terminal
         
         if led_usage:                         # case the leds at Top_cover are activated
-            time.sleep(0.3)                   # little delay to ensure servos have reached their target position and the innertia has fully dropped
+            servo.wait_settled(0.3)           # wait for the servos to reach their target position and the innertia to drop (max 0.3 secs)
             servo.led_freq(debug)             # set high frequency to PCA 9685 board, to prevent visible flickering from the led
             servo.led_cover(cam_led_bright)   # switch the cover led ON at value
         
@@ -390,8 +454,7 @@ def robot_camera_warmup():
             if screen:                           # case a screen is connected
                 text_bg(frame, w, h)             # generates a rectangle as backgroung for text in Frame
                 cv2.putText(frame, 'Camera Gains & AWB setting', (10, 30), font, fontScale*1.2,fontColor,lineType)  
-                cv2.namedWindow("cube")          # create the cube window
-                cv2.moveWindow("cube", 0,0)      # move the window to (0,0)
+                init_windows({"cube":(0,0)})     # create the cube window at (0,0), once
                 cv2.imshow("cube", frame)        # shows the frame 
                 key=cv2.waitKey(1)               # refresh time is minimized to 1ms
                     
@@ -470,8 +533,7 @@ def robot_consistent_camera_images(PiCamera_param):
                 if screen and not robot_stop:          # case a screen is connected and no requests to stop the robot
                     text_bg(frame, w, h)               # generates a rectangle as backgroung for text in Frame
                     cv2.putText(frame, 'Exposure measurement', (10, 30), font, fontScale*1.2,fontColor,lineType)  
-                    cv2.namedWindow("cube")            # create the cube window
-                    cv2.moveWindow("cube", 0,0)        # move the window to (0,0)
+                    init_windows({"cube":(0,0)})       # create the cube window at (0,0), once
                     cv2.imshow("cube", frame)          # shows the frame 
                     key=cv2.waitKey(1)                 # refresh time is minimized to 1ms
                 time.sleep(0.3)                        # small (arbitrary) delay before reading the exposition time at PiCamera
@@ -502,14 +564,103 @@ def robot_consistent_camera_images(PiCamera_param):
 
 
 
+class PiCameraGrabber:
+    """Captures the PiCamera frames on a separate thread, via the video port, by keeping only the latest frame.
+    This prevents the (slower) still port capture to be serially executed after the servos and leds have settled.
+    The read method waits for a frame fully captured after the call, so that images taken while the cube was moving
+    are discarded."""
+    
+    def __init__(self, camera, rawCapture):
+        self.camera = camera                      # PiCamera object
+        self.rawCapture = rawCapture              # PiRGBArray used for the capturing
+        self.frame = None                         # latest captured frame
+        self.count = 0                            # counter of the captured frames
+        self.stopped = False                      # flag to stop the capturing thread
+        self.new_frame = threading.Condition()    # condition used to notify a new captured frame
+        self.thread = threading.Thread(target=self._update, daemon=True)
+        self.thread.start()
+    
+    def _update(self):
+        for capture in self.camera.capture_continuous(self.rawCapture, format="bgr", use_video_port=True):
+            with self.new_frame:                  # lock on the latest frame
+                self.frame = capture.array        # bgr is the picamera format directly compatible with CV2
+                self.count += 1                   # captured frames counter is increased
+                self.new_frame.notify_all()       # eventual waiting read is notified
+            self.rawCapture.truncate(0)           # empties the array in between each camera's capture
+            if self.stopped:                      # case the capturing has been requested to stop
+                break                             # the continuous capturing is interrupted
+    
+    def read(self, timeout=2):
+        """Returns a frame that started to be exposed after this call (the 2nd captured frame from now).
+        Returns an empty array in case no frames are captured within the timeout."""
+        with self.new_frame:                      # lock on the latest frame
+            target = self.count + 2               # the first next frame might have been exposed before the call
+            if not self.new_frame.wait_for(lambda: self.count >= target, timeout):
+                return np.empty(0)                # case no new frames within the timeout
+            return self.frame
+    
+    def stop(self):
+        self.stopped = True                       # flag to stop the capturing thread
+        self.thread.join(timeout=1)               # capturing thread is stopped at the next frame
+
+
+
+
+
+
+
+class WebcamGrabber:
+    """Captures the webcam (laptop) frames on a separate thread, by keeping only the latest frame.
+    The camera reading overlaps with the frames analysis, instead of being serially executed at each read_camera call.
+    The read method returns the latest frame not returned yet; older frames are discarded."""
+    
+    def __init__(self, camera):
+        self.camera = camera                      # cv2.VideoCapture object
+        self.frame = None                         # latest captured frame
+        self.count = 0                            # counter of the captured frames
+        self.read_count = 0                       # counter of the latest frame returned by read
+        self.stopped = False                      # flag to stop the capturing thread
+        self.new_frame = threading.Condition()    # condition used to notify a new captured frame
+        self.thread = threading.Thread(target=self._update, daemon=True)
+        self.thread.start()
+    
+    def _update(self):
+        while not self.stopped:                   # iteration until the capturing is requested to stop
+            ret, frame = self.camera.read()       # ret is the boolean if the image array is available, and the image
+            if not ret:                           # case the frame isn't available
+                time.sleep(0.01)                  # little delay before a new attempt
+                continue
+            with self.new_frame:                  # lock on the latest frame
+                self.frame = frame                # latest frame (a new array at each camera read)
+                self.count += 1                   # captured frames counter is increased
+                self.new_frame.notify_all()       # eventual waiting read is notified
+    
+    def read(self, timeout=2):
+        """Returns the latest captured frame, not returned yet (it waits for it when necessary).
+        Returns an empty array in case no new frames are captured within the timeout."""
+        with self.new_frame:                      # lock on the latest frame
+            if not self.new_frame.wait_for(lambda: self.count > self.read_count, timeout):
+                return np.empty(0)                # case no new frames within the timeout
+            self.read_count = self.count          # the latest frame is flagged as returned
+            return self.frame
+    
+    def stop(self):
+        self.stopped = True                       # flag to stop the capturing thread
+        self.thread.join(timeout=1)               # capturing thread is stopped after the current camera read
+
+
+
+
+
+
+
 def pre_read_camera():
     """Returns the camera reading, and dimensions
     This function is used the first few seconds after setting up the camera, to visualize the camera
     capture, while letting the AWB and Exposition to adjust.
     Function not called when device is laptop."""
     
-    camera.capture(rawCapture, format="bgr")                     # bgr is the picamera format directly compatible with CV2
-    frame = rawCapture.array                                     # picamera array allows usgae of numpy array
+    frame = frame_grabber.read()                                 # latest frame captured by the PiCamera thread
     if len(frame)==0:
         print("Webcam frame not available: 'ret' variable == False")
     elif len(frame)>0:
@@ -518,7 +669,6 @@ def pre_read_camera():
             frame, w, h = frame_cropping(frame, width, height)    # frame is cropped in order to limit the image area to analyze
             frame, w, h, scale = frame_resize (frame, w, h)       # frame is resized
             oneframe = True                                       # flag for a single frame analysis at the time
-            rawCapture.truncate(0)                                # empties the array in between each camera's capture   
             return frame, w, h, scale
 
 
@@ -531,17 +681,16 @@ def read_camera():
     """ Returns the camera reading, and dimensions """
     
     if device == 'laptop':                                              # case the script is running on a PC/laptop (not the robot)
-        ret, frame = camera.read()                                      # ret is the boolean if the image array is available, and the image
-        if ret==False:
+        frame = frame_grabber.read()                                    # latest frame captured by the webcam thread
+        if len(frame)==0:
             print("Webcam frame not available: 'ret' variable == False")
-        elif ret==True:
+        elif len(frame)>0:
             frame, w, h = frame_cropping(frame, width, height)          # frame is cropped in order to limit the image area to analyze
             frame, w, h, scale = frame_resize (frame, w, h)             # frame is resized
             return frame, w, h, scale
     
     elif device == 'Rpi':                                               # case the script is running at the robot
-        camera.capture(rawCapture, format="bgr")                        # bgr is the picamera format directly compatible with CV2
-        frame = rawCapture.array                                        # picamera array allows usgae of numpy array
+        frame = frame_grabber.read()                                    # latest frame captured by the PiCamera thread
         if len(frame)==0:
             print("Webcam frame not available: 'ret' variable == False")
         elif len(frame)>0:
@@ -552,7 +701,6 @@ def read_camera():
                 frame, w, h = left_bg(frame, offset, w, h)              # covers the left frame bandwidth (offset) in gray
                 
                 oneframe = True                                         # flag for a single frame analysis at the time
-                rawCapture.truncate(0)                                  # empties the array in between each camera's capture      
                 #print(f'fps: {1/(time.time()-previous_time)}')
                 return frame, w, h, scale
 
@@ -635,6 +783,17 @@ def frame_resize(frame, w, h):
 
 
 
+# constant kernels used at robot for the edges dilation and erosion (allocated once)
+kernel_5x5 = np.ones((5,5), np.uint8)
+kernel_3x3 = np.ones((3,3), np.uint8)
+
+# OpenCL (cv2 Transparent API) is used for the edges analysis when the device exposes it (i.e. laptop iGPU)
+try:
+    use_umat = cv2.ocl.haveOpenCL()   # True when an OpenCL device is available to cv2
+    cv2.ocl.setUseOpenCL(use_umat)    # OpenCL usage is enabled accordingly
+except:
+    use_umat = False                  # case of cv2 build without OpenCL support
+
 def edge_analysis(frame):
     """Image analysis that returns a balck & white image, based on the colors borders.""" 
         
@@ -643,6 +802,9 @@ def edge_analysis(frame):
     if cv_wow and screen:                                    # case screen and cv_wow variables are set true on __main__
         global gray, blurred, canny, dilated, eroded         # images are set as global variable
     
+    if use_umat:                                             # case OpenCL is available
+        frame = cv2.UMat(frame)                              # the image is uploaded once, the filters below run on the OpenCL device
+    
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)           # from BGR color space to gray scale
     blurred = cv2.GaussianBlur(gray, (9, 9), 0)              # low pass filter is applied, with a 9x9 gaussian filter
     canny = cv2.Canny(blurred, 10, 30)                       # single pixel edges, having intensity gradient between  10 and 30                      
@@ -653,11 +815,11 @@ def edge_analysis(frame):
         eroded = cv2.erode(dilated, kernel, iterations = e_iterations)  # smaller "iterations" keeps the contour apart from the edges  
     
     elif device=='Rpi':                                      # case the script is running at the robot
-        kernel = np.ones((5,5), np.uint8)                    # at robot the kernel is fixed
-        dilated = cv2.dilate(canny, kernel, iterations = 4)  # higher "iterations" is overall faster
-        kernel = np.ones((3,3), np.uint8)                    # smaller kernel is used for the erosion
-        eroded = cv2.erode(dilated, kernel, iterations = 2)  # smaller "iterations" keeps the contour apart from the edges
+        dilated = cv2.dilate(canny, kernel_5x5, iterations = 4)  # at robot the kernel is fixed, higher "iterations" is overall faster
+        eroded = cv2.erode(dilated, kernel_3x3, iterations = 2)  # smaller kernel for the erosion, smaller "iterations" keeps the contour apart from the edges
     
+    if use_umat:                                             # case OpenCL is available
+        return eroded.get()                                  # the result is downloaded once, as numpy array for the contours search
     return eroded
 
 
@@ -666,6 +828,36 @@ def edge_analysis(frame):
 
 
 
+try:
+    poll_key = cv2.pollKey       # handles the windows events and returns the pressed key, without waiting (OpenCV >= 4.5.3)
+except AttributeError:
+    def poll_key():
+        """Handles the windows events and returns the pressed key (older OpenCV versions, with a 1ms wait)."""
+        return cv2.waitKey(1)
+
+
+
+
+
+
+
+windows_placed = set()   # names of the cv2 windows already created and positioned
+
+def init_windows(windows):
+    """Creates and positions the cv2 windows, only once.
+    Argument is a dict with the windows names as keys, and the (x, y) windows position as values.
+    Windows already created are skipped, therefore the function can be called within the frames loops;
+    Destroyed windows have to be removed from windows_placed, to be placed again."""
+    
+    for name, pos in windows.items():          # iteration over the windows to be created
+        if name not in windows_placed:         # case the window has not been created yet
+            cv2.namedWindow(name)              # create the window
+            cv2.moveWindow(name, pos[0], pos[1])  # move the window to its position
+            windows_placed.add(name)           # window name is added to the set of created windows
+
+
+
+
 def show_cv_wow(cube, show=2000):
     """ shows how the image from the camera is altered to detect the facelets.
     Also possible to set a boolean to save those images."""  
@@ -675,18 +867,12 @@ def show_cv_wow(cube, show=2000):
     
     # note: for precise window position, after windows name at cv2.namedWindow, the parameter cv2.WINDOW_NORMAL  
     # should be used instead of the cv2.WINDOW_RESIZE (default), but image quality on screen changes too much....
-    cv2.namedWindow('Gray')                                                # create the Gray window
-    cv2.moveWindow('Gray', w+gap_w+offset, gap_h+background_h)             # move the Gray window to coordinate
-    cv2.namedWindow('blurred')                                             # create the Blurred window
-    cv2.moveWindow('blurred', 2*(w+gap_w)+offset, gap_h+background_h)      # move the Blurred window to coordinate
-    cv2.namedWindow('Canny')                                               # create the Canny window
-    cv2.moveWindow('Canny', 3*(w+gap_w)+offset, gap_h+background_h)        # move the Canny window to coordinate
-    cv2.namedWindow('Eroded')                                              # create the Eroded window
-    cv2.moveWindow('Eroded', 2*(w+gap_w)+offset, h+2*gap_h+background_h)   # move the Eroded window to coordinate
-    cv2.namedWindow('Dilated')                                             # create the Dilated window
-    cv2.moveWindow('Dilated', 3*(w+gap_w)+offset, h+2*gap_h+background_h)  # move the Dilated window to coordinate
-    cv2.namedWindow('Cube')                                                # create the Cube window
-    cv2.moveWindow('Cube', 0, h+2*gap_h)                                   # move the Cube window to coordinate
+    init_windows({'Gray':    (w+gap_w+offset, gap_h+background_h),            # Gray window and its coordinate
+                  'blurred': (2*(w+gap_w)+offset, gap_h+background_h),        # Blurred window and its coordinate
+                  'Canny':   (3*(w+gap_w)+offset, gap_h+background_h),        # Canny window and its coordinate
+                  'Eroded':  (2*(w+gap_w)+offset, h+2*gap_h+background_h),    # Eroded window and its coordinate
+                  'Dilated': (3*(w+gap_w)+offset, h+2*gap_h+background_h),    # Dilated window and its coordinate
+                  'Cube':    (0, h+2*gap_h)})                                 # Cube window and its coordinate
     
     cv2.imshow("Gray", gray)                                    # gray is shown, on a window called Gray
     cv2.imshow("blurred", blurred)                              # blurred is shown, on a window called Blurred
@@ -698,12 +884,9 @@ def show_cv_wow(cube, show=2000):
     cv2.waitKey(show)                                           # windows show time (ms), for longer time increase timeout variable at start_up()
             
     save_images = False                                         # boolean to enable/disable saving cv_wow images
-    import os.path, pathlib                                     # needed library
-    folder = pathlib.Path().resolve()                           # active folder (should be home/pi/cube)  
     if save_images:                                             # case the save_image is True    
-        folder = os.path.join(folder,'cv_wow_pictures')         # folder to store the cv_wow pictures
-        if not os.path.exists(folder):                          # if case the folder does not exist
-            os.makedirs(folder)                                 # folder is made if it doesn't exist
+        folder = os.path.join(active_folder,'cv_wow_pictures')  # folder to store the cv_wow pictures
+        os.makedirs(folder, exist_ok=True)                      # folder is made if it doesn't exist
         datetime = dt.datetime.now().strftime('%Y%m%d_%H%M%S')  # date_time variable is assigned, for file name
         for i, image in enumerate(('Gray', 'Blurred', 'Canny', 'Dilated', 'Eroded', 'Cube')):
             if side == 1 and i == 0:                                            # case for first image to save
@@ -787,6 +970,29 @@ def inclination_check(data):
 
 
 
+def facelets_text_laptop(frame, font_size, det_face_time):
+    """Adds the informative text on the frame top and bottom (laptop), as guidance while preparing and reading the cube side."""
+    
+    wait_time = int(delay_facelets_dec - (time.monotonic()- det_face_time))+1
+    if wait_time > 0:
+        # informative text is added on frame top, as guidance and for decoration purpose
+        cv2.putText(frame, str(f'Prepare side {sides[side]}, reading in {wait_time} s'), (10, 30), font, font_size*1.2, fontColor, lineType)
+        
+        # informative text is added on frame bottom, as guidance
+        cv2.putText(frame, str('ESC to escape, spacebar to proceed'), (10, int(h-12)), font, fontScale*1.2,fontColor,lineType)
+    else:
+        # informative text is added on frame top, as guidance and for decoration purpose
+        cv2.putText(frame, str(f'Reading side {sides[side]}'), (10, 30), font, font_size*1.2, fontColor, lineType)
+        
+        # informative text is added on frame bottom, as guidance
+        cv2.putText(frame, str('ESC to escape'), (10, int(h-12)), font, fontScale*1.2,fontColor,lineType)
+
+
+
+
+
+
+
 def read_facelets(frame, scale, det_face_time, proceed):
     """Function that uses cv2 to retrieve contours, from an image (called frame in this case)
     Contours are searched on the 'eroded edges' frame copy
@@ -802,20 +1008,7 @@ def read_facelets(frame, scale, det_face_time, proceed):
     font_size = fontScale*scale/100               # font size is adjusted according to the frame resizing factor
 
     if device=='laptop':                          # case the script is running on a PC/laptop (not the robot)
-        wait_time = int(delay_facelets_dec - (time.time()- det_face_time))+1
-        if wait_time > 0:
-            # informative text is added on frame top, as guidance and for decoration purpose
-            cv2.putText(frame, str(f'Prepare side {sides[side]}, reading in {wait_time} s'), (10, 30), font, font_size*1.2, fontColor, lineType)
-            
-            # informative text is added on frame bottom, as guidance
-            cv2.putText(frame, str('ESC to escape, spacebar to proceed'), (10, int(h-12)), font, fontScale*1.2,fontColor,lineType)
-        else:
-            # informative text is added on frame top, as guidance and for decoration purpose
-            cv2.putText(frame, str(f'Reading side {sides[side]}'), (10, 30), font, font_size*1.2, fontColor, lineType)
-            
-            # informative text is added on frame bottom, as guidance
-            cv2.putText(frame, str('ESC to escape'), (10, int(h-12)), font, fontScale*1.2,fontColor,lineType)
-        
+        facelets_text_laptop(frame, font_size, det_face_time)   # informative text is added on frame, as guidance
         roi = frame.copy()[background_h:h-background_h, offset:w]       # roi is made on a slice from the copy of the frame image
 
 
@@ -841,13 +1034,13 @@ def read_facelets(frame, scale, det_face_time, proceed):
 
 
 
-def get_approx_contours(component):
+def get_approx_contours(contour, contour_hierarchy):
     """Function that simplifies contours (from: https://docs.opencv.org/4.5.3/dd/d49/tutorial_py_contour_features.html)
-    Argument is a contour, having at least 4 vertex (contours with less than 4 vertex were previously filtered out)
+    Arguments are a contour, having at least 4 vertex (contours with less than 4 vertex were previously filtered out),
+    and its hierarchy row.
     Returns approximated contours, having 4 vertex.""" 
     
-    contour = component[0]
-    hierarchy = component[1][2]
+    hierarchy = contour_hierarchy[2]
     peri = cv2.arcLength(contour, True)
     contour_convex = cv2.convexHull(contour, False)
     contour = cv2.approxPolyDP(contour_convex, 0.1*peri, True)
@@ -1166,13 +1359,32 @@ def area_deviation(data):
 
 
 
-def distance_deviation(data, delta=0.25):
+points_h = np.array([1,2,4,5,7,8])  # points to consider for the distance along the "horizontal" array 
+points_v = np.array([3,4,5,6,7,8])  # points to consider for the distance along the "vertical" array 
+
+@njit(cache=True)
+def distance_deviation_flags(centers, delta):
+    """Numeric part of distance_deviation, on the (9,2) array of the contours centers.
+    Returns two boolean arrays, flagging the horizontal and vertical distances deviating more than delta from the median."""
+    
+    dh = centers[points_h] - centers[points_h-1]              # horizontal vectors, from the left neighbour
+    dv = centers[points_v] - centers[points_v-3]              # vertical vectors, from the upper neighbour
+    dist_h = np.sqrt(dh[:, 0]**2 + dh[:, 1]**2)               # horizontal distances between the contours centers
+    dist_v = np.sqrt(dv[:, 0]**2 + dv[:, 1]**2)               # vertical distances between the contours centers
+    median_h = np.median(dist_h)                              # median value for horiz distances
+    median_v = np.median(dist_v)                              # median value for vert distances
+    return (dist_h - median_h)/median_h > delta, (dist_v - median_v)/median_v > delta
+
+
+
+def distance_deviation(facelet_arr, delta=0.25):
     """Checks whether the distances between the 9 contours (centers) are within a certain deviation from the median
     In other words, a sanity check if all the 9 facelet are compatible with a 3x3 square array shape
     Aim of this funtion is to exclude contours generated outside the cube, due to square like shapes the webcam
     detects at the user background, face, cloths.
     The approach checks indipendently the 6 horizontal distances from the contours center, from the 6 vertical
     Considering the cube can have a certain tiltin angle (inclination), Pitagora theorem is used.
+    The argument is the facelets structured array (facelets_array), already ordered by order_9points.
     Function return a list with the index of the countours to be removed from the list of potential facelets."""
     
     d_to_exclude = []           # list of the contour index to be removed, due to excess of distance deviation
@@ -1181,34 +1393,13 @@ def distance_deviation(data, delta=0.25):
         return d_to_exclude     # Rpi (robot) do not apply this filter
     
     elif device =='laptop':     # case the script is running on a PC/laptop (not the robot)
-        distance_list_h = []    # list of the horizontal distance, of each contour from the median one
-        distance_list_v = []    # list of the vertical distance, of each contour from the median one
-
-        points_h=[1,2,4,5,7,8]  # points to consider for the distance along the "horizontal" array 
-        for i in points_h:
-            j=i-1
-            # horizontal distance between the contours centers
-            dist=math.sqrt((data[i]['cx']-data[j]['cx'])**2 + (data[i]['cy']-data[j]['cy'])**2)
-            distance_list_h.append(dist)  # list with horizontal distance between the contours centers
-
-        points_v=[3,4,5,6,7,8]  # points to consider for the distance along the "vertical" array 
-        for i in points_v:
-            k=i-3
-            # vertical distance between the contours centers
-            dist=math.sqrt((data[i]['cx']-data[k]['cx'])**2 + (data[i]['cy']-data[k]['cy'])**2)
-            distance_list_v.append(dist)
-
-        dist_median_h = statistics.median(distance_list_h)                # median value for horiz distances
-        for i in range(len(distance_list_h)):
-            delta_dist_h=(distance_list_h[i]-dist_median_h)/dist_median_h # deviation in horiz distance
-            if delta_dist_h > delta:                                      # filter if horiz deviation > threshold
-                d_to_exclude.append(i) # list with contours indexto exlude, due excess on horiz deviation from median
-
-        dist_median_v = statistics.median(distance_list_v)                # median value for vert distances
-        for i in range(len(distance_list_v)):
-            delta_dist_v=(distance_list_v[i]-dist_median_v)/dist_median_v # deviation in vert distance
-            if delta_dist_v > delta and i not in d_to_exclude: # filter if horiz deviation > threshold
-                d_to_exclude.append(i)  # list with contours indexto exlude, due excess on vert deviation from median
+        centers = np.stack((facelet_arr['cx'], facelet_arr['cy']), axis=1).astype(float)  # (9,2) array with the contours centers
+        exceed_h, exceed_v = distance_deviation_flags(centers, delta)   # distances exceeding the deviation from the medians
+        
+        d_to_exclude = np.flatnonzero(exceed_h).tolist()                # contours index to exlude, due excess on horiz deviation
+        for i in np.flatnonzero(exceed_v).tolist():                     # contours index with excess on vert deviation
+            if i not in d_to_exclude:                                   # case the index isn't already listed
+                d_to_exclude.append(i)                                  # list with contours index to exlude
         
         return d_to_exclude
 
@@ -1283,48 +1474,49 @@ def order_4points(pts):
 
 
 
-def order_9points(data, new_center):
-    """based on https://www.pyimagesearch.com/2016/03/21/ordering-coordinates-clockwise-with-python-and-opencv/
-    Orders the 9 countorus centers, in clockwise order, so that the first one is top left:
-    
-    0  1  2
-    3  4  5
-    6  7  8     """
+@njit(cache=True)
+def order_9points_index(pts):
+    """Numeric part of order_9points, on the (9,2) array of the contours centers.
+    Returns the points index ordered from top left, row by row."""
     
-    pts=np.zeros([9,2], dtype=int)
-    for i in range(len(data)):
-        pts[i]=[data[i]['cx'], data[i]['cy']]
-        
-    xSorted = pts[np.argsort(pts[:, 0]), :]        # sort all the points based on their x-coordinates
-    leftMost = xSorted[:3, :]                      # grab the left-most 3 points from the sorted x-coodinate points
-    rightMost = xSorted[6:, :]                     # grab the right-most 3 points from the sorted x-coodinate points
-    mid = xSorted[3:6, :]                          # remaining 3 points in the x middle
-    ySortedMid = mid[np.argsort(mid[:, 1]), :]     # sorts the 3 points in the x middle by the y coordinate
-    (tm, mm, bm) = ySortedMid                      # top-middle, middle-middle, bottom-midle points
+    # the sorting is done on the points index, so that the data can be reordered without searching the coordinates
+    xSorted = np.argsort(pts[:, 0])                # sort all the points index based on their x-coordinates
+    leftMost = xSorted[:3]                         # grab the left-most 3 points from the sorted x-coodinate points
+    rightMost = xSorted[6:]                        # grab the right-most 3 points from the sorted x-coodinate points
+    mid = xSorted[3:6]                             # remaining 3 points in the x middle
+    mid = mid[np.argsort(pts[mid, 1])]             # top-middle, middle-middle, bottom-midle points, sorted by the y coordinate
     
     # sort the 3 left-most points according to their y-coordinates, to grab the top/mid/bottom one respectively
-    leftMost = leftMost[np.argsort(leftMost[:, 1]), :]
-    (tl, ml, bl) = leftMost   
+    leftMost = leftMost[np.argsort(pts[leftMost, 1])]
     
     #########   starting from 20220828, based on Numpy library (no need for Scipy library)   #####################
     # Euclidean distance from top-left and right-most points: the point with largest distance will be bottom-right
-    tl = tl.reshape(1, 2)                                    # reshaping top-left coordinate array
-    D = tl[:, np.newaxis, :] - rightMost[np.newaxis, :, :]   # matrix difference, by broadcasting
-    D = np.linalg.norm(D, axis=-1)[0]                        # matrix distance by using numpy (instead of scipy)
-    tl = tl.reshape(2,)                                      # reshaping top-left coordinate array back
+    d = pts[rightMost] - pts[leftMost[0]]          # vectors by broadcasting (instead of scipy)
+    D = np.sqrt(d[:, 0]**2 + d[:, 1]**2)           # distances from the top-left point
     ##############################################################################################################
     
-    # sort the right-most according to their distance from top-left coordinate
-    (br, mr, tr) = rightMost[np.argsort(D)[::-1], :]
+    # sort the right-most according to their distance from top-left coordinate (bottom, middle, top)
+    rightMost = rightMost[np.argsort(D)[::-1]]
+    
+    return np.array([leftMost[0], mid[0], rightMost[2],     # tl, tm, tr
+                     leftMost[1], mid[1], rightMost[1],     # ml, mm, mr
+                     leftMost[2], mid[2], rightMost[0]])    # bl, bm, br
+
+
 
-    ordered_points = np.array([tl, tm, tr, ml, mm, mr, bl, bm, br])   # ordered coordinates (centers of 9 facelets)   
-    for coordinates in ordered_points:
-        for i in range(len(data)):
-            if data[i]['cx'] == coordinates[0] and data[i]['cy'] == coordinates[1]:        
-                new_center.append(data[i])        # new_center is a new list with data ordered by xy coordinates
-                data.pop(i)                       # used data-element is removed to speed up next iterations
-                break                             # inner for loop can be break once the if if found and data appended
-    return new_center
+def order_9points(facelets, facelet_arr):
+    """based on https://www.pyimagesearch.com/2016/03/21/ordering-coordinates-clockwise-with-python-and-opencv/
+    Orders the 9 countorus centers, in clockwise order, so that the first one is top left:
+    
+    0  1  2
+    3  4  5
+    6  7  8
+    
+    The facelets list and its structured array (facelets_array) are ordered together, and both returned."""
+    
+    pts = np.stack((facelet_arr['cx'], facelet_arr['cy']), axis=1).astype(np.int64)   # (9,2) array with the contours centers
+    order = order_9points_index(pts)                 # ordered index (centers of 9 facelets)
+    return [facelets[i] for i in order], facelet_arr[order]
 
 
 
@@ -1381,6 +1573,24 @@ def inner_square_points(square_dict,i,edge):
 
 
 
+inner_points_cache = {}   # dict of the 54 facelets inner square points, per cube sketch position and edge
+
+def sketch_inner_points(x_start, y_start, edge):
+    """Returns a list with the inner square points of the 54 facelets, for the cube sketch starting at x_start, y_start.
+    These points only depend on the arguments, therefore they are calculated once and later retrieved from a dict."""
+    
+    key = (x_start, y_start, edge)                                     # sketch position and edge are used as dict key
+    if key not in inner_points_cache:                                  # case the points are not calculated yet for this sketch
+        _, square_dict = cube_sketch_coordinates(x_start, y_start, edge)
+        inner_points_cache[key] = [inner_square_points(square_dict,i,edge).astype(np.int32) for i in range(54)]
+    return inner_points_cache[key]
+
+
+
+
+
+
+
 def cube_centers_color_ref(frame):
     """On the cube sketch, when the laptop is used, it suggests the faces (center) color as guidance.
     This function fills the center facelets with refence color."""
@@ -1391,7 +1601,8 @@ def cube_centers_color_ref(frame):
     elif device=='laptop':    # case the script is running on a PC/laptop (not the robot)
         x_start = edge
         y_start = background_h+2*edge+1
-        square_start_pt, square_dict = cube_sketch_coordinates(x_start,y_start, edge)
+        square_start_pt, _ = cube_sketch_coordinates(x_start,y_start, edge)
+        inner_points = sketch_inner_points(x_start, y_start, edge)  # inner square points of the 54 facelets
         d = edge         # edge lebght for each facelet reppresentation
         m = edge         # m=margin around the cube reppresentation
         
@@ -1406,7 +1617,7 @@ def cube_centers_color_ref(frame):
         center_facelet_colors= {4:'white', 13:'red', 22:'green', 31:'yellow', 40:'orange',  49:'blu'}   
         
         for key, bgr_color in center_facelets.items():
-            points=inner_square_points(square_dict,key,edge)  # coordinates for the center facelet on the iterator
+            points=inner_points[key]                          # coordinates for the center facelet on the iterator
             color= bgr_color                                  # BGR color is returned
             cv2.fillPoly(frame, pts = [points], color=color)  # facelet is fille with the BGR color for tha center
 
@@ -1423,7 +1634,8 @@ def plot_colors(BGR_mean, edge, frame, background_h, font, fontScale, lineType):
     
     x_start = edge
     y_start = background_h+14*edge
-    square_start_pt, square_dict = cube_sketch_coordinates(x_start,y_start, edge)
+    square_start_pt, _ = cube_sketch_coordinates(x_start,y_start, edge)
+    inner_points = sketch_inner_points(x_start, y_start, edge)  # inner square points of the 54 facelets
     d = edge         # edge lebght for each facelet reppresentation
     m = edge         # m=margin around the cube reppresentation
     
@@ -1439,8 +1651,7 @@ def plot_colors(BGR_mean, edge, frame, background_h, font, fontScale, lineType):
         G=BGR_mean[i][1]                                    # green component of the mean BGR, for the "í" facelet
         R=BGR_mean[i][2]                                    # red component of the mean BGR, for the "í" facelet
 #         start_point=square_dict[i]              
-        points=inner_square_points(square_dict,i,edge)      # coordinates for "i" facelet at the sketch
-        cv2.fillPoly(frame, pts = [points], color=(B,G,R))  # "i" facelet is colored with the detected average BGR color
+        cv2.fillPoly(frame, pts = [inner_points[i]], color=(B,G,R))  # "i" facelet is colored with the detected average BGR color
 
 
 
@@ -1469,18 +1680,9 @@ def cube_colors_interpreted(BGR_detected):
 
     # Step1: dict with BGR_detected and facelet's position as key
     #        dict with HSV (detected color) and facelet's position as key
-    BGR_detected_dict={} 
-    HSV_detected={}
-    for i in range(len(BGR_detected)):
-        BGR=BGR_detected[i]
-        BGR_detected_dict[i]=BGR
-        B,G,R=BGR
-        BGR_mean = np.array([[[B,G,R]]], dtype=np.uint8)
-        hsv = cv2.cvtColor( BGR_mean, cv2.COLOR_BGR2HSV)
-        H=hsv[0][0][0]
-        S=hsv[0][0][1]
-        V=hsv[0][0][2]
-        HSV_detected[i]=(H,S,V)
+    BGR_array = np.array([BGR_detected[i] for i in range(len(BGR_detected))], dtype=np.float64)   # (54,3) array with the BGR colors
+    hsv = cv2.cvtColor(BGR_array.astype(np.uint8).reshape(-1, 1, 3), cv2.COLOR_BGR2HSV)  # all the facelets converted at once
+    HSV_detected={i:tuple(hsv[i, 0]) for i in range(len(BGR_detected))}
 
     if debug:
         print(f'\nBGR_detected: {BGR_detected}')
@@ -1490,74 +1692,34 @@ def cube_colors_interpreted(BGR_detected):
     cube_ref_colors = {'white':BGR_detected[4], 'red':BGR_detected[13], 'green':BGR_detected[22],
                        'yellow':BGR_detected[31], 'orange':BGR_detected[40], 'blue':BGR_detected[49]}
     
-    # Step3: dictionary with the color distances from the (initial) references
-    color_distance={}                                             # empty dict to store all the color distances for all the facelets
-    cube_ref_colors_lab={}                                        # empty dictionary to store color refences in Lab color space
-    for color, BGR in cube_ref_colors.items():
-        B,G,R = BGR                                               # BGR values are unpact from the dict
-        cube_ref_colors_lab[color]=tuple(rgb2lab([R,G,B]))        # BGR conversion to lab color space and dict feeding
-            
-    for facelet, color_measured in BGR_detected_dict.items():         
-        B,G,R = color_measured
-        lab_meas = rgb2lab([R,G,B])                               # conversion to lab color space (due CIEDE2000 function)
-        distance=[]                                               # list with the distance from the 6 references, for each facelet
-        for color, lab_ref in cube_ref_colors_lab.items():        # iteration over the 6 reference colors
-            distance.append(CIEDE2000(tuple(lab_meas), lab_ref))  # Euclidean distance toward the 6 reference colors
-        color_distance[facelet]=distance                          
-    
-    
-    # Step4: Ordering the color distance (the min value per each facelet) by increasing values
-    color_distance_copy=color_distance.copy()                     # a dict copy is made, to drop items while the analysis progresses
-    color_distance_ordered={}                                     # empty dictiony to store the (min) color distance by increasing values
-    for i in range(len(color_distance_copy)):
-        index = color_distance_copy.keys()
-        key_min_dist = min(color_distance_copy,key=lambda key:min(color_distance_copy[key]))
-        color_distance_ordered[key_min_dist] = color_distance_copy[key_min_dist]
-        color_distance_copy.pop(key_min_dist)
-    
-    
-    # Step5: List with facelets position ordered according to the color distance increasing order
+    # Step3: matrix with the color distances of all the facelets (rows) from the 6 (initial) references (columns)
+    ref_colors = list(cube_ref_colors.keys())                     # reference colors names, as per columns order
+    ref_BGR = np.array([cube_ref_colors[color] for color in ref_colors], dtype=np.float64)   # (6,3) array with the references BGR
+    ref_lab = rgb2lab(ref_BGR[:, ::-1])                           # BGR conversion (as RGB) to lab color space, for the 6 references
+    lab_meas = rgb2lab(BGR_array[:, ::-1])                        # conversion to lab color space (due CIEDE2000 function), all facelets
+    color_distance = CIEDE2000(lab_meas[:, None, :], ref_lab[None, :, :])   # (54,6) distances toward the 6 reference colors
+    
+    
+    # Step4-6: facelets position ordered by increasing (min) color distance from the references
     # this is needed to come back later to original kociemba facelets order
-    key_ordered_by_color_distance = [x for x in color_distance_ordered.keys()]
-
+    key_ordered_by_color_distance = np.argsort(color_distance.min(axis=1), kind='stable')
 
-    # Step6: Ordering the facelets BGR color values according to color distance from the reference colors
-    BGR_ordered={}
-    for key in color_distance_ordered.keys():
-        BGR_ordered[key]=BGR_detected[key]
 
-
-    # Step7: Color interpretation
-    cube_status_by_color_distance={}          # dict to store the cube status reppresentation wih the interpreted colors
-    distance={}                               # dict to store the color distance during each facelet check
-#     distance_value=[]                       # list to store the color distance for the selectec color/facelet association
-    
-    i=0
-    for value in BGR_ordered.values():            # iteration on the facelet's BGR values ordered by increasing color distance from ref
-        B,G,R =value
-        lab_meas = rgb2lab([R,G,B])                                         # conversion to lab color space (due CIEDE2000 function)
-        for color, lab_ref in cube_ref_colors_lab.items():                  # iteration over the 6 reference colors
-            distance[color]=CIEDE2000(tuple(lab_meas), lab_ref)             # Euclidean distance toward the 6 reference colors
-        color = min(distance, key=distance.get)                             # chosem color is the one with min distance from reference
-  
-        cube_status_by_color_distance[i]=color                              # dict of cube status wih the interpreted colors  
-#         distance_value.append(distance[min(distance, key=distance.get)])  # list with the color distance of the chosen facelet's color
-        distance.clear()                                                    # distance dict is cleared for the next facelet
+    # Step7: Color interpretation, on the facelets ordered by increasing color distance from ref
+    # this step is sequential, as each interpreted facelet updates the reference of its color
+    cube_status={}                            # dict to store the cube status reppresentation wih the interpreted colors
+    for facelet in key_ordered_by_color_distance.tolist():
+        distance = CIEDE2000(lab_meas[facelet], ref_lab)                    # Euclidean distance toward the 6 reference colors
+        c = int(np.argmin(distance))                                        # chosem color is the one with min distance from reference
+        cube_status[facelet]=ref_colors[c]                                  # dict of cube status wih the interpreted colors  
         
-        B_avg = math.sqrt((B**2+ (cube_ref_colors[color][0])**2)/2)   # average Red color id made from the chosen color and previous reference
-        G_avg = math.sqrt((G**2+ (cube_ref_colors[color][1])**2)/2)   # average Green color id made from the chosen color and previous reference
-        R_avg = math.sqrt((R**2+ (cube_ref_colors[color][2])**2)/2)   # average Blue color id made from the chosen color and previous reference
-
-        cube_ref_colors[color]=(B_avg, G_avg, R_avg)                    # Color reference dict is updated with the new BGR averaged color
-        cube_ref_colors_lab[color]=tuple(rgb2lab([R_avg,G_avg,B_avg]))  # Lab color space reference dict is updated with the new color reference 
-        i+=1
+        # average BGR color is made from the chosen color and previous reference
+        ref_BGR[c] = np.sqrt((BGR_array[facelet]**2 + ref_BGR[c]**2)/2)
+        ref_lab[c] = rgb2lab(ref_BGR[c, ::-1])                              # Lab color space reference is updated with the new color reference 
     
     
-    # Step8: Cube detection status is generated
-    cube_status={}
-    for i in range(54):
-        index = key_ordered_by_color_distance.index(i)
-        cube_status[i]=cube_status_by_color_distance[index]
+    # Step8: Cube detection status is generated, as per URFDLB facelets order
+    cube_status={i:cube_status[i] for i in range(54)}
     
     
     # Step9: Cube color sequence for a nicer decoration on interpreted colors (using the HSV color space)
@@ -1853,6 +2015,44 @@ def cube_colors_interpreted_HSV(BGR_detected, HSV_detected):
 
 
 
+glyph_masks = {}   # dict of text masks rendered once, per text, font, font scale and thickness
+
+def glyph_mask(text, font, fontScale, thickness):
+    """Returns a boolean mask with the text rendered (once) via cv2.putText, and the text origin within the mask.
+    Short texts repeatedly plotted with the same font (facelets letters and numbers) are rendered only the first time."""
+    
+    key = (text, font, fontScale, thickness)                         # text and font parameters are used as dict key
+    if key not in glyph_masks:                                       # case the text mask has not been rendered yet
+        (w, h), baseline = cv2.getTextSize(text, font, fontScale, thickness)  # text size, and baseline below the text origin
+        pad = thickness + 1                                          # margin around the text, to include the stroke thickness
+        canvas = np.zeros((h + baseline + 2*pad, w + 2*pad), dtype=np.uint8)  # black canvas to render the text on
+        cv2.putText(canvas, text, (pad, h + pad), font, fontScale, 255, thickness)  # text rendered in white on the canvas
+        glyph_masks[key] = (canvas > 0, pad, h + pad)                # text mask and text origin within the mask
+    return glyph_masks[key]
+
+
+
+
+def put_glyph(frame, text, org, font, fontScale, color, thickness):
+    """Plots the text on frame like cv2.putText, by pasting the text mask rendered once by glyph_mask function.
+    The mask is clipped at the frame borders."""
+    
+    mask, ox, oy = glyph_mask(text, font, fontScale, thickness)     # text mask and text origin within the mask
+    x0, y0 = org[0]-ox, org[1]-oy                                    # mask top-left corner on the frame
+    x1, y1 = x0+mask.shape[1], y0+mask.shape[0]                      # mask bottom-right corner on the frame
+    fx0, fy0 = max(x0, 0), max(y0, 0)                                # mask top-left corner, clipped at the frame borders
+    fx1, fy1 = min(x1, frame.shape[1]), min(y1, frame.shape[0])      # mask bottom-right corner, clipped at the frame borders
+    if fx0 < fx1 and fy0 < fy1:                                      # case the text falls (at least partially) within the frame
+        frame[fy0:fy1, fx0:fx1][mask[fy0-y0:fy1-y0, fx0-x0:fx1-x0]] = color  # text pixels are colored on the frame
+
+
+
+
+# bright colors used to plot the interpreted cube status, and their index on the standard color sequence (built once)
+cube_bright_colors = {'white':(255,255,255), 'red':(0,0,204), 'green':(0,132,0), 'yellow':(0,245,245),
+                      'orange':(0,128,255), 'blue':(204,0,0)}
+COLOR_TO_STD_IDX = {color:i for i, color in enumerate(cube_bright_colors)}  # reverse map from color name to its standard sequence index
+
 def plot_interpreted_colors(device, cube_status, cube_color_sequence, cube_status_string, detect_winner, HSV_analysis,edge, frame, font, fontScale, lineType):
     """Based on the detected cube status, a sketch of the cube is plot with bright colors."""
     
@@ -1860,6 +2060,7 @@ def plot_interpreted_colors(device, cube_status, cube_color_sequence, cube_statu
     y_start=5*edge          # top lef corner of the rectangle where all the cube's faces are plot
     
     _, square_dict = cube_sketch_coordinates(x_start, y_start, edge)
+    inner_points = sketch_inner_points(x_start, y_start, edge)  # inner square points of the 54 facelets
     d = edge                # edge lenght for each facelet reppresentation
     m = edge                # m=margin around the cube reppresentation 
     cv2.rectangle(frame, (x_start-m, y_start-2*edge), (x_start+13*d, int(y_start+9.2*d)), (230,230,230), -1) #gray background
@@ -1874,22 +2075,17 @@ def plot_interpreted_colors(device, cube_status, cube_color_sequence, cube_statu
     
     
     
-    cube_bright_colors = {'white':(255,255,255), 'red':(0,0,204), 'green':(0,132,0), 'yellow':(0,245,245),
-                          'orange':(0,128,255), 'blue':(204,0,0)}
-    std_color_sequence = list(cube_bright_colors.keys())        
-    
     for i, color in enumerate(cube_status.values()):
         start_point=square_dict[i]                                       # top-left poiint coordinate
         if HSV_analysis:                                                 # case the detected 6 center facelets have 6 different colors
             cv2.rectangle(frame, tuple(start_point), (start_point[0]+d, start_point[1]+d), (0, 0, 0), 1) # squre black frame
-            col=cube_color_sequence[std_color_sequence.index(color)]     # from standard color sequence to the one detected, due to cube orientation at start
+            col=cube_color_sequence[COLOR_TO_STD_IDX[color]]             # from standard color sequence to the one detected, due to cube orientation at start
             B,G,R = cube_bright_colors[col]                              # BGR values of the bright colors for the corresponding detected color
-            inner_points=inner_square_points(square_dict,i,d)            # array with the 4 square inner vertex coordinates
-            cv2.fillPoly(frame, pts = [inner_points], color=(B,G,R))     # inner square is colored with bright color of the interpreted one
+            cv2.fillPoly(frame, pts = [inner_points[i]], color=(B,G,R))  # inner square is colored with bright color of the interpreted one
         else:                                                            # case the detected 6 center facelets do not have 6 different colors
             
-            cv2.putText(frame, cube_status_string[i], (start_point[0]+int(0.2*d), int(start_point[1]+int(0.8*d))),\
-                        font, fontScale*0.5,(0,0,0),lineType)            # facelets side LETTER is printed on the sketch
+            put_glyph(frame, cube_status_string[i], (start_point[0]+int(0.2*d), int(start_point[1]+int(0.8*d))),\
+                      font, fontScale*0.5,(0,0,0),lineType)              # facelets side LETTER is printed on the sketch
 
 #         col=cube_color_sequence[std_color_sequence.index(color)]  # from "URFDLB cube status" color to detected color
 #         B,G,R = cube_bright_colors[col]                           # decorating a cube reppresentation with bright colors
@@ -1914,48 +2110,24 @@ def rgb2lab(inputColor):
                 http://www.easyrgb.com/index.php?X=MATH&H=07#text7
     
     L*a*b color space is a device-independent, "standard observer" model.
-    It is useful in industry for detecting small differences in color."""
-    
-    num = 0
-    RGB = [0, 0, 0]
-    for value in inputColor:
-        value = float(value) / 255
-        if value > 0.04045:
-            value = ((value + 0.055) / 1.055) ** 2.4
-        else:
-            value = value / 12.92
-        RGB[num] = value * 100
-        num = num + 1
-    XYZ = [0, 0, 0, ]
-    X = RGB[0] * 0.4124 + RGB[1] * 0.3576 + RGB[2] * 0.1805
-    Y = RGB[0] * 0.2126 + RGB[1] * 0.7152 + RGB[2] * 0.0722
-    Z = RGB[0] * 0.0193 + RGB[1] * 0.1192 + RGB[2] * 0.9505
-    XYZ[0] = round(X, 4)
-    XYZ[1] = round(Y, 4)
-    XYZ[2] = round(Z, 4)
+    It is useful in industry for detecting small differences in color.
+    The argument can be a single RGB color, or an array of colors (one per row): all of them are converted at once."""
+    
+    RGB = np.asarray(inputColor, dtype=np.float64) / 255
+    RGB = np.where(RGB > 0.04045, ((RGB + 0.055) / 1.055) ** 2.4, RGB / 12.92) * 100
+    R, G, B = RGB[..., 0], RGB[..., 1], RGB[..., 2]
+    X = np.round(R * 0.4124 + G * 0.3576 + B * 0.1805, 4)
+    Y = np.round(R * 0.2126 + G * 0.7152 + B * 0.0722, 4)
+    Z = np.round(R * 0.0193 + G * 0.1192 + B * 0.9505, 4)
 
     # Observer= 2°, Illuminant= D65
-    XYZ[0] = float(XYZ[0]) / 95.047         # ref_X =  95.047
-    XYZ[1] = float(XYZ[1]) / 100.0          # ref_Y = 100.000
-    XYZ[2] = float(XYZ[2]) / 108.883        # ref_Z = 108.883
-
-    num = 0
-    for value in XYZ:
-        if value > 0.008856:
-            value = value ** (0.3333333333333333)
-        else:
-            value = (7.787 * value) + (16 / 116)
-        XYZ[num] = value
-        num = num + 1
-    Lab = [0, 0, 0]
-    L = (116 * XYZ[1]) - 16
-    a = 500 * (XYZ[0] - XYZ[1])
-    b = 200 * (XYZ[1] - XYZ[2])
-
-    Lab[0] = round(L, 4)
-    Lab[1] = round(a, 4)
-    Lab[2] = round(b, 4)
-    return Lab
+    XYZ = np.stack((X / 95.047, Y / 100.0, Z / 108.883), axis=-1)   # ref_X =  95.047, ref_Y = 100.000, ref_Z = 108.883
+    XYZ = np.where(XYZ > 0.008856, XYZ ** (0.3333333333333333), (7.787 * XYZ) + (16 / 116))
+    
+    L = (116 * XYZ[..., 1]) - 16
+    a = 500 * (XYZ[..., 0] - XYZ[..., 1])
+    b = 200 * (XYZ[..., 1] - XYZ[..., 2])
+    return np.round(np.stack((L, a, b), axis=-1), 4)
 
 
 
@@ -1966,66 +2138,62 @@ def rgb2lab(inputColor):
 def CIEDE2000(Lab_1, Lab_2):
     """Calculates CIEDE2000 color distance between two CIE L*a*b* colors
     from: https://github.com/lovro-i/CIEDE2000
-    It returns the Euclidean distance between two colors, and it is used to compare each facelet toward the 6 centers."""
+    It returns the Euclidean distance between two colors, and it is used to compare each facelet toward the 6 centers.
+    The arguments can be arrays of Lab colors (Lab on the last axis), broadcasted against each other: i.e. the 54 facelets
+    as (54,1,3) and the 6 centers as (1,6,3) return the (54,6) distances matrix in one pass."""
     
     C_25_7 = 6103515625 # 25**7
 
-    L1, a1, b1 = Lab_1[0], Lab_1[1], Lab_1[2]
-    L2, a2, b2 = Lab_2[0], Lab_2[1], Lab_2[2]
-    C1 = math.sqrt(a1**2 + b1**2)
-    C2 = math.sqrt(a2**2 + b2**2)
+    Lab_1, Lab_2 = np.asarray(Lab_1, dtype=np.float64), np.asarray(Lab_2, dtype=np.float64)
+    L1, a1, b1 = Lab_1[..., 0], Lab_1[..., 1], Lab_1[..., 2]
+    L2, a2, b2 = Lab_2[..., 0], Lab_2[..., 1], Lab_2[..., 2]
+    C1 = np.hypot(a1, b1)
+    C2 = np.hypot(a2, b2)
     C_ave = (C1 + C2) / 2
-    G = 0.5 * (1 - math.sqrt(C_ave**7 / (C_ave**7 + C_25_7)))
+    G = 0.5 * (1 - np.sqrt(C_ave**7 / (C_ave**7 + C_25_7)))
     
     L1_, L2_ = L1, L2
     a1_, a2_ = (1 + G) * a1, (1 + G) * a2
     b1_, b2_ = b1, b2
     
-    C1_ = math.sqrt(a1_**2 + b1_**2)
-    C2_ = math.sqrt(a2_**2 + b2_**2)
+    C1_ = np.hypot(a1_, b1_)
+    C2_ = np.hypot(a2_, b2_)
     
-    if b1_ == 0 and a1_ == 0: h1_ = 0
-    elif a1_ >= 0: h1_ = math.atan2(b1_, a1_)
-    else: h1_ = math.atan2(b1_, a1_) + 2 * math.pi
+    h1_ = np.arctan2(b1_, a1_)
+    h1_ = np.where((b1_ == 0) & (a1_ == 0), 0, np.where(a1_ >= 0, h1_, h1_ + 2 * math.pi))
     
-    if b2_ == 0 and a2_ == 0: h2_ = 0
-    elif a2_ >= 0: h2_ = math.atan2(b2_, a2_)
-    else: h2_ = math.atan2(b2_, a2_) + 2 * math.pi
+    h2_ = np.arctan2(b2_, a2_)
+    h2_ = np.where((b2_ == 0) & (a2_ == 0), 0, np.where(a2_ >= 0, h2_, h2_ + 2 * math.pi))
 
     dL_ = L2_ - L1_
     dC_ = C2_ - C1_    
     dh_ = h2_ - h1_
-    if C1_ * C2_ == 0: dh_ = 0
-    elif dh_ > math.pi: dh_ -= 2 * math.pi
-    elif dh_ < -math.pi: dh_ += 2 * math.pi        
-    dH_ = 2 * math.sqrt(C1_ * C2_) * math.sin(dh_ / 2)
+    C1C2 = C1_ * C2_
+    dh_ = np.where(C1C2 == 0, 0, np.where(dh_ > math.pi, dh_ - 2 * math.pi, np.where(dh_ < -math.pi, dh_ + 2 * math.pi, dh_)))
+    dH_ = 2 * np.sqrt(C1C2) * np.sin(dh_ / 2)
     
     L_ave = (L1_ + L2_) / 2
     C_ave = (C1_ + C2_) / 2
     
-    _dh = abs(h1_ - h2_)
+    _dh = np.abs(h1_ - h2_)
     _sh = h1_ + h2_
-    C1C2 = C1_ * C2_
     
-    if _dh <= math.pi and C1C2 != 0: h_ave = (h1_ + h2_) / 2
-    elif _dh  > math.pi and _sh < 2 * math.pi and C1C2 != 0: h_ave = (h1_ + h2_) / 2 + math.pi
-    elif _dh  > math.pi and _sh >= 2 * math.pi and C1C2 != 0: h_ave = (h1_ + h2_) / 2 - math.pi 
-    else: h_ave = h1_ + h2_
+    h_ave = np.where(C1C2 == 0, h1_ + h2_,
+                     np.where(_dh <= math.pi, (h1_ + h2_) / 2,
+                              np.where(_sh < 2 * math.pi, (h1_ + h2_) / 2 + math.pi, (h1_ + h2_) / 2 - math.pi)))
     
-    T = 1 - 0.17 * math.cos(h_ave - math.pi / 6) + 0.24 * math.cos(2 * h_ave) + 0.32 * math.cos(3 * h_ave + math.pi / 30) - 0.2 * math.cos(4 * h_ave - 63 * math.pi / 180)
+    T = 1 - 0.17 * np.cos(h_ave - math.pi / 6) + 0.24 * np.cos(2 * h_ave) + 0.32 * np.cos(3 * h_ave + math.pi / 30) - 0.2 * np.cos(4 * h_ave - 63 * math.pi / 180)
     
-    h_ave_deg = h_ave * 180 / math.pi
-    if h_ave_deg < 0: h_ave_deg += 360
-    elif h_ave_deg > 360: h_ave_deg -= 360
-    dTheta = 30 * math.exp(-(((h_ave_deg - 275) / 25)**2))
+    h_ave_deg = (h_ave * 180 / math.pi) % 360     # modulo wraps h_ave_deg within 0 to 360 deg, without branches
+    dTheta = 30 * np.exp(-(((h_ave_deg - 275) / 25)**2))
     
-    R_C = 2 * math.sqrt(C_ave**7 / (C_ave**7 + C_25_7))  
+    R_C = 2 * np.sqrt(C_ave**7 / (C_ave**7 + C_25_7))  
     S_C = 1 + 0.045 * C_ave
     S_H = 1 + 0.015 * C_ave * T
     
     Lm50s = (L_ave - 50)**2
-    S_L = 1 + 0.015 * Lm50s / math.sqrt(20 + Lm50s)
-    R_T = -math.sin(dTheta * math.pi / 90) * R_C
+    S_L = 1 + 0.015 * Lm50s / np.sqrt(20 + Lm50s)
+    R_T = -np.sin(dTheta * math.pi / 90) * R_C
 
     k_L, k_C, k_H = 1, 1, 1
     
@@ -2033,7 +2201,7 @@ def CIEDE2000(Lab_1, Lab_2):
     f_C = dC_ / k_C / S_C
     f_H = dH_ / k_H / S_H
     
-    dE_00 = math.sqrt(f_L**2 + f_C**2 + f_H**2 + R_T * f_C * f_H)
+    dE_00 = np.sqrt(f_L**2 + f_C**2 + f_H**2 + R_T * f_C * f_H)
     
     return dE_00
 
@@ -2088,6 +2256,25 @@ def URFDLB_facelets_order(BGR_mean):
 
 
 
+deco = None         # decoration process, started once and re-used at each cube solving (robot)
+deco_queue = None   # queue sending the decoration info to the decoration process
+
+def decoration_worker(deco_queue):
+    """Decoration process loop: the decoration is made for each deco_info received on the queue, until None is received.
+    This process is started once, so the process start (spawn) cost isn't paid at each cube solving."""
+    
+    while True:
+        deco_info = deco_queue.get()     # waits for the decoration info
+        if deco_info is None:            # case the None sentinel is received
+            break                        # the process returns
+        decoration(deco_info)            # decoration is made
+
+
+
+
+
+
+
 def decoration(deco_info):
     """Plot the cube's status made by a collage of images taken along the facelets color detection
     On the collage is also proposed the cube's sketches made with detected and interpreted colors
@@ -2127,24 +2314,17 @@ def decoration(deco_info):
     collage=faces_collage(faces, device)                 # collage function is called
 
     if device=='Rpi':                                    # case the script is running at the robot
-        import os                                        # os is imported to ensure the folder check/make
-        folder = os.path.join('.','CubesStatusPictures') # folder to store the collage pictures
-        if not os.path.exists(folder):                   # if case the folder does not exist
-            os.makedirs(folder)                          # folder is made if it doesn't exist
-        fname = folder+'/cube_collage'+timestamp+'.png'  # folder+filename with timestamp for the resume picture
+        fname = os.path.join(collage_folder, 'cube_collage'+timestamp+'.png')  # folder+filename with timestamp for the resume picture
         status=cv2.imwrite(fname, collage)               # cube sketch with detected and interpred colors is saved as image
     
     if screen:                                           # case a screen is connected
         cv2.namedWindow("cube_collage")                  # create the collage window
         cv2.moveWindow("cube_collage", 0,0)              # move the collage window to (0,0)
         cv2.imshow("cube_collage", collage)              # while the robot solves the cube the starting status is shown
-        key=cv2.waitKey(int(show_time*1000))             # showtime is trasformed from milliseconds to seconds
-        if key == 27 & 0xFF or robot_stop==True:         # ESC button can be used to escape each window
-            try: cv2.destroyWindow("cube_collage")       # cube window is closed via esc button          
-            except: pass
+        cv2.waitKey(int(show_time*1000))                 # showtime is trasformed from milliseconds to seconds, ESC key escapes earlier
         
-        try: cv2.destroyWindow("cube_collage")           # cube window is closed at function end
-        except: pass
+        try: cv2.destroyWindow("cube_collage")           # cube window is closed at function end (or after the ESC key)
+        except: pass                                     # case the window was already closed via the X on its bar
 
 
 
@@ -2157,7 +2337,7 @@ def faces_collage(faces, device):
     The 6 cube faces images, taken while detecting the facelets colors, are used for this collage.
     The Sketch with detected and interpreted cune is also used on this collage.
     The 6 cube faces images are resized to a predefined dimension.
-    Gray rectangles are generated and used to complete the picture.
+    The collage canvas is preallocated with a light gray background, and the images are copied into it.
     Once the collage is made, the original dict of images is cleared, to save some memory."""
     
     face_h = faces[1].shape[0]                                   # height of the cube's face1 image, still on memory
@@ -2165,9 +2345,6 @@ def faces_collage(faces, device):
     for i in range(1,7):                                         # image of all cube faces (1 to 6 )
         faces[i]=cv2.resize(faces[i], (face_h, face_h), interpolation = cv2.INTER_AREA)  # are resized to square of 300 pixels, or face1 height
     
-    empty_face = np.zeros([face_h, face_h, 3],dtype=np.uint8)    # empty array having same dimensions of cube's faces images
-    empty_face.fill(230)                                         # array is filled with light gray
-    
     # faces[7] is a resume image, still on memory, with detected and interpreted facelets colors
     resume_h = faces[7].shape[0]            # width of faces[7]
     resume_w = faces[7].shape[1]            # height of faces[7]
@@ -2188,14 +2365,13 @@ def faces_collage(faces, device):
     elif device == 'Rpi':                   # case the script is running at the robot
         seq=[1,5,4,3,6,2]                   # faces order at robot is hard coded for movements convenience
 
-    col1=np.vstack([empty_face, faces[seq[4]], empty_face])        # vertical stack of images, to generate 1st column for the pictures collage
-    col2=np.vstack([faces[seq[0]], faces[seq[2]], faces[seq[3]]])  # vertical stack of images, to generate 2nd column for the pictures collage
-    col3=np.vstack([empty_face, faces[seq[1]], empty_face])        # vertical stack of images, to generate 3rd column for the pictures collage
-    col4=np.vstack([empty_face, faces[seq[5]], empty_face])        # vertical stack of images, to generate 4th column for the pictures collage
+    collage = np.full((3*face_h, 4*face_h+resume_w, 3), 230, dtype=np.uint8)  # collage canvas preallocated once, filled with light gray
+    for col, row, k in ((0,1,4), (1,0,0), (1,1,2), (1,2,3), (2,1,1), (3,1,5)):      # (column, row, seq index) of each cube's face on the collage
+        collage[row*face_h:(row+1)*face_h, col*face_h:(col+1)*face_h] = faces[seq[k]]  # cube's face image is copied into its tile
+    collage[:, 4*face_h:] = resume_resized                         # resume image occupies the last "column" of the collage
     
     faces.clear()                                                  # dictionary of images is cleared
 
-    collage = np.hstack([col1,col2,col3,col4,resume_resized])      # horizzontal stack of 5 columns of images, to generate the pictures collage
     collage_ratio = collage.shape[1] / collage.shape[0]            # collage ratio (width/height) is calculated for resizing 
     collage_w=1024                                                 # colleage width is fixed for consistent pictures archiving at Rpi
     collage_h=int(collage_w/collage_ratio)                         # colleage heigth is calculated to maintain proportions
@@ -2226,11 +2402,17 @@ def cube_string(cube_status):
 
 
 
+solved_cube_string = 'U'*9 + 'R'*9 + 'F'*9 + 'D'*9 + 'L'*9 + 'B'*9   # cube status string of a solved cube (URFDLB order)
+
 def cube_solution(cube_string):
     """Calls the Hegbert Kociemba solver, and returns the solution's moves
     from: https://github.com/hkociemba/RubiksCube-TwophaseSolver 
     (Solve Rubik's Cube in less than 20 moves on average with Python)
-    The returned string is slightly manipulated to have the moves amount at the start."""
+    The returned string is slightly manipulated to have the moves amount at the start.
+    An already solved cube is returned straight away, with the same strings the solver would lead to."""
+    
+    if cube_string == solved_cube_string:   # case the cube is already solved
+        return '', '0 moves  '        # empty solution and zero moves, without calling the solver
     
     s = sv.solve(cube_string, 20, 2)  # solves with a maximum of 20 moves and a timeout of 2 seconds for example
     solution = s[:s.find('(')]        # solution capture the sequence of manouvre
@@ -2248,6 +2430,26 @@ def cube_solution(cube_string):
 
 
 
+solver_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)   # thread solving the cube while the robot opens the top cover
+
+def solve_cube_status(URFDLB_facelets_BGR_mean):
+    """Interprets the detected colors (BGR color distance) and calls the Kociemba solver.
+    At the robot this function runs on the solver_executor thread, while the top cover is opened.
+    The time spent is returned as last item, as the solving overlaps the robot movements."""
+    
+    t_start = time.monotonic()                       # time at the colors interpretation start
+    cube_status, HSV_detected, cube_color_sequence, HSV_analysis = cube_colors_interpreted(URFDLB_facelets_BGR_mean)  # cube string status with colors detected 
+    cube_status_string = cube_string(cube_status)    # cube string for the solver
+    solution, solution_Text = cube_solution(cube_status_string)   # Kociemba solver is called to have the solution string
+    solve_secs = time.monotonic() - t_start          # time spent on colors interpretation and solving
+    return cube_status, HSV_detected, cube_color_sequence, HSV_analysis, cube_status_string, solution, solution_Text, solve_secs
+
+
+
+
+
+
+
 def text_bg(frame, w, h):
     """Generates a black horizontal bandwith at frame top (also bottom when device=='laptop'), as backgroung for the text
     This is usefull when the program runs on a lapton, to provide guidance/feedback text to user
@@ -2281,22 +2483,27 @@ def text_font():
 
 
 
-def robot_facelets_rotation(facelets):
+rot_90_cw_index = [2, 5, 8, 1, 4, 7, 0, 3, 6]     # facelets order, from 90deg ccw read face to the user point of view
+rot_90_cw = itemgetter(*rot_90_cw_index)          # same order, as itemgetter for the facelets list
+
+def robot_facelets_rotation(facelets, facelet_arr):
     """Rotates the facelets order, from robot's camera/cube orientation to the kociemba point of view
     This has to do with the way the PiCamera is mounted on the robot, as well as how the faces are presented
     during the cube status reading
     Argument is the dictionary of facelets (key:interpreted color) are retrieved by the robot
     Return is a dictionary of facelets (key:interpreted color) that follows the URFDLB order
-    The return allows to have an interpreted cube status as per user point of view."""
+    The return allows to have an interpreted cube status as per user point of view.
+    The facelets list is re-ordered in place, the facelets structured array is returned with the same order."""
     
     if device == 'laptop':    # case the script is running on a PC/laptop (not the robot)
-        return                # this function is not executed
+        return facelet_arr    # this function is not executed
     
     elif device == "Rpi":
 
         # On sides 1, 3, 4, PiCamera reads facelets at 180deg with reference to user point of view
         if side in [1, 3, 4]:                              
             facelets.reverse()   # reversiong the order on the original facelet list solves the problem
+            return facelet_arr[::-1]
         
         
         # On sides 5, 6, PiCamera reads facelets at 90deg ccw with reference to user point of view
@@ -2306,8 +2513,10 @@ def robot_facelets_rotation(facelets):
         #                    8  5  2          3  4  5
         #                    9  6  3          6  7  8
         elif side in [5, 6]:
-            rot_90_cw = [2, 5, 8, 1, 4, 7, 0, 3, 6]
-            facelets[:] = [facelets[i] for i in rot_90_cw]
+            facelets[:] = rot_90_cw(facelets)   # facelets re-ordered via the module level itemgetter
+            return facelet_arr[rot_90_cw_index]
+        
+        return facelet_arr
 
         # in case the face was rotated 90deg ccw: rot_90_ccw = [6, 3, 0, 7, 4, 1, 8, 5, 2]
         
@@ -2317,49 +2526,33 @@ def robot_facelets_rotation(facelets):
 
 
 
-def average_color(image, x, y):
+def average_colors(image, facelets):
     """From: https://sighack.com/post/averaging-rgb-colors-the-right-way
-     Averages the pixels within a square defined area on an image
-     The average is calculated as the square root of the sum of the squares for the BGR colors
-     region centered at (x, y) meant as the square center, with 2*side as quare side lenght in pixels.
-     The function return a tuple with the averaged BGR colors
-     Pixel by pixel iteration doesn't sound efficient, yet for the small aarea I couldn't notice a time increment."""
+     Averages the pixels within a square defined area on an image, for all the facelets at once
+     The average is calculated as the square root of the mean of the squares for the BGR colors
+     Each region is centered at the facelet center (cx, cy), with 2*edge as square side lenght in pixels.
+     The 9 squares are stacked in a single array, and reduced in one NumPy pass.
+     The function returns an array (one row per facelet) with the averaged BGR colors."""
     
     global edge
     # square edge, used for sketching the cube, is used as (half) side of the square to calculate the averaged color
     
-    blue=float(0)
-    green=float(0)
-    red=float(0)
-    
-    #Iterate through pixels of a bounding box having 2*edge as square side length in pixels
-    for i in range(2*edge):         # foor loop used to iterate the colums on the image square 
-        j=i-edge                    # iterator j is "shifted" by half of the square of pixels to analyse
-        for i in range(2*edge):     # for loops to iterate trhough the rows of th eimage square
-            bgr=image[y+j,x-edge+i]      # gbr of a singele pixel
-            b,g,r = bgr                  # bgr components
-            b=int(b)                     # from uint8 to integer
-            g=int(g)                     # from uint8 to integer
-            r=int(r)                     # from uint8 to integer
-            
-            #Sum the squares of components
-            blue=blue+b*b                # progressive sum of the square values for the blue component
-            green=green+g*g              # progressive sum of the square values for the green component
-            red=red+r*r                  # progressive sum of the square values for the red component
-    num=4*edge*edge                      # amount of pixels in the image square under analysis    
+    squares = np.stack([image[f['cy']-edge:f['cy']+edge, f['cx']-edge:f['cx']+edge] for f in facelets]).astype(np.float64)
+    bgr_means = np.sqrt((squares*squares).mean(axis=(1,2))).astype(int)   # sqrt of the mean of squared B, G, and R, per facelet
     
     # for debug purpose it is drawn the contour of the used area where the facelet's color is averaged 
     if debug and screen:
-        tl=(x-edge, y-edge)                  # top left coordinate 
-        tr=(x+edge, y-edge)                  # top right coordinate 
-        br=(x+edge, y+edge)                  # bottom left coordinate 
-        bl=(x-edge, y+edge)                  # bottom left coordinate 
-        pts=np.array([tl, tr, br, bl])       # array of coordinates
-        contour = [pts]                      # list is made with the array of coordinates
-        cv2.drawContours(frame, contour, -1, (230, 230, 230), 2)  # a white polyline is drawn on the contour (2 px thickness)
+        for f in facelets:
+            x, y = f['cx'], f['cy']              # facelet center coordinates
+            tl=(x-edge, y-edge)                  # top left coordinate 
+            tr=(x+edge, y-edge)                  # top right coordinate 
+            br=(x+edge, y+edge)                  # bottom left coordinate 
+            bl=(x-edge, y+edge)                  # bottom left coordinate 
+            pts=np.array([tl, tr, br, bl])       # array of coordinates
+            contour = [pts]                      # list is made with the array of coordinates
+            cv2.drawContours(frame, contour, -1, (230, 230, 230), 2)  # a white polyline is drawn on the contour (2 px thickness)
     
-    #Return the sqrt of the mean of squared B, G, and R sums 
-    return (int(math.sqrt(blue/num)), int(math.sqrt(green/num)), int(math.sqrt(red/num)))
+    return bgr_means
 
 
 
@@ -2379,23 +2572,26 @@ def read_color(facelets, candidates, BGR_mean, H_mean, scale, wait=20, index=0):
 #         imgplot = plt.imshow(img)                             # frame's image is converted to RGB and plotted via matplotlib 
 #         plt.show()                                            # frame's image is converted to RGB and plotted via matplotlib 
     
+    bgr_means = average_colors(frame, facelets)               # colors are averaged with sqr sum os squares, for all the facelets at once
+    hsv = cv2.cvtColor(bgr_means.astype(np.uint8).reshape(-1, 1, 3), cv2.COLOR_BGR2HSV)  # HSV color space equilavent values, in one conversion
+    for bgr_mean_sq, hue in zip(bgr_means.tolist(), hsv[:, 0, 0]):
+        BGR_mean.append(tuple(bgr_mean_sq))                   # Initially used a simpler mean to average the facelet color
+        H_mean.append(hue)                                    # the (avg) Hue value is stored on a list
+    
+    if device=='laptop':                                      # case the script is running on a PC/laptop (not the robot)
+        roi = np.zeros_like(frame)                            # black frame, to display one facelet at the time (allocated once per face)
+    
     for facelet in facelets:                                  # iteration over the 9 facelets just detedcted
         contour = facelet.get('contour')                      # contour of the facelet under analysis
         candidates.append(contour)                            # new contour is added to the candidates list
-        mask = np.zeros(frame.shape[:2], dtype="uint8")       # mask of zeros is made for the frame shape dimension
-        cv2.drawContours(mask, [contour], -1, 255, -1)        # mask is applied to vsualize one facelet at the time
         
         if device=='laptop':                                  # case the script is running on a PC/laptop (not the robot)
-            roi = cv2.bitwise_and(frame, frame, mask=mask)    # ROI is used to shortly display one facelet at the time
-        
-        cm_point=facelet['cx'],facelet['cy']                  # contour center coordinate
-        bgr_mean_sq = average_color(frame, facelet['cx'], facelet['cy'])  # color is averaged with sqr sum os squares
-        BGR_mean.append(bgr_mean_sq)                          # Initially used a simpler mean to average the facelet color
-        b,g,r = bgr_mean_sq                                   # BGR (avg) components are retrieved
-        BGR_mean_sq = np.array([[[b,g,r]]], dtype=np.uint8)   # BGR are positioned in cv2 array form
-        hsv = cv2.cvtColor( BGR_mean_sq, cv2.COLOR_BGR2HSV)   # HSV color space equilavent values, for the average facelet color
-        hue, s, v = cv2.split(hsv)                            # HSV components are retrieved
-        H_mean.append((hue[0][0]))                            # the (avg) Hue value is stored on a list
+            x, y, w, h = cv2.boundingRect(contour)            # bounding box of the facelet contour
+            mask = np.zeros((h, w), dtype="uint8")            # mask of zeros is made only for the facelet bounding box
+            cv2.drawContours(mask, [contour], -1, 255, -1, offset=(-x, -y))  # mask is applied to vsualize one facelet at the time
+            bbox = frame[y:y+h, x:x+w]                        # frame slice of the facelet bounding box
+            roi_bbox = roi[y:y+h, x:x+w]                      # roi slice of the facelet bounding box
+            roi_bbox[:] = cv2.bitwise_and(bbox, bbox, mask=mask)  # ROI is used to shortly display one facelet at the time
         
         if device=='laptop':                     # case the script is running on a PC/laptop (not the robot)
             if cv_wow:                           # case cv_wow variable is set true on __main__
@@ -2404,10 +2600,10 @@ def read_color(facelets, candidates, BGR_mean, H_mean, scale, wait=20, index=0):
             
             elif not cv_wow:                     # case cv_wow variable is set false on __main__
                 if fixWindPos:                   # case the fixWindPos variable is set true on __main__ 
-                    cv2.namedWindow("cube")      # create the cube window
-                    cv2.moveWindow("cube", 0,0)  # move the window to (0,0)
+                    init_windows({"cube":(0,0)}) # create the cube window at (0,0), once
                 cv2.imshow("cube", roi)          # ROI is shortly display one facelet at the time
                 cv2.waitKey(wait)                # this waiting time is meant as decoration to see each facelet being detected
+            roi_bbox[:] = 0                      # roi is set back to black, for the next facelet
             
             facelet_num = str(index+1)                   # string of the facelet number within the face (1 to 9)
             x = int(facelet.get('cx'))-int(12*scale/100) # x coordinate to add the facelet number text on the facelet
@@ -2415,7 +2611,7 @@ def read_color(facelets, candidates, BGR_mean, H_mean, scale, wait=20, index=0):
             font_size = fontScale*scale/100              # font size is adjusted according to the frame resizing factor
             
             # a progressive facelet numer, 1 to 9, is placed over the facelets
-            cv2.putText(frame, facelet_num, (x, y), font, font_size, (0,0,0), lineType)
+            put_glyph(frame, facelet_num, (x, y), font, font_size, (0,0,0), lineType)
         index+=1
     
 
@@ -2425,151 +2621,159 @@ def read_color(facelets, candidates, BGR_mean, H_mean, scale, wait=20, index=0):
 
 
 
-def rotate_image(image, image_center, angle):
-    """This function rotates an image of a given angle with reference to the given center.
-    This function is used to align the cropped cube face image, before cropping it.
-    This function is only called when the laptop is used (cube is manually presented to the laptop camera).
-    Overall scope of this funtion is decorative, to generate an unfoalded cube collage of images."""
-    
-    rot_mat = cv2.getRotationMatrix2D(image_center, angle, 1.0)
-    rotated_img = cv2.warpAffine(image, rot_mat, image.shape[1::-1], flags=cv2.INTER_LINEAR)
-    return rotated_img
+# robot: index of the (Kociemba ordered) facelets laying at the camera top-left and bottom-right corners, per side
+# sides 1, 3, 4 are read at 180deg (reversed order), sides 5, 6 at 90deg ccw, side 2 as it is
+camera_corner_facelets = {1:(8,0), 3:(8,0), 4:(8,0), 5:(6,2), 6:(6,2)}
 
+faces_buf = None   # buffer for the (laptop) cube faces images from side 2 to 6, allocated once for a given frame_width
 
+# facelets centers and ordered contours, as numpy structured array (one record per facelet) used by face_image
+facelet_dtype = np.dtype([('cx','i4'), ('cy','i4'), ('cont','i4',(4,2))])
 
+def facelets_array(facelets):
+    """Converts the list of facelets dictionaries to a structured array, in a single pass."""
+    return np.array([(f['cx'], f['cy'], f['cont_ordered']) for f in facelets], dtype=facelet_dtype)
 
 
-def face_image(frame, facelets, side, faces):
+def _face_image_laptop(frame, facelet_arr, side, faces):
     """Slice a frame rectangular portion to temporary store the cube image.
-    On both laptop and robot the cube is initialy cropped from the frame.
+    On laptop the cube is first rotated to be aligned with the horizon, then cropped from the frame.
     1st vertex of Facelets 0, and 3rd vertedx of facelet 8, are used as reference for the cubre cropping from the frame
-    On laptop version the cube is first rotated to be aligned with the horizon
-    When robot is used, the facelets are first re-ordered from top left
     The function returns a dictionary with the (cropped) images of the 6 cube faces
-    This function enables the generation of a cube images collage to be plotted (and saved on Rpi), for decoration purpose
+    This function enables the generation of a cube images collage to be plotted, for decoration purpose
         
     A         B 
       0  1  2
       3  4  5 
       5  7  8  
-    D         C     """
+    D         C
     
+    Facelets are provided as structured array (facelets_array), as ordered in cubeAF."""
     
-    if device == 'laptop':                                   # case the script is running on a PC/laptop (not the robot)
-        global frame_width
-        
-        ##################################################
-        # cube is rotated for a better (visual) cropping #
-        ##################################################
-        avgAx=0; avgAy=0; avgBx=0; avgBy=0                   # variables for facelets contour's average centers 
-#         print(len(facelets))
-#         for i in range (len(facelets)):
-#             print(int(facelets[i].get('cx')), int(facelets[i].get('cy')))
-                      
-        for i in [0,3,6]:                                    # iteration on the left columns facelets
-            avgAx=avgAx+int(facelets[i].get('cx'))           # sum cx coordinate for "i" facelet (left column)
-            avgAy=avgAy+int(facelets[i].get('cy'))           # sum cy coordinate for "i" facelet (left column)
-            i=i+2                                            # index increment to the right columns facelets
-            avgBx=avgBx+int(facelets[i].get('cx'))           # sum cx coordinate for "i" facelet (right column)
-            avgBy=avgBy+int(facelets[i].get('cy'))           # sum cy coordinate for "i" facelet (right column)
-
-        p=(avgBx//3-avgAx//3, avgBy//3-avgAy//3)             # average (delta x, delta y) for facelets on right column  
-        ang = np.arctan2(*p[::-1])                           # angle (in radians) of the cube
-        angle = np.rad2deg(ang%(2*np.pi))                    # angle (in degrees) of the cube
-        Ax = int(facelets[0].get('cont_ordered')[0][0])      # x coordinate for the top-left vertex 1st facelet
-        Ay = int(facelets[0].get('cont_ordered')[0][1])      # y coordinate for the top-left vertex 1st facelet
-        center=(Ax,Ay)  
-        
-        frame=rotate_image(frame, center, angle)             # frame is rotated, for a better cropping & view
-        
-        
-        #################
-        # cube cropping #
-        #################
-        avgAx=0; avgAy=0; avgBx=0; avgBy=0
-        cube_width=0
-        for i in [0,3,6]:
-            avgAx = int(facelets[i].get('cont_ordered')[0][0])    # avg x coordinate for the top-left vertex "i" facelet
-            avgAy = int(facelets[i].get('cont_ordered')[1][0])    # avg y coordinate for the top-left vertex "i" facelet
-            i=i+2
-            avgBx = int(facelets[i].get('cont_ordered')[0][0])    # avg x coordinate for the top-left vertex "i" facelet
-            avgBy = int(facelets[i].get('cont_ordered')[1][0])    # avg y coordinate for the top-left vertex "i" facelet
-            cube_width = cube_width+int(math.sqrt((avgBy-avgAy)**2+(avgBx-avgAx)**2))
-        
-        cube_width = cube_width//3
-        margin = int(0.1*cube_width)                        # 10% of cube width is used as crop's margin     
-        
-        if Ax >= margin:
-            Ax = Ax-margin    # shifted coordinate
-        if Ay >= margin:
-            Ay = Ay-margin    # shifted coordinate
-        Cx=Ax+cube_width+margin
-        Cy=Ay+cube_width+margin
+    
+    global frame_width, faces_buf
+    
+    ##################################################
+    # cube is rotated for a better (visual) cropping #
+    ##################################################
+    cx = facelet_arr['cx'].reshape(3,3)       # facelets contour's centers x, as per cube face grid
+    cy = facelet_arr['cy'].reshape(3,3)       # facelets contour's centers y, as per cube face grid
+    cont = facelet_arr['cont']                # facelets ordered contours, as a (9,4,2) array
+    
+    p=(int(cx[:,2].sum())//3-int(cx[:,0].sum())//3, int(cy[:,2].sum())//3-int(cy[:,0].sum())//3) # average (delta x, delta y) for facelets on right column  
+    norm = math.hypot(*p)                                # length of the (delta x, delta y) vector
+    c, s = (p[0]/norm, p[1]/norm) if norm else (1.0, 0.0)  # cosine and sine of the cube angle, without trigonometric calls
+    Ax = int(cont[0,0,0])                                # x coordinate for the top-left vertex 1st facelet
+    Ay = int(cont[0,0,1])                                # y coordinate for the top-left vertex 1st facelet
+    
+    # rotation matrix around (Ax,Ay), for a better cropping & view (same as cv2.getRotationMatrix2D)
+    rot_mat = np.array([[ c, s, (1-c)*Ax - s*Ay],
+                        [-s, c, s*Ax + (1-c)*Ay]])
+    
+    
+    #################
+    # cube cropping #
+    #################
+    dx = cont[[2,5,8],0,0] - cont[[0,3,6],0,0]                # x distances between right and left columns facelets vertex
+    dy = cont[[2,5,8],1,0] - cont[[0,3,6],1,0]                # y distances between right and left columns facelets vertex
+    cube_width = int(np.hypot(dx, dy).astype(int).sum())//3   # average of the three (truncated) distances
+    margin = int(0.1*cube_width)                        # 10% of cube width is used as crop's margin     
+    
+    if Ax >= margin:
+        Ax = Ax-margin    # shifted coordinate
+    if Ay >= margin:
+        Ay = Ay-margin    # shifted coordinate
+    Cx=Ax+cube_width+margin
+    Cy=Ay+cube_width+margin
 
-        
-        # text over the cube face's images, mostly for debug purpose
+    
+    # text over the cube face's images, mostly for debug purpose
 #         text_x = Ax + int(0.2*(Cx-Ax))       # X coordinate for the text starting location
 #         text_y = int((Ay+Cy)/2)              # Y coordinate for the text starting location
 #         fontscale_coef = (Cx-Ax)/150         # coefficient to adapt the text size to almost fit the cube
 #         cv2.putText(frame, str(f'Side {sides[side]}'), (text_x, text_y), font, fontScale*fontscale_coef, fontColor,lineType)
+    
+    rot_mat[:,2] -= (Ax, Ay)             # translation, to place the cropping top-left vertex at the image origin
+    crop_size = (Cx-Ax, Cy-Ay)           # size of the cropped image of the cube
+    dst = None                           # side 1 image is written on a new array
+    if side == 1:
+        frame_width = cube_width+2*margin
+        if faces_buf is None or faces_buf.shape[1] != frame_width:  # case the buffer doesn't fit the frame_width
+            faces_buf = np.empty((5, frame_width, frame_width, 3), dtype=np.uint8)  # buffer for the sides 2 to 6 images
+    elif side>1:
+        if crop_size != (frame_width, frame_width):  # case the cropped image differs from the side 1 image size
+            rot_mat[0] *= frame_width/crop_size[0]   # scaling factor is included, instead of resizing the cropped image
+            rot_mat[1] *= frame_width/crop_size[1]   # scaling factor is included, instead of resizing the cropped image
+            crop_size = (frame_width, frame_width)   # size of the resized image of the cube
+        dst = faces_buf[side-2]                  # side image is written on the preallocated buffer
+    
+    # the cube is rotated, cropped (and resized) via a single warpAffine, only processing the output pixels
+    # (kept on CPU: the output is a small ROI, and a GPU upload of the full frame would cost more than the warp itself)
+    faces[side] = cv2.warpAffine(frame, rot_mat, crop_size, dst=dst, flags=cv2.INTER_LINEAR)
+    
+    if not cv_wow:
+        cv2.imshow('cube', faces[side])
         
-        faces[side] = frame[Ay:Cy, Ax:Cx]    # sliced image of the cube
-        
-        if side == 1:
-            frame_width = cube_width+2*margin
-        elif side>1:
-            faces[side] = cv2.resize(faces[side], (frame_width, frame_width), interpolation=cv2.INTER_LINEAR)
-        if not cv_wow:
-            cv2.imshow('cube', faces[side])
-            
-        return faces
+    return faces
+
+
 
 
+
+
+
+def _face_image_rpi(frame, facelet_arr, side, faces):
+    """Slice a frame rectangular portion to temporary store the cube image.
+    On robot the cube is always well oriented toward the camera, therefore it is just cropped from the frame.
+    The facelets at the camera top-left and bottom-right corners are used as reference for the cubre cropping from the frame
+    The function returns a dictionary with the (cropped) images of the 6 cube faces
+    This function enables the generation of a cube images collage to be plotted and saved, for decoration purpose
+    Facelets are provided as structured array (facelets_array), as ordered in cubeAF."""
     
-    ###############################################################################################
-    # quite different approach for the robot, as the cube is always well oriented toward the camera
-    ###############################################################################################
-    elif device == "Rpi": 
-        if side in [1, 3, 4]:
-            facelets.reverse()                               # facelets are ordered to simply determine the "vertex" including the cube
-        elif side in [5, 6]:
-            rot_90_ccw = [6, 3, 0, 7, 4, 1, 8, 5, 2]         # facelets are ordered to simply determine the "vertex" including the cube
-            facelets[:] = [facelets[i] for i in rot_90_ccw]
-    
-        Ax = int(facelets[0].get('cont_ordered')[0][0])      # x coordinate for the top-left vertex 1st facelet
-        Ay = int(facelets[0].get('cont_ordered')[0][1])      # y coordinate for the top-left vertex 1st facelet
-        Cx = int(facelets[8].get('cont_ordered')[2][0])      # x coordinate for the bottom-right vertex 9th facelet
-        Cy = int(facelets[8].get('cont_ordered')[2][1])      # y coordinate for the bottom-right vertex 9th facelet
-        diagonal = int(math.sqrt((Cy-Ay)**2+(Cx-Ax)**2))     # cube diagonal length
-        
-        robot_facelets_rotation(facelets)                    # facelets are rotated to Kociemba reltaed order
+    
+    # facelets are already in Kociemba related order (robot_facelets_rotation), instead of re-ordering them back
+    # to the camera order, the facelets at the camera top-left and bottom-right corners are directly indexed
+    tl, br = camera_corner_facelets.get(side, (0, 8))   # facelets at the camera top-left and bottom-right corners
+    cont = facelet_arr['cont']                           # facelets ordered contours, as a (9,4,2) array
+    Ax, Ay = cont[tl,0].tolist()                         # x, y coordinates for the top-left vertex of the top-left facelet
+    Cx, Cy = cont[br,2].tolist()                         # x, y coordinates for the bottom-right vertex of the bottom-right facelet
+    diagonal = int(math.sqrt((Cy-Ay)**2+(Cx-Ax)**2))     # cube diagonal length
  
-        margin = int(0.1*diagonal)                           # 10% of cube diagonal is used as crop margin
-        if Ax >= margin:   Ax = Ax-margin    # shifted coordinate
-        elif Ax >= margin: Ax = 0
-        if Ay >= margin:   Ay = Ay-margin    # shifted coordinate
-        elif Ay >= margin: Ay = 0
-        if Cx >= margin:   Cx = Cx+margin    # shifted coordinate
-        elif Cx >= margin: Cx = 0
-        if Cy >= margin:   Cy = Cy+margin    # shifted coordinate
-        elif Cy >= margin: Cy = 0
+    margin = int(0.1*diagonal)                           # 10% of cube diagonal is used as crop margin
+    Ax = max(0, Ax-margin)                   # shifted coordinate, clamped at the frame left border
+    Ay = max(0, Ay-margin)                   # shifted coordinate, clamped at the frame top border
+    Cx = min(frame.shape[1], Cx+margin)      # shifted coordinate, clamped at the frame right border
+    Cy = min(frame.shape[0], Cy+margin)      # shifted coordinate, clamped at the frame bottom border
 
-        
-        # text over the cube face's images, mostly for debug purpose
+    
+    # text over the cube face's images, mostly for debug purpose
 #         text_x = Ax + int(0.2*(Cx-Ax))       # X coordinate for the text starting location
 #         text_y = int((Ay+Cy)/2)              # Y coordinate for the text starting location
 #         fontscale_coef = (Cx-Ax)/150         # coefficient to adapt the text size to almost fit the cube
 #         cv2.putText(frame, str(f'Side {sides[side]}'), (text_x, text_y), font, fontScale*fontscale_coef, fontColor,lineType)
-        faces[side] = frame[Ay:Cy, Ax:Cx]    # sliced image of just the cube
+    faces[side] = frame[Ay:Cy, Ax:Cx]    # sliced image of just the cube
 #         if screen:                           # case a screen is connected
 #             cv2.imshow('cube', faces[side])
 
-        return faces
+    return faces
+
+
+
+
+
+
+
+def _robot_next_side_laptop(side):
+    """Cube movements at robot, during the cube reading phase: nothing to do on laptop."""
+    return
+
+
+
 
 
 
 
-def robot_next_side(side):
+def _robot_next_side_rpi(side):
     """Cube movements at robot, during the cube reading phase.
     Cube is flipped 4 times to read the first 4 faces, then some spins and flippings are required to read the
     remaining 2 faces.
@@ -2579,73 +2783,81 @@ def robot_next_side(side):
 
     global robot_stop
     
-    if device == 'laptop':                           # case the script is running on a PC/laptop (not the robot)
-        return                                       # this function is not executed
-    
-    elif device == 'Rpi':                            # case the script is running at the robot
-        aligned = True                               # aligned variable is set initially True
+    aligned = True                               # aligned variable is set initially True
 #         align = 'read'                               # in case a motor alinment is needed the cover will be positioned to (picamera) read position
-        if side in range(4):                         # first 4 sides (3 sides apart the one already in front of the camera)
-            if led_usage:                            # case the leds at Top_cover are activated
-                servo.led_off()                      # led on top_cover is switched off, for power management
-                servo.servo_freq(debug)              # set 60Hz frequency for servo control
-            aligned = servo.flip(1, debug, 'read', not robot_stop, fast=False)      # side is reached by simply flipping the cube
+    if side in range(4):                         # first 4 sides (3 sides apart the one already in front of the camera)
+        if led_usage:                            # case the leds at Top_cover are activated
+            servo.led_off()                      # led on top_cover is switched off, for power management
+            servo.servo_freq(debug)              # set 60Hz frequency for servo control
+        aligned = servo.flip(1, debug, 'read', not robot_stop, fast=False)      # side is reached by simply flipping the cube
 #             print('moving to side', side, 'and alignment is', aligned)
-            if led_usage:                            # case the leds at Top_cover are activated
-                time.sleep(0.1)                      # little delay to ensure servos have reached their target position and the innertia has fully dropped        
-                servo.led_freq(debug)                # set high frequency to PCA 9685 board, to prevent visible flickering from the led
-                servo.led_cover(cam_led_bright)      # led on top_cover is switched on
-                time.sleep(0.2)                      # small (arbitrary) delay to let the led and PiCamera) to stabilize
-        
-        if side == 4 :                               # at side 4 is needed to change approach to show side 5 to the camera
-            if led_usage:                            # case the leds at Top_cover are activated
-                servo.led_off()                      # led on top_cover is switched off, for power managements
-            if robot_stop == False:                  # case stop_button has not being pressed
-                if led_usage:                        # case the leds at Top_cover are activated
-                    servo.servo_freq(debug)          # set 60Hz frequency for servo control
-                servo.spin(1, debug)                 # one spin (90 deg) is applied to the cube
-                aligned = servo.flip(1, debug, 'read', not robot_stop, fast=False)  # one flip is applied to the cube to show the side 5 to the camera
+        if led_usage:                            # case the leds at Top_cover are activated
+            servo.wait_settled(0.3)              # wait for the servos to reach their target position and the innertia to drop (max 0.3 secs)
+            servo.led_freq(debug)                # set high frequency to PCA 9685 board, to prevent visible flickering from the led
+            servo.led_cover(cam_led_bright)      # led on top_cover is switched on
+            time.sleep(0.2)                      # small (arbitrary) delay to let the led and PiCamera) to stabilize
+    
+    if side == 4 :                               # at side 4 is needed to change approach to show side 5 to the camera
+        if led_usage:                            # case the leds at Top_cover are activated
+            servo.led_off()                      # led on top_cover is switched off, for power managements
+        if robot_stop == False:                  # case stop_button has not being pressed
+            if led_usage:                        # case the leds at Top_cover are activated
+                servo.servo_freq(debug)          # set 60Hz frequency for servo control
+            servo.spin(1, debug)                 # one spin (90 deg) is applied to the cube
+            aligned = servo.flip(1, debug, 'read', not robot_stop, fast=False)  # one flip is applied to the cube to show the side 5 to the camera
 #                 print('moving to side', side, 'and alignment is', aligned)
-                if led_usage:                        # case the leds at Top_cover are activated
-                    time.sleep(0.1)                  # little delay to ensure servos have reached their target position and the innertia has fully dropped
-                    servo.led_freq(debug)            # set high frequency to PCA 9685 board, to prevent visible flickering from the led
-                    servo.led_cover(cam_led_bright)  # led on top_cover is switched on
-                    time.sleep(0.2)                  # small (arbitrary) delay to let the led and PiCamera) to stabilize
-                
-        if side == 5:                                # when side5 is in front of the camera 
-            if led_usage:                            # case the leds at Top_cover are activated
-                servo.led_off()                      # led on top_cover is switched off, for power management             
-                servo.servo_freq(debug)              # set 60Hz frequency for servo control
-            aligned = servo.flip(2, debug, 'read', not robot_stop, fast=False)      # at side 5 are needed two flips to show side 6 to the camera
-            if led_usage:                            # case the leds at Top_cover are activated
-                time.sleep(0.1)                      # little delay to ensure servos have reached their target position and the innertia has fully dropped        
-                servo.led_freq(debug)                # set high frequency to PCA 9685 board, to prevent visible flickering from the led
-                servo.led_cover(cam_led_bright)      # led on top_cover is switched on
-                time.sleep(0.2)                      # small (arbitrary) delay to let the led and PiCamera) to stabilize
+            if led_usage:                        # case the leds at Top_cover are activated
+                servo.wait_settled(0.3)          # wait for the servos to reach their target position and the innertia to drop (max 0.3 secs)
+                servo.led_freq(debug)            # set high frequency to PCA 9685 board, to prevent visible flickering from the led
+                servo.led_cover(cam_led_bright)  # led on top_cover is switched on
+                time.sleep(0.2)                  # small (arbitrary) delay to let the led and PiCamera) to stabilize
+            
+    if side == 5:                                # when side5 is in front of the camera 
+        if led_usage:                            # case the leds at Top_cover are activated
+            servo.led_off()                      # led on top_cover is switched off, for power management             
+            servo.servo_freq(debug)              # set 60Hz frequency for servo control
+        aligned = servo.flip(2, debug, 'read', not robot_stop, fast=False)      # at side 5 are needed two flips to show side 6 to the camera
+        if led_usage:                            # case the leds at Top_cover are activated
+            servo.wait_settled(0.3)              # wait for the servos to reach their target position and the innertia to drop (max 0.3 secs)
+            servo.led_freq(debug)                # set high frequency to PCA 9685 board, to prevent visible flickering from the led
+            servo.led_cover(cam_led_bright)      # led on top_cover is switched on
+            time.sleep(0.2)                      # small (arbitrary) delay to let the led and PiCamera) to stabilize
 #             print('moving to side', side, 'and alignment is', aligned)
 
 
-        elif side == 6:                              # when side6 is in front of the camera 
-            if led_usage:                            # case the leds at Top_cover are activated
-                servo.led_off()                      # led on top_cover is switched off, for power management             
-                servo.servo_freq(debug)              # set 60Hz frequency for servo control
-            if robot_stop == False:                  # case stop_button has not being pressed 
-                servo.open_cover()                   # top cover is moved from reading to open position
-        
-        if not aligned:
-            print("\nCannot align the motor (cube_holder), script is terminated")
-            quit_func()                              # script is closed, in case of irresponsive camera
-        
-        if robot_stop == True:                       # case stop_button has being pressed
-            return
+    elif side == 6:                              # when side6 is in front of the camera 
+        if led_usage:                            # case the leds at Top_cover are activated
+            servo.led_off()                      # led on top_cover is switched off, for power management             
+            servo.servo_freq(debug)              # set 60Hz frequency for servo control
+        if robot_stop == False:                  # case stop_button has not being pressed 
+            servo.open_cover()                   # top cover is moved from reading to open position
+    
+    if not aligned:
+        print("\nCannot align the motor (cube_holder), script is terminated")
+        quit_func()                              # script is closed, in case of irresponsive camera
+    
+    if robot_stop == True:                       # case stop_button has being pressed
+        return
+
+
+
+
+
+
 
+robot_move_pattern = re.compile(r'S(-?\d+)F(-?\d+)R(-?\d+)')   # robot move string, like 'S1F0R-1' (spins, flips, rotations)
 
+def _robot_move_cube_laptop(robot_moves, total_robot_moves, solution_Text):
+    """Robot movements to solve the cube: nothing to do on laptop."""
+    return
 
 
 
 
 
-def robot_move_cube(robot_moves, total_robot_moves, solution_Text):
+
+
+def _robot_move_cube_rpi(robot_moves, total_robot_moves, solution_Text):
     """This fuction provide the robot the sequence of movements: It drives the robot movable parts according
         to the robot movements sequence (dictionary); This includes
             Spin (= cube rotation over the laying face, to change its orientation).
@@ -2657,104 +2869,94 @@ def robot_move_cube(robot_moves, total_robot_moves, solution_Text):
         total_robot_moves value, used to visualize on display a robot moves count-down
         solution_Text, used to detect error cases on the Kociemba solution."""
     
-    if device == 'laptop':                   # case the script is running on a PC/laptop (not the robot)
-        return                               # this function is not executed
-
-    
-    elif device == 'Rpi':                    # case the script is running at the robot
-        
-        tot_time_secs = 0
-        elapsed_time_robot = 0
-        
-        start_robot_time = time.time()       # this time is used as reference to measure (and visualize) how long the robot takes to solve the cube
-        remaining_moves = total_robot_moves  # remaining movements are visualized, to manage expectations while in front of the robot
-        aligned = True                       # aligned variable is set initially true
-        
-        i = 0
-        print()
-        for move in robot_moves.values():                               # iterates over the dictionary values (the keys is the amounto of Kociemba moves)
-            if robot_stop==False:                                       # case stop_button has not being pressed
-                print(f'Cube move: {i+1}\tRobot moves: {move}') 
-
-                spins = int(move[move.find('S')+1:move.find('F')])      # amount (and direction) of spins is retrieved
-                flips = int(move[move.find('F')+1:move.find('R')])      # amount of flips is retrieved (flips are only positive)
-                rotations = int(move[move.find('R')+1:])                # amount (and direction) of rotations is retrieved
-
-                if i < len(robot_moves)-1:                              # checks the spins at next robot move
-                    next_move = robot_moves[i+1]                        # checks the spins at next robot move
-                    next_spin = int(next_move[next_move.find('S')+1:next_move.find('F')]) # amount (and direction) of spins at next robot move
-                elif i==len(robot_moves)-1:                             # last robot move
-                    next_spin = 0                                       # last robot move isn't followed by an immediate spin
-                    # print(f'Robot move {i}, Spin(s) at next move: {next_spin}')
-
-                if spins!=0:
-                    if robot_stop==False:                                    # case stop_button has not being pressed
-                        servo.spin(spins, debug)                             # servo package is called for the required spins
-                        remaining_moves = remaining_moves - 1                # remaining robot moves is updated (multiple rotations are considered as 1)
-                robot_show_remaining_moves(remaining_moves)                  # remaining robot moves is sent to the function to display it
-                
-                if flips!=0 :
-                    if rotations !=0:
-                        if robot_stop==False:                                # case stop_button has not being pressed
-                            for flip in range(flips):
-                                aligned = servo.flip(1, debug, 'open', not robot_stop) # servo package is called for the required flips
-                                remaining_moves = remaining_moves - 1        # remaining robot moves is updated (each flip is counted)
-                    elif rotations ==0:
-                        if robot_stop==False:                                # case stop_button has not being pressed
-                            for flip in range(flips):
-                                aligned = servo.flip(1, debug, 'open', not robot_stop) # servo package is called for the required flips
-                                remaining_moves = remaining_moves - 1        # remaining robot moves is updated (each flip is counted)
-                robot_show_remaining_moves(remaining_moves)                  # remaining robot moves is sent to the function to display it
-            
+    tot_time_secs = 0
+    elapsed_time_robot = 0
+    
+    start_robot_time = time.monotonic()  # this time is used as reference to measure (and visualize) how long the robot takes to solve the cube
+    remaining_moves = total_robot_moves  # remaining movements are visualized, to manage expectations while in front of the robot
+    global last_moves_shown              # remaining movements last sent to display2
+    last_moves_shown = None              # display2 content isn't known at the start of the robot moves
+    aligned = True                       # aligned variable is set initially true
+    
+    # robot moves strings are parsed once, to (spins, flips, rotations) integers, before driving the robot
+    parsed_moves = [tuple(map(int, robot_move_pattern.match(move).groups())) for move in robot_moves.values()]
+    
+    i = 0
+    log_print('')
+    for move, (spins, flips, rotations) in zip(robot_moves.values(), parsed_moves):  # iterates over the robot moves (the keys is the amounto of Kociemba moves)
+        if robot_stop==False:                                       # case stop_button has not being pressed
+            log_print(f'Cube move: {i+1}\tRobot moves: {move}')    # printed by the log thread, not to delay the robot moves
+
+            if spins!=0:
+                if robot_stop==False:                                    # case stop_button has not being pressed
+                    servo.spin(spins, debug)                             # servo package is called for the required spins
+                    remaining_moves = remaining_moves - 1                # remaining robot moves is updated (multiple rotations are considered as 1)
+            robot_show_remaining_moves(remaining_moves)                  # remaining robot moves is sent to the function to display it
             
-                if rotations !=0:
-                    if next_spin==0:                             # case when the next robot move has no spin
-                        if robot_stop==False:                    # case stop_button has not being pressed
-                            servo.rotate(rotations, debug)       # the rotation ends with less sleep, allowing flipping while the vore is still opening
-                    elif next_spin!=0:    
-                        if robot_stop==False:                    # case stop_button has not being pressed
-                            servo.rotate(rotations, debug)       # servo package is called for the required rotations (lower cube's layer)
-                    remaining_moves = remaining_moves - 1        # remaining robot moves is updated (multiple rotations are considered as 1)
-                robot_show_remaining_moves(remaining_moves)      # remaining robot moves is sent to the function to display it
-                
-                if not aligned:
-                    print("\nCannot align the motor (cube_holder), script is terminated")
-                    quit_func()                    # script is closed, in case of irresponsive camera
-                
-            else:
-                break
-            i+=1
+            if flips!=0 and robot_stop==False:                           # case flips are needed, and stop_button has not being pressed
+                for flip in range(flips):
+                    aligned = servo.flip(1, debug, 'open', not robot_stop)   # servo package is called for the required flips
+                    remaining_moves = remaining_moves - 1                # remaining robot moves is updated (each flip is counted)
+            robot_show_remaining_moves(remaining_moves)                  # remaining robot moves is sent to the function to display it
+        
+        
+            if rotations !=0:
+                if robot_stop==False:                        # case stop_button has not being pressed
+                    servo.rotate(rotations, debug)           # servo package is called for the required rotations (lower cube's layer)
+                remaining_moves = remaining_moves - 1        # remaining robot moves is updated (multiple rotations are considered as 1)
+            robot_show_remaining_moves(remaining_moves)      # remaining robot moves is sent to the function to display it
             
+            if not aligned:
+                print("\nCannot align the motor (cube_holder), script is terminated")
+                quit_func()                    # script is closed, in case of irresponsive camera
             
-        if solution_Text == 'Error':      # if there is an error (tipicallya bad color reading, leading to wrong amount of facelets per color)                                      
-            print('An error occured')     # error feedback is print at terminal
-            tot_time_secs = 0             # total time is set to zero to underpin the error
-            elapsed_time_robot = 0        # elapsed_time_robot is set to zero to underpin the error
+        else:
+            break
+        i+=1
+    log_flush()                           # queued texts are printed, before the following prints
         
-        elif solution_Text != 'Error' and robot_stop==False and not cube_scrambling:   # if there are not error on the cube solution
-            solved, tot_time_secs, elapsed_time_robot = robot_time_to_solution(start_time, start_robot_time, total_robot_moves)  # cube solved function is called
         
-        else:
-            tot_time_secs = 0             # total time is set to zero to underpin the error
-            
-        return tot_time_secs, elapsed_time_robot
+    if solution_Text == 'Error':      # if there is an error (tipicallya bad color reading, leading to wrong amount of facelets per color)                                      
+        print('An error occured')     # error feedback is print at terminal
+        tot_time_secs = 0             # total time is set to zero to underpin the error
+        elapsed_time_robot = 0        # elapsed_time_robot is set to zero to underpin the error
+    
+    elif solution_Text != 'Error' and robot_stop==False and not cube_scrambling:   # if there are not error on the cube solution
+        solved, tot_time_secs, elapsed_time_robot = robot_time_to_solution(start_time, start_robot_time, total_robot_moves)  # cube solved function is called
+    
+    else:
+        tot_time_secs = 0             # total time is set to zero to underpin the error
+        
+    return tot_time_secs, elapsed_time_robot
+
 
 
 
 
 
 
+last_moves_shown = None   # robot remaining movements last sent to display2
+moves_digits = [(36, m//100, (m//10)%10, m%10) for m in range(1000)]  # display2 digits (first one left off) for 0 to 999 moves
 
 def robot_show_remaining_moves(moves):
     """Amount of robot remaining movements, to solve the cube.
-    The result is visualized on display2, just to manage user expectations in front of the robot."""
+    The result is visualized on display2, just to manage user expectations in front of the robot.
+    Data is sent to the display only when the amount differs from the one already shown."""
+    
+    global last_moves_shown
+    
+    if moves == last_moves_shown:    # case the remaining movements are already shown
+        return                       # nothing is sent to the display
+    
     robot_display2.Clear()
- 
-    h, d = divmod(moves, 100)  # hundred and decades
-    d, u = divmod(d, 10)       # decades and units
-    to_show = [36, h, d, u]    # first display's digit is left off
-    robot_display2.Show(to_show)     # data is sent to display, twice
-    robot_display2.Show(to_show)     # data is sent to display, twice
+    if 0 <= moves < len(moves_digits):   # case the amount is within the precomputed digits
+        to_show = moves_digits[moves]    # hundred, decades and units digits, with first display's digit left off
+    else:                                # case of amount out of the precomputed range
+        h, d = divmod(moves, 100)        # hundred and decades
+        d, u = divmod(d, 10)             # decades and units
+        to_show = [36, h, d, u]          # first display's digit is left off
+    robot_display2.Show(to_show)     # data is sent to display
+    last_moves_shown = moves         # remaining movements shown on display are stored
 
 
 
@@ -2762,7 +2964,7 @@ def robot_show_remaining_moves(moves):
 
 
 
-def window_for_cube_rotation(w, h, side, frame):
+def _window_for_cube_rotation_laptop(w, h, side, frame):
     """Window on monitor to show the cube rotation (from a side to the following one).
     During these phases the Vision part doesnt search for contours.
     This function is also used to increment the cube side variable to the next face (side), while preventing to re-capture
@@ -2770,15 +2972,10 @@ def window_for_cube_rotation(w, h, side, frame):
     
     side+=1                                                # cube side is increased
     
-    if device == 'laptop':                                 # case the script is running on a PC/laptop (not the robot)
-        print(f'Rotate the cube to side {sides[side]}')
-        time.sleep(0.6)                                    # freeze the program while the user realizes the cube has been fully read
-        if cv_wow and side>=1:
-            time.sleep(2)
-       
-    elif device=='Rpi':                                    # case the script is running at the robot
-        if robot_stop==False:                              # case stop_button has not being pressed
-            print(f'Cube reading: side {sides[side]}')     # cube side is increased
+    print(f'Rotate the cube to side {sides[side]}')
+    time.sleep(0.6)                                    # freeze the program while the user realizes the cube has been fully read
+    if cv_wow and side>=1:
+        time.sleep(2)
     
     # a camera reading now prevents from re-using the previous frame, therefore from re-capturing the same facelets twice
     frame, w, h, scale  = read_camera()
@@ -2796,81 +2993,173 @@ def window_for_cube_rotation(w, h, side, frame):
 
 
 
-def window_for_cube_solving(solution_Text, w, h, side, frame, scale):
-    """When the laptop is used, this function keeps the webcam active and a window on monitor.
-    The window allows the user to see the Kociemba solution on screen, and to keep life the cube resolution.
-    When this function is active, facelets contours aren't searched ! """
+def _window_for_cube_rotation_rpi(w, h, side, frame):
+    """Window on monitor to show the cube rotation (from a side to the following one).
+    During these phases the Vision part doesnt search for contours.
+    This function is also used to increment the cube side variable to the next face (side), while preventing to re-capture
+    aleady detected facelets one more time, by simply re-freshing the frame with a new camera read."""
     
-    if device == 'Rpi':             # case the script is running at the robot
-        # I've to still check how to visualize use the picamera on separated thread
-        return                      # this funcion is not executed
+    side+=1                                                # cube side is increased
     
-    elif device == 'laptop':        # case the script is running on a PC/laptop (not the robot)
-        new_cycle=False             # False is assigned to local variable new_cycle
-        
-        while quitting == False:                 # case the global quitting variable is false
-            frame, w, h, scale=read_camera()     # video stream and frame dimensions
-            if cv_wow:                           # case cv_wow variable is set true on __main__
-                frame_copy = frame.copy()        # copy of the frame is assigned, to be used without editing
-            text_bg(frame, w, h)                 # generates a rectangle as backgroung for text in Frame
-
-            if solution_Text != 'Error':         # case when no error retrieved from the Kociemba solver
-                if solution_Text == '0 moves  ': # case when no cube movements are needed
-                    font_size = fontScale*scale/100 # font size is set according to the window resizing factor
-                    cv2.putText(frame, str(f'THE CUBE IS SOLVED'), (10,30), font, font_size, fontColor,lineType)
-                else:                            # case when at cube movements are needed               
-                    font_size = fontScale*scale/100  # font size is set according to the window resizing factor
-                    chars = len(solution_Text)   # characters on the solution text string
-                    if chars > 36:               # case there are more than 36 characters
-                        font_size = font_size*(1.48-0.0132*chars) # smaller font is set, to accomodate up to 21 movements
-                    cv2.putText(frame, str(f'{solution_Text}'), (10,30), font, font_size, fontColor,lineType)
-            
-            elif solution_Text == 'Error':       # case when error is retrieved from the Kociemba solver                  
-                error_msg = 'Error: Incoherent cube detection' # error message
-                font_size = 1.2*fontScale*scale/100            # font size is set according to the window resizing factor
-                cv2.putText(frame, str(f'{error_msg}'), (10,30), font, font_size, fontColor, lineType)
-                
-            font_size = 1.2*fontScale*scale/100                # font size is set according to the window resizing factor
-            cv2.putText(frame, str('ESC to escape, spacebar to proceed'), (10, int(h-12)), font, font_size, fontColor, lineType)
-            
-            if cv_wow:                               # case cv_wow variable is set true on __main__ 
-                cv2.namedWindow("camera")            # create the camera window
-                cv2.moveWindow("camera", 0, gap_h)   # move the camera window to (0, gap_h)
-                cv2.imshow("camera", frame_copy)     # shows the frame copy, meaning the frame without contours and other additions 
-                key=cv2.waitKey(1)                   # refresh time is minimized (1ms), yet real time is much higher
-                if key == 32 & 0xFF:                 # case spacebar is pressed
-                    new_cycle=True                   # true is assigned to local variable new_cycle 
-                if cv2.getWindowProperty("camera", cv2.WND_PROP_VISIBLE) <1 or (key == 27 & 0xFF): # X on top bar or ESC button
-                    quit_func()                      # quitting function
-                
-                cv2.namedWindow('Cube')              # create the Cube window
-                cv2.moveWindow('Cube', 0, h+2*gap_h) # move the Cube window to (0, 2xgap_h)
-                cv2.imshow('Cube', frame)            # shows the frame
-                key=cv2.waitKey(10)                  # refresh time is 10ms, yet real time is much higher
-                if key == 32 & 0xFF:                 # case spacebar is pressed
-                    new_cycle=True                   # true is assigned to local variable new_cycle
-                if cv2.getWindowProperty("Cube", cv2.WND_PROP_VISIBLE) <1 or (key == 27 & 0xFF): # X on top bar or ESC button
-                    quit_func()                      # quitting function
+    if robot_stop==False:                              # case stop_button has not being pressed
+        print(f'Cube reading: side {sides[side]}')     # cube side is increased
+    
+    # a camera reading now prevents from re-using the previous frame, therefore from re-capturing the same facelets twice
+    frame, w, h, scale  = read_camera()
+    
+#     if screen:                                             # case a screen is connected
+#         if fixWindPos:                                     # case the fixWindPos variable is set true on __main__ 
+#             cv2.namedWindow("cube")                        # create the cube window
+#             cv2.moveWindow("cube", 0,0)                    # move the window to (0,0)
+#         cv2.imshow("cube", frame)                          # frame is showed to viewer
+    
+    return side                                            # return the new cube side to be anayzed
+
+
+
+
+
+
+def _window_for_cube_solving_laptop(solution_Text, w, h, side, frame, scale):
+    """When the laptop is used, this function keeps the webcam active and a window on monitor.
+    The window allows the user to see the Kociemba solution on screen, and to keep life the cube resolution.
+    When this function is active, facelets contours aren't searched ! """
+    
+    new_cycle=False             # False is assigned to local variable new_cycle
+    
+    # texts and font sizes do not change while waiting, therefore are prepared once
+    font_size = fontScale*scale/100                # font size is set according to the window resizing factor
+    if solution_Text == 'Error':                   # case when error is retrieved from the Kociemba solver
+        text = 'Error: Incoherent cube detection'  # error message
+        text_size = 1.2*font_size                  # font size for the error message
+    elif solution_Text == '0 moves  ':             # case when no cube movements are needed
+        text = 'THE CUBE IS SOLVED'                # cube solved message
+        text_size = font_size                      # font size for the cube solved message
+    else:                                          # case when at cube movements are needed
+        text = solution_Text                       # solution text
+        text_size = font_size                      # font size for the solution text
+        chars = len(solution_Text)                 # characters on the solution text string
+        if chars > 36:                             # case there are more than 36 characters
+            text_size = font_size*(1.48-0.0132*chars) # smaller font is set, to accomodate up to 21 movements
+    footer = 'ESC to escape, spacebar to proceed'  # text at the window bottom
+    footer_size = 1.2*font_size                    # font size for the text at the window bottom
+    top_band = None                                # frame top band with text, rendered at the first frame
+    
+    # windows are created and positioned once
+    if cv_wow:                                     # case cv_wow variable is set true on __main__ 
+        init_windows({"camera":(0, gap_h), 'Cube':(0, h+2*gap_h)})  # camera and Cube windows
+    elif fixWindPos:                               # case the fixWindPos variable is set true on __main__ 
+        init_windows({'cube':(0,0)})               # cube window at (0,0)
+    
+    while quitting == False:                 # case the global quitting variable is false
+        frame, w, h, scale=read_camera()     # video stream and frame dimensions
+        
+        if cv_wow:                               # case cv_wow variable is set true on __main__ 
+            cv2.imshow("camera", frame)          # shows the frame before the texts are added (imshow copies it to the window)
+        
+        if top_band is None:                 # case the bands with texts have not been rendered yet
+            text_bg(frame, w, h)             # generates a rectangle as backgroung for text in Frame
+            cv2.putText(frame, text, (10,30), font, text_size, fontColor, lineType)  # solution, or other message, on the frame
+            cv2.putText(frame, footer, (10, int(h-12)), font, footer_size, fontColor, lineType)  # text at the frame bottom
+            top_band = frame[:background_h+1].copy()      # top band with text is stored, to be re-used on next frames
+            bottom_band = frame[h-background_h:h].copy()  # bottom band with text is stored, to be re-used on next frames
+        else:                                # case the bands with texts have already been rendered
+            frame[:background_h+1] = top_band             # top band with text is copied on the frame
+            frame[h-background_h:h] = bottom_band         # bottom band with text is copied on the frame
+        
+        if cv_wow:                               # case cv_wow variable is set true on __main__ 
+            cv2.imshow('Cube', frame)            # shows the frame
+            key=cv2.waitKey(1)                   # single refresh for both windows, minimized (1ms), yet real time is much higher
+            if (key & 0xFF) == 32:               # case spacebar is pressed
+                new_cycle=True                   # true is assigned to local variable new_cycle
+            if cv2.getWindowProperty("camera", cv2.WND_PROP_VISIBLE) <1 or \
+               cv2.getWindowProperty("Cube", cv2.WND_PROP_VISIBLE) <1 or ((key & 0xFF) == 27): # X on top bar or ESC button
+                quit_func()                      # quitting function
+        
+        elif not cv_wow:                         # case cv_wow variable is set false on __main__
+            cv2.imshow('cube', frame)            # shows the frame 
+            key=cv2.waitKey(1)                   # refresh time is minimized (1ms), yet real time is much higher
+            if (key & 0xFF) == 32:               # case spacebar is pressed
+                new_cycle=True                   # true is assigned to local variable new_cycle             
+            if cv2.getWindowProperty("cube", cv2.WND_PROP_VISIBLE) <1 or ((key & 0xFF) == 27): # X on top bar or ESC button
+                quit_func()                      # quitting function
+
             
-            elif not cv_wow:                         # case cv_wow variable is set false on __main__
-                if fixWindPos:                       # case the fixWindPos variable is set true on __main__ 
-                    cv2.namedWindow('cube')          # create the cube window
-                    cv2.moveWindow('cube', 0,0)      # move the window to (0,0)
-                cv2.imshow('cube', frame)            # shows the frame 
-                key=cv2.waitKey(10)                  # refresh time is 10ms, yet real time is much higher
-                if key == 32 & 0xFF:                 # case spacebar is pressed
-                    new_cycle=True                   # true is assigned to local variable new_cycle             
-                if cv2.getWindowProperty("cube", cv2.WND_PROP_VISIBLE) <1 or (key == 27 & 0xFF): # X on top bar or ESC button
-                    quit_func()                      # quitting function
+        if new_cycle:
+            print("\n=========================================================================================\n")
+            clear_terminal(device)  # cleares the terminal
+            side=0                  # cube side is set to zero to start a new cycle
+            BGR_mean.clear()        # empties the dict previoously filled with 54 facelets colors
+            H_mean.clear()          # empties the dict previoously filled with 54 facelets Hue
+            return side             # return the new cube side (zero) to be anayzed
 
-                
-            if new_cycle:
-                print("\n=========================================================================================\n")
-                clear_terminal(device)  # cleares the terminal
-                side=0                  # cube side is set to zero to start a new cycle
-                BGR_mean.clear()        # empties the dict previoously filled with 54 facelets colors
-                H_mean.clear()          # empties the dict previoously filled with 54 facelets Hue
-                return side             # return the new cube side (zero) to be anayzed
+
+
+
+
+
+
+def _window_for_cube_solving_rpi(solution_Text, w, h, side, frame, scale):
+    """When the robot is used, the cube solving phase has no window on monitor."""
+    # I've to still check how to visualize use the picamera on separated thread
+    return                          # this funcion is not executed
+
+
+
+
+
+
+
+def noop(*args, **kwargs):
+    """Function doing nothing, bound to the functions not needed on a device."""
+    return
+
+
+
+
+
+
+
+def set_device_functions(device):
+    """The device related functions are bound once to their laptop or robot version.
+    The device is known only after hd_check at start up, therefore the binding happens on __main__;
+    This prevents checking the device at every call of these functions."""
+    
+    global face_image, robot_next_side, robot_move_cube, window_for_cube_rotation, window_for_cube_solving
+    global close_camera, clear_terminal, camera_opened_check, cpu_temp
+    global robot_loading_feedback, robot_press_feedback, robot_time_elapsed, robot_show_error_status, robot_show_cube_done
+    
+    if device == 'laptop':                                    # case the script is running on a PC/laptop (not the robot)
+        face_image = _face_image_laptop
+        robot_next_side = _robot_next_side_laptop              # no robot movements on laptop
+        robot_move_cube = _robot_move_cube_laptop              # no robot movements on laptop
+        window_for_cube_rotation = _window_for_cube_rotation_laptop
+        window_for_cube_solving = _window_for_cube_solving_laptop
+        close_camera = _close_camera_laptop
+        clear_terminal = _clear_terminal_laptop
+        camera_opened_check = _camera_opened_check_laptop
+        cpu_temp = noop                                        # no cpu temperature check on laptop
+        robot_loading_feedback = noop                          # no robot displays on laptop
+        robot_press_feedback = noop                            # no robot displays on laptop
+        robot_time_elapsed = noop                              # no robot displays on laptop
+        robot_show_error_status = noop                         # no robot displays on laptop
+        robot_show_cube_done = noop                            # no robot displays on laptop
+    
+    elif device == 'Rpi':                                     # case the script is running at the robot
+        face_image = _face_image_rpi
+        robot_next_side = _robot_next_side_rpi
+        robot_move_cube = _robot_move_cube_rpi
+        window_for_cube_rotation = _window_for_cube_rotation_rpi
+        window_for_cube_solving = _window_for_cube_solving_rpi   # no solving window on robot
+        close_camera = _close_camera_rpi
+        clear_terminal = _clear_terminal_rpi
+        camera_opened_check = _camera_opened_check_rpi
+        cpu_temp = _cpu_temp_rpi
+        robot_loading_feedback = _robot_loading_feedback_rpi
+        robot_press_feedback = _robot_press_feedback_rpi
+        robot_time_elapsed = _robot_time_elapsed_rpi
+        robot_show_error_status = _robot_show_error_status_rpi
+        robot_show_cube_done = _robot_show_cube_done_rpi
 
 
 
@@ -2884,31 +3173,21 @@ def robot_time_to_solution(start_time, start_robot_time, total_robot_moves):
     Prints the total time, and the time used to manouvre the cube, to the solution
     Returns also a (global variable) boolean that the cube is solved, differently this function isn't called."""
     
-    elapsed_time = round(time.time() - start_time,1)           # total elapsed time
-    elapsed_time_robot = round(time.time() - start_robot_time,1)  # time elapsed for the robot solving the cube, from the solver answers
+    elapsed_time = round(time.monotonic() - start_time,1)      # total elapsed time
+    elapsed_time_robot = round(time.monotonic() - start_robot_time,1)  # time elapsed for the robot solving the cube, from the solver answers
     
     elapsed_time_int = int(round(elapsed_time,0))              # total elapsed time as integer
     elapsed_time_robot_int = int(round(elapsed_time_robot,0))  # time elapsed to integer for visualization at display
     m_tot, s_tot = divmod(elapsed_time_int, 60)                # minutes and seconds for total cube solving time
     m_rob, s_rob = divmod(elapsed_time_robot_int, 60)          # minutes and seconds for total cube solving time
-    time_values = [m_tot, s_tot, m_rob, s_rob]                 # list is generated for easy c
-    
-    # preparing the time in strings, according to amount of digits, for an easier to read print
-    time_str = []
-    for i in time_values:
-        if i < 10:
-            i = '0'+ str(i)
-            time_str.append(i)
-        else:
-            time_str.append(str(i))
+    tot_time = f'{m_tot:02d}:{s_tot:02d}'                      # total time as mm:ss string, for an easier to read print
+    move_time = f'{m_rob:02d}:{s_rob:02d}'                     # robot time as mm:ss string, for an easier to read print
             
     if total_robot_moves >0 : 
-        tot_time= str(time_str[0]+":"+time_str[1])
-        move_time = str(time_str[2]+":"+time_str[3])
         print(f'\nCube solved in: {elapsed_time} (wherein {elapsed_time_robot} for robot moves)')
     
     elif total_robot_moves == 0:
-        print(f'\nCube was already solved, status read in: {time_str[0]}:{time_str[1]}')
+        print(f'\nCube was already solved, status read in: {tot_time}')
     
     # after printing the time to solve the cube, the robnot is considered as solved
     solved = True                                 
@@ -2920,31 +3199,44 @@ def robot_time_to_solution(start_time, start_robot_time, total_robot_moves):
 
 
 
+@functools.lru_cache(maxsize=32)
+def compiled_robot_moves(solution, solution_Text):
+    """Robot movements (dict) and total robot movements, for a Kociemba solution.
+    Results are cached, so the same solution string is converted to robot movements only once.
+    The returned dict is shared with the cache, and it shouldn't be modified."""
+    return rm.robot_moves(solution, solution_Text)
+
+
+
+
+
+
+
 def scrambling_cube():
     """function to scramble the cube via the robot.
         The function first generate a random cube status, via a function available form the Kociemba solver package.
         After, the robot generates the moves to solve that specific cube status.
         In case of --timer argument, a timer is visualized after the scrambling function."""
     
-    import Cubotone_moves as rm     # RobotMoves: convert Kociemba solver solution in robot movements sequence
+    global display1_state, robot_running
 
     cc = cubie.CubieCube()          # cube in cubie reppresentation
     cc.randomize()                  # randomized cube in cubie reppresentation 
     random_cube_string = str(cc.to_facelet_cube())   # randomized cube in facelets string reppresentation
-    print("\n\n\n\nRandom cube status:", random_cube_string) # feedback is printed to the terminal
+    log_print(f'\n\n\n\nRandom cube status: {random_cube_string}')  # feedback is printed to the terminal
     solution, solution_Text = cube_solution(random_cube_string) # Kociemba solver is called to have the "scrambling" solution string
-    print(solution_Text)        # feedback is printed to the terminal
+    log_print(solution_Text)    # feedback is printed to the terminal
     
     # dict and string with robot movements, and total movements
-    robot_moves, total_robot_moves = rm.robot_moves(solution, solution_Text)  # dict with robot movements, and total movements
-    print(f'\nTotal robot movements: {total_robot_moves}')  # nice information to print at terminal, sometime useful to copy
+    robot_moves, total_robot_moves = compiled_robot_moves(solution, solution_Text)  # dict with robot movements, and total movements
+    log_print(f'\nTotal robot movements: {total_robot_moves}')  # nice information to print at terminal, sometime useful to copy
     
+    tot_time_secs = 0                         # robot solution time is zero when the solving is interrupted by the stop button
     if robot_stop==False:
         robot_running = True                  # robot flag when servos and motor are activated
         tot_time_secs, _ =robot_move_cube(robot_moves, total_robot_moves, solution_Text)   # movements to the robot are applied
-        robot_time_display.cancel()           # after the robot has made the last (solving) move the countdown time is cancelled            
-    else:
-        tot_time_sec = 0                      # robot solution time is forced to zero when the solving i interrupted by the stop button
+        robot_running = False                 # robot flag when servos and motor are not activated (the stop button can request to quit)
+        display1_state = None                 # after the robot has made the last (solving) move the countdown time is cancelled            
         
     cube_scrambled = True
     return cube_scrambled
@@ -2955,35 +3247,40 @@ def scrambling_cube():
 
 
 
-def clear_terminal(device):
+def _clear_terminal_laptop(device):
     """Removes all the text from the terminal and positions the cursors on top left."""
     
-    if device == 'laptop':                      # case the script is running on a PC/laptop (not the robot)
-        import subprocess, platform
-        if platform.system()=="Windows":
-            try:
-                subprocess.Popen("cls", shell=True).communicate() 
-            except:
-                pass
-            try:
-                print("\x1b[H\x1b[2J")  # escape sequence
-#                 clear_output()
-            except:
-                pass
-        
-        else: #Linux and Mac
-            print("\033c", end="")
+    if os.name == 'nt' and not os.environ.get('WT_SESSION'):   # case of legacy Windows console, not handling the escape sequence
+        try:
+            subprocess.Popen("cls", shell=True).communicate() 
+        except:
+            pass
+        return
     
-    elif device == 'Rpi':                       # case the script is running at the robot
-            if check_screen_presence(debug, printout=False):
-                print("\x1b[H\x1b[2J")
+    sys.stdout.write("\x1b[H\x1b[2J")   # escape sequence: cursor to top left, and screen cleared
+    sys.stdout.flush()                  # single write to the terminal
+
+
 
 
 
 
 
+def _clear_terminal_rpi(device):
+    """Removes all the text from the terminal and positions the cursors on top left."""
+    
+    if check_screen_presence(debug, printout=False):
+        sys.stdout.write("\x1b[H\x1b[2J")   # escape sequence: cursor to top left, and screen cleared
+        sys.stdout.flush()                  # single write to the terminal
+
 
 
+
+
+
+
+all_segments = (8, 8, 8, 8)   # all segments at the robot's displays, shown when quitting
+
 def quit_func():
     """Quitting function, that properly closes stuff:
             Camera is closed
@@ -2995,8 +3292,8 @@ def quit_func():
 
     
     if device == 'laptop':                       # case the script is running on a PC/laptop (not the robot)
-        try: cv2.destroyAllWindows()             # all cv2 windows are removed
-        except: pass
+        cv2.destroyAllWindows()                  # all cv2 windows are removed
+        windows_placed.clear()                   # no cv2 windows are left
         close_camera(device)                     # webcam is closed
         pass
     
@@ -3012,40 +3309,13 @@ def quit_func():
         robot_running=False                      # flag "robot not moving" is set
 
         
-        try:
-            robot_load_status.cancel()           # reset the "loading" status at robot_display1
-        except:
-            if debug:
-                print(f'\nIssue on closing robot_load_status thread')
-            pass
-            
-        try:
-            robot_time_display.cancel()          # de-activates visualization of elapsed time on robot_display1
-        except:
-            if debug:
-                print(f'\nIssue on closing robot_time_display thread')
-            pass
-        
-        try:
-            robot_reading_status_display.cancel()   # de-activates visualization of cube reading status at robot_display2
-        except:
-            if debug:
-                print(f'\nIssue on closing robot_reading_status_display thread')
-            pass
-        
-        try:
-            robot_done_status_display.cancel()   # de-activates visualization of cube done on robot_display2
-        except:
-            if debug:
-                print(f'Issue on closing robot_done_status_display thread')
-            pass
-            
-        try:
-            robot_show_press.cancel()            # de-activates the press feedback on robot_display2
-        except:
-            if debug:
-                print(f'\nIssue on closing robot_press_feedback thread')
-            pass
+        for timer in list(active_timers):        # iteration over the started timers (displays feedback threads)
+            try:
+                timer.cancel()                   # de-activates the timer
+            except:
+                if debug:
+                    print(f'\nIssue on closing {timer.target.__name__} thread')
+                pass
         
         
         if not motors_hw:                        # case motors_hw is set False
@@ -3056,45 +3326,38 @@ def quit_func():
             
         if screen:                               # case a screen is connected
             try:
-                deco.terminate()                 # de-activates the decoration (picture collage of cube side)
+                if deco is not None:             # case the decoration process has been started
+                    deco_queue.put(None)         # sentinel to let the decoration process return, after the pending decoration
+                    deco.join(2)                 # waits for the decoration process to return (max 2 secs)
+                    if deco.is_alive():          # case the decoration process is still running
+                        deco.terminate()         # de-activates the decoration (picture collage of cube side)
             except:
                 pass
         
 
-            try:
-                cv2.destroyAllWindows()
-            except:
-                pass
+            cv2.destroyAllWindows()      # all cv2 windows are removed
+            windows_placed.clear()       # no cv2 windows are left
         
 
-        exiting = [8, 8, 8, 8]                   # all segments at the robot's displays
-        robot_display1.Show(exiting)             # light all the segments at the robot's robot_display1              
-        robot_display2.Show(exiting)             # light all the segments at the robot's robot_display2
+        ensure_displays()                        # case the displays initialization is still running
+        robot_display1.Show(all_segments)        # light all the segments at the robot's robot_display1              
+        robot_display2.Show(all_segments)        # light all the segments at the robot's robot_display2
 
         
-        for i in range(2):
-            if i == 0:                           # first iteration
-                print_out=debug                  # prints are set as per debug
-            else:                                # from the second iteration onward
-                print_out=False                  # prints are set false
+        try:
+            servo.led_off()                      # switches the top-cover led OFF
+            servo.read_cover()                   # top cover is opened
+            servo.wait_settled(0.5)              # wait for the top cover being out from the cube (max 0.5 secs)
+            robot_park(servos_off=True)          # top cover and cube lifter set to start position, servos and motor de-energized
             
-            try:
-                servo.led_off()                  # switches the top-cover led OFF
-                servo.read_cover()               # top cover is opened
-                time.sleep(0.5)                  # little time to ensure the top cover being out from the cube
-                servo.servo_start_positions(print_out)  # top cover and cube lifter set to start position
-                time.sleep(1)                    # time to ensure servos are at their start positions
-                servo.servo_off(print_out)       # de-energizes the servos
-                servo.motor_off(print_out)       # de-energizes the motor
-                time.sleep(0.5)                  # time to ensure servos are at their start positions
-                servo.servo_off(print_out)       # de-energizes the servos
-                
-            except:
-                if debug:
-                    print(f'\nIssue on rotating servos to initial position')
+        except:
+            if debug:
+                print(f'\nIssue on rotating servos to initial position')
+        
+        flush_log(close=True)                    # buffered log data is written to the log file
         
         try:
-            close_camera('device')               # closes the camnera object (should be the latest command, as per close camera)
+            close_camera(device)                 # closes the camnera object (should be the latest command, as per close camera)
         except:
             if debug:
                 print('\nIssues at camera closing while quitting')
@@ -3105,7 +3368,6 @@ def quit_func():
         
         try:
             robot_clear_displays()               # displays at robot are cleared (before "cleaning" GPIO!!! )
-            robot_clear_displays()               # displays at robot are cleared (before "cleaning" GPIO!!! )
         except:
             pass
         
@@ -3117,19 +3379,26 @@ def quit_func():
 
 
 
-def camera_opened_check(device):
+def _camera_opened_check_laptop(device):
     """Verifies if the camera is opened (if it provides a feedback). Funtion returns a boolean."""
     
-    if device == 'laptop':                      # case the script is running on a PC/laptop (not the robot)
-        return camera.isOpened()                # checks if webcam is responsive or not
+    return camera.isOpened()                # checks if webcam is responsive or not
+
+
+
+
+
+
+
+def _camera_opened_check_rpi(device):
+    """Verifies if the camera is opened (if it provides a feedback). Funtion returns a boolean."""
     
-    elif device == 'Rpi':                       # case the script is running at the robot
-        try:
-            binning = camera.sensor_mode        # PiCamera sensor_mode is checked
-            if binning >=0:
-                return True
-        except:
-            return False
+    try:
+        binning = camera.sensor_mode        # PiCamera sensor_mode is checked
+        if binning >=0:
+            return True
+    except:
+        return False
 
 
 
@@ -3137,48 +3406,63 @@ def camera_opened_check(device):
 
 
 
-def close_camera(device):
+def _close_camera_laptop(device):
     """Closes the camera object.
         It's important to close the camera, if the script runs again
     
         On PiCamera it's importan to close it, at the end of a cube solving cycle to drop the AWB
         and Exposition setting used before."""
     
-    if device == 'laptop':                  # case the script is running on a PC/laptop (not the robot)
-        try:
-            camera.release()                # if the program gets stuk it's because the camera remained open from previour run
-        except:
-            pass
+    try:
+        frame_grabber.stop()            # frames capturing thread is stopped before releasing the camera
+        camera.release()                # if the program gets stuk it's because the camera remained open from previour run
+    except:
+        pass
+
+
+
+
+
+
+
+def _close_camera_rpi(device):
+    """Closes the camera object.
+        It's important to close the camera, if the script runs again
     
-    elif device == 'Rpi':                   # case the script is running at the robot
-        try:
-            camera.close()                  # necessary to close the camera to release the fix gains (analog/digital) settings
-            if debug:
-                print(f'\nClosed {device} camera')
-        except:
-            pass
+        On PiCamera it's importan to close it, at the end of a cube solving cycle to drop the AWB
+        and Exposition setting used before."""
+    
+    try:
+        frame_grabber.stop()            # frames capturing thread is stopped before closing the camera
+        camera.close()                  # necessary to close the camera to release the fix gains (analog/digital) settings
+        if debug:
+            print(f'\nClosed {device} camera')
+    except:
+        pass
+
 
 
 
 
 
 
+thermal_file = None   # Raspberry pi CPU temperature file, opened once and re-read at each cpu_temp call
 
-def cpu_temp():
+def _cpu_temp_rpi():
     """Funtion to read/print CPU temperature at Raspberry pi.
-    This gives an idea about the temperature into the robot case."""
+    This gives an idea about the temperature into the robot case.
+    The temperature file is opened once, and re-read from its start on the following calls."""
     
-    if device == 'laptop':        # case the script is running on a PC/laptop (not the robot)
-        return                    # this fuction is not executed 
+    global thermal_file
     
-    elif device == 'Rpi':         # case the script is running at the robot
-        try:
-            tFile = open('/sys/class/thermal/thermal_zone0/temp')
-            cpu_temp = round(float(tFile.read()) /1000, 1)
-
-        except:
-            tFile.close()
-        print(f'\nRpi CPU temp: {cpu_temp} degrees C\n')
+    try:
+        if thermal_file is None:                            # case the temperature file hasn't been opened yet
+            thermal_file = open('/sys/class/thermal/thermal_zone0/temp')
+        thermal_file.seek(0)                                # sysfs file is re-read from the start
+        cpu_temp = int(thermal_file.read()) / 1000          # temperature in millidegrees is converted to degrees
+    except:
+        return                                              # temperature isn't available
+    print(f'\nRpi CPU temp: {cpu_temp:.1f} degrees C\n')
 
 
 
@@ -3219,12 +3503,10 @@ def robot_pressed_button(new_cycle_button):
     """Function that initially was measuring how long the NEW CYCLE is pressed, by returning two pressing conditions (short, long).
     After implementing a 'stop_function' (as interrupt) this function has much less sense, yet was easier to keep it."""
     
-    new_cycle_button = GPIO.input(13)                   # GPIO reading value is assigned
     pressed_start_time = time.time()                    # the initial time is assigned
-    elapsed = 0                                         # variable to assign the elapsed time is initially set on zero
-    while new_cycle_button == 0:                        # while loop is started, and the condition to maintain is later checked
-        elapsed = time.time() - pressed_start_time      # elapse time is calculated
-        new_cycle_button = GPIO.input(13)               # updated the variable that sustains the while loop
+    while GPIO.input(13) == 0:                          # case the button is still pressed
+        time.sleep(0.01)                                # button release is checked every 10ms, instead of a busy loop
+    elapsed = time.time() - pressed_start_time          # elapse time is calculated
 
     if elapsed >0:                                      # in case the elapsed time is >0 (obviously it is !)
         if debug:
@@ -3237,67 +3519,76 @@ def robot_pressed_button(new_cycle_button):
 
 
 
+quit_request = threading.Event()   # event set by the stop button interrupt, for the main thread to call the quitting function
+
 def stop_cycle(channel):
     """Function called as an interrupt in case the "start/stop button" is pressed.
-    Time delay is used to prevent unwanted interruptions: Button has to be pressed at least for 0.5 seconds.
+    Unwanted interruptions are filtered by the GPIO edge detection bouncetime, therefore the button is checked once.
     The function change (global) variables used on roboto movements, to prevent further movements to happen.
-    The function calls the quitting function, that closes the script."""
+    The quitting function is called by the main thread, once the robot cycle is interrupted."""
     
     global robot_running, robot_stop
     
-    time.sleep(0.5)                        # delay between function being called, and new GPIO check
     stop_cycle_button = GPIO.input(13)     # GPIO is checked, and it values assigned
-    if stop_cycle_button == 0:             # in case, after the initial delay, the button is (still) pressed
+    if stop_cycle_button == 0:             # in case the button is pressed
         if robot_running:                  # in case the robot was working
             robot_stop = True              # flag to immediatly interrup the robot movements is set
             robot_running=False            # flaf of robot running is set to false
-            quit_func()                    # quitting function is called
-    else:
-        pass
+            quit_request.set()             # quitting is requested to the main thread
+            button_pressed.set()           # the main thread is woken up, in case it's waiting for the button
+
 
 
+def quit_requested():
+    """Returns True when the stop button has requested to quit (the request is cleared, as acted on by the caller)."""
+    
+    if quit_request.is_set():              # case the stop button has requested to quit
+        quit_request.clear()               # the request is cleared
+        return True
+    return False
 
 
 
 
 
+
+
+active_timers = []   # InfiniteTimer instances currently started, to be all cancelled when quitting
+
 class InfiniteTimer():
     """from: https://stackoverflow.com/questions/12435211/python-threading-timer-repeat-function-every-n-seconds
-    This timer runs threads with defined timers.
+    This timer runs the target function every defined seconds, on a single (daemon) thread.
     These timers are used to alternate text on displays at the robot.
     """
 
     def __init__(self, seconds, target):
-        self._should_continue = False
-        self.is_running = False
         self.seconds = seconds
         self.target = target
-        self.thread = None
+        self._stop = threading.Event()
+        self._stop.set()                     # timer is not running
+        self._thread = None
 
-    def _handle_target(self):
-        self.is_running = True
-        self.target()
-        self.is_running = False
-        self._start_timer()
-
-    def _start_timer(self):
-        if self._should_continue: # Code could have been running when cancel was called.
-            self.thread = Timer(self.seconds, self._handle_target)
-            self.thread.start()
+    def _run(self, stop):
+        while not stop.wait(self.seconds):   # waits the seconds interval, or returns True as soon as cancel is called
+            try:
+                self.target()
+            except:
+                pass
 
     def start(self):
-        if not self._should_continue and not self.is_running:
-            self._should_continue = True
-            self._start_timer()
+        if self._stop.is_set():
+            self._stop = threading.Event()   # new event per start, so a thread still ending after cancel won't be resumed
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+            self._thread.start()
+            active_timers.append(self)       # timer is registered as active
         else:
             print("Timer already started or running, please wait if you're restarting.")
 
     def cancel(self):
-        if self.thread is not None:
-            self._should_continue = False # Just in case thread is running and cancel fails.
-            self.thread.cancel()
-        else:
-            #print("Timer never started or failed to initialize.")
+        self._stop.set()                     # the thread returns at the current wait, without further target calls
+        try:
+            active_timers.remove(self)       # timer is de-registered
+        except ValueError:
             pass
 
 
@@ -3306,18 +3597,107 @@ class InfiniteTimer():
 
 
 
+display1_state = None   # feedback visualized on robot_display1 by the display timer: 'loading', 'time' or None
+display2_state = None   # feedback visualized on robot_display2 by the display timer: 'press', 'cal', 'read', 'done' or None
+display_feedback = {}   # display state to feedback function, set at start_up (after the device functions are bound)
+start_time = time.monotonic()   # reference time for the displays feedback, reset at each cycle start by cubeAF
+tick_parity = 0         # parity of the seconds since start_time, computed once per display tick (alternates the shown words)
+
+def display_tick():
+    """Target of the single display timer: the feedback function of the active state is called, for each display."""
+    
+    global tick_parity
+    tick_parity = int(time.monotonic() - start_time) & 1  # 0 on even seconds, 1 on odd seconds
+    for state in (display1_state, display2_state):   # iteration over the states of the two displays
+        feedback = display_feedback.get(state)       # feedback function for the display state (None if no state)
+        if feedback is not None:
+            try:
+                feedback()                           # display is updated
+            except:
+                pass
+
+
+
+
+
+
+
+class DisplayBuffer():
+    """Wrapper of a tm1637 display, storing the last written digits.
+    Digits are sent to the display only when they differ from the stored ones, limiting the GPIO transactions.
+    Words (i.e. Cam, Read) shown via show_word are sent only when they differ from the last shown word.
+    Other display methods are forwarded to the display, and the stored digits are considered unknown afterward.
+    """
+
+    def __init__(self, display):
+        self._dev = display
+        self.state = None                    # digits shown on the display, None when unknown
+        self.word = None                     # word shown on the display, None when not a word
+
+    def clear(self):
+        self._dev.Clear()                    # display is cleared once
+        self.state = [36, 36, 36, 36]        # all digits are blank
+        self.word = None
+
+    Clear = clear
+
+    def set(self, i, digit):
+        if self.state is None or self.state[i] != digit:   # case the digit differs from the shown one
+            self._dev.Show1(i, digit)
+            self.word = None
+            if self.state is not None:
+                self.state[i] = digit
+
+    def show(self, digits):
+        if self.state is None:               # case the shown digits are unknown
+            self._dev.Show(digits)           # all the digits are sent
+        else:
+            for i, digit in enumerate(digits):
+                if self.state[i] != digit:   # case the digit differs from the shown one
+                    self._dev.Show1(i, digit)   # only the changed digit is sent
+        self.state = list(digits)
+        self.word = None
+
+    Show = show
+
+    def show_word(self, word):
+        if word != self.word:                # case the word differs from the shown one
+            getattr(self._dev, word)()       # word method of the display (it writes all the 4 digits)
+            self.state = None
+            self.word = word
+
+    def ShowDoublepoint(self, on):
+        self._dev.ShowDoublepoint(on)        # the display re-sends the same digits, only when the double point changes
+
+    def __getattr__(self, name):
+        self.state = None                    # other display methods change the digits, in a way not tracked here
+        self.word = None
+        return getattr(self._dev, name)
+
+
+
+
+
+
+
+robot_display1 = None   # robot display1, set once by robot_set_displays
+robot_display2 = None   # robot display2, set once by robot_set_displays
+
 def robot_set_displays(debug, printout=False):
-    """Sets the displays at the robot."""
+    """Sets the displays at the robot; The displays are set only once."""
     
     global robot_display1, robot_display2
     
+    if robot_display1 is not None and robot_display2 is not None:   # case the displays are already set
+        return
+    
     if debug and printout:             # case debug variable is set true on __main_ and 
         print('robot displays are set')                                     # feedback is printed to the terminal
     
-    robot_display2 = tm1637.TM1637(CLK=9, DIO=10, brightness=0.0)           # display2 is set
+    robot_display2 = DisplayBuffer(tm1637.TM1637(CLK=9, DIO=10, brightness=0.0))    # display2 is set
     robot_display2.Clear()                                                  # display2 is cleared
     
-    robot_display1 = tm1637.TM1637(CLK=26, DIO=19, brightness=0.0)          # display1 is set
+    robot_display1 = DisplayBuffer(tm1637.TM1637(CLK=26, DIO=19, brightness=0.0))   # display1 is set
     robot_display1.Clear()                                                  # display1 is cleared
     
     robot_display2.SetBrightness(0)                                         # display2 brightness is set low
@@ -3328,18 +3708,27 @@ def robot_set_displays(debug, printout=False):
 
 
 
+display_init_thread = None   # thread initializing the robot displays at start up, concurrently with the camera
+
+def ensure_displays():
+    """Waits for the displays initialization thread to be completed (returns immediately afterward)."""
+    if display_init_thread is not None:
+        display_init_thread.join()
+
+
+
+
+
+
+
 def robot_clear_displays():
-    """Clears the displays at the robot
-    The used displays and/or the library, aren't very reliable and many times the same command
-    requires to be sent multiple times."""
+    """Clears the displays at the robot."""
     
-    robot_set_displays(debug, printout=False)
-    robot_display1.Clear()
-    robot_display1.Clear()
-    robot_display2.Clear()
-    robot_display2.Clear()
-    robot_display1.Clear()
-    robot_display2.Clear()
+    ensure_displays()                      # case the displays initialization is still running
+    if robot_display1 is None:             # case the displays have not been set yet
+        robot_set_displays(debug, printout=False)
+    robot_display1.clear()
+    robot_display2.clear()
 
 
 
@@ -3347,24 +3736,16 @@ def robot_clear_displays():
 
 
 
-def robot_loading_feedback():
+def _robot_loading_feedback_rpi():
     """On robot_display1, a loading feedback pattern is visualized at the script start up.
     In essence the character 8 is shoved from digit to digit (left to right)."""
     
-    if device == 'laptop':                      # case the script is running on a PC/laptop (not the robot)
-        return                                  # this function is not executed
-    
-    elif device == 'Rpi':                       # case the script is running at the robot
-        global robot_stop
-        if robot_stop==False:                   # case stop_button has not being pressed
-            robot_display1.Clear()              # complete display is cleared
-            for i in range(4):                  # iterates on the 4 digits of the display
-                robot_display1.Show1(i, 8)      # character 8 is showed on the iterator digit
-                robot_display1.Show1(i, 8)      # repeated command: character 8 is showed on the iterator digit
-                time.sleep(0.1)                 # little delay
-                robot_display1.Show1(i, 36)     # empty character is showed on the iterator digit
-                robot_display1.Show1(i, 36)     # repeated command: empty character is showed at the display
-            robot_display1.Clear()              # complete display is cleared
+    if robot_stop==False:                   # case stop_button has not being pressed
+        robot_display1.clear()              # complete display is cleared
+        for i in range(4):                  # iterates on the 4 digits of the display
+            robot_display1.set(i, 8)        # character 8 is showed on the iterator digit
+            time.sleep(0.1)                 # little delay
+            robot_display1.set(i, 36)       # empty character is showed on the iterator digit
 
 
 
@@ -3372,17 +3753,11 @@ def robot_loading_feedback():
 
 
 
-def robot_press_feedback():
+def _robot_press_feedback_rpi():
     """On robot_display2 of the robot, is suggested to PRESS when waiting for a user feedback to start a reading cycle.""" 
     
-    if device == 'laptop':                    # case the script is running on a PC/laptop (not the robot)
-        return                                # this function is not executed
-    
-    elif device == 'Rpi':                     # case the script is running at the robot
-        global robot_stop
-        if robot_stop==False:                 # case stop_button has not being pressed
-            robot_display2.Press()            # "Pres" is showed 
-            robot_display2.Press()            # "Pres" is showed 
+    if robot_stop==False:                 # case stop_button has not being pressed
+        robot_display2.show_word('Press') # "Pres" is showed (sent only when changed)
 
 
 
@@ -3390,37 +3765,28 @@ def robot_press_feedback():
 
 
 
-def robot_time_elapsed():
+time_digits = [0, 0, 0, 0]   # digits of the elapsed time, re-used at each robot_display1 update
+
+def _robot_time_elapsed_rpi():
     """On robot_display1 of the robot, is visualized thetime elapsed since the cube reading status has started.
     Note: If the robot is running, and it gets connected to internet (ie., via SSH) the it will adjust the date and time,
     to a more precise one than the initial estimated. This means the difference between initial estimated time, and adjusted one,
     will be reflected on the time displayed on the screen, and on the robot solving time text log file.
     This could be solved by adding RTC extension borad, with related battery."""
     
-    if device == 'laptop':                              # case the script is running on a PC/laptop (not the robot)
-        return                                          # this function is not executed
+    if not GPIO.input(12) and side <6:              # case the GPIO12 is at level 0 (switch is closed, keep the show) and cube scan not completed
+        return                                      # robot_display1 is not updated
     
-    elif device == 'Rpi':                               # case the script is running at the robot
-        global robot_stop
-        
-        if not GPIO.input(12) and side <6:              # case the GPIO12 is at level 0 (switch is closed, keep the show) and cube scan not completed
-            return                                      # robot_display1 is not updated
-        
-        else:
-            if robot_stop==False:                           # case stop_button has not being pressed
-                robot_display1.Clear()                      # complete display is cleared
-                robot_display1.ShowDoublepoint(True)        # double point separation between minutes and seconds is activated
-                seconds = int(time.time() - start_time)     # time in seconds is calculated
-                m, s = divmod(seconds, 60)                  # minutes and seconds are generated
-                d0,d1 = divmod(m, 10)                       # at digit d0 the decades of minutes are assigned, at d1 the minutes
-                d2, d3 = divmod(seconds-m*60, 10)           # at digit d2 the decades of seconds are assigned, at d3 the seconds
-                
-                robot_time_elapsed = [d0, d1, d2, d3]       # list with the fouyr digits is made
-#                 print(robot_time_elapsed)
-                
-                robot_display1.Show (robot_time_elapsed)    # time is showed at the display
-#                 robot_display1.Show (robot_time_elapsed)    # command is repeated: time is showed at the display
-#                 robot_display1.Show (robot_time_elapsed)    # command is repeated: time is showed at the display
+    else:
+        if robot_stop==False:                           # case stop_button has not being pressed
+            robot_display1.ShowDoublepoint(True)        # double point separation between minutes and seconds is activated
+            seconds = int(time.monotonic() - start_time) # time in seconds is calculated
+            m, s = divmod(seconds, 60)                  # minutes and seconds are generated
+            time_digits[0], time_digits[1] = divmod(m, 10)   # decades of minutes, and minutes
+            time_digits[2], time_digits[3] = divmod(s, 10)   # decades of seconds, and seconds
+#             print(time_digits)
+            
+            robot_display1.show(time_digits)            # time is showed at the display, by only sending the changed digits
 
 
 
@@ -3437,18 +3803,18 @@ def robot_solve_cube(fixWindPos, screen, device, frame, faces, edge, cube_status
     Within this function the robot is called to solve the cube.
     This function calls many other functions."""
     
-    global robot_stop, robot_running, deco
+    global robot_stop, robot_running, deco, deco_queue, display1_state, display2_state
     
-    robot_reading_status_display.cancel()             # de-activates visualization of elapsed time on robot_display2
+    display2_state = None                             # de-activates visualization of cube reading status on robot_display2
     robot_clear_displays()
 #     robot_display2.Clear()                            # clears dysplay2
 #     robot_display2.Clear()                            # clears dysplay2
     
-    robot_moves, total_robot_moves = rm.robot_moves(solution, solution_Text)  # dict with robot movements, and total movements
+    robot_moves, total_robot_moves = compiled_robot_moves(solution, solution_Text)  # dict with robot movements, and total movements
 #     print(f'\nRobot movements sequence: {robot_moves}')   # nice information to print at terminal, sometime useful to copy 
     
     if solution_Text != 'Error':
-        print(f'\nTotal robot movements: {total_robot_moves}')  # nice information to print at terminal, sometime useful to copy
+        log_print(f'\nTotal robot movements: {total_robot_moves}')  # nice information to print at terminal, sometime useful to copy
 
     if detect_winner == 'BGR': facelets_data=BGR_mean                    # data to be later logged in a text file         
     elif detect_winner == 'HSV': facelets_data=HSV_detected              # data to be later logged in a text file
@@ -3459,6 +3825,7 @@ def robot_solve_cube(fixWindPos, screen, device, frame, faces, edge, cube_status
             cv2.destroyWindow("cube")
         except:
             pass
+        windows_placed.discard("cube")        # cube window has to be placed again, when used
 
     show_time=show_time+int(0.7*total_robot_moves)   # show times is calculated to use all the robot solving time 
     deco_info = fixWindPos, screen, device, frame, background_h, faces, edge, cube_status_string, cube_status, \
@@ -3466,15 +3833,18 @@ def robot_solve_cube(fixWindPos, screen, device, frame, faces, edge, cube_status
                 show_time, timestamp, robot_stop
         
     if screen:                                # case a screen is connected a multiprocess is used to show the cube status while solving it
-        deco = mp.Process(target=decoration, args=(deco_info,)) # decoration showing (or just saving is screen=False) cube's faces pictures
-        deco.start()                          # decoration thread is started
-    
+        if deco is None or not deco.is_alive():   # case the decoration process isn't running
+            deco_queue = mp.Queue()           # queue to send the decoration info to the decoration process
+            deco = mp.Process(target=decoration_worker, args=(deco_queue,), daemon=True)  # decoration process, re-used at each solving
+            deco.start()                      # decoration process is started
+        deco_queue.put(deco_info)             # decoration showing (or just saving is screen=False) cube's faces pictures
+    
+    deco_time = time.monotonic()              # reference time, also logged when the solving is interrupted by the stop button
+    tot_time_secs = 0                         # robot solution time is zero when the solving is interrupted by the stop button
+    elapsed_robot_time = 0                    # robot moves time is zero when the solving is interrupted by the stop button
     if robot_stop==False:
-        deco_time = time.time()
         tot_time_secs, elapsed_robot_time = robot_move_cube(robot_moves, total_robot_moves, solution_Text)   # movements to the robot are applied
-        robot_time_display.cancel()           # after the robot has made the last (solving) move the countdown time is cancelled
-    else:
-        tot_time_sec = 0                      # robot solution time is forced to zero when the solving i interrupted by the stop button
+        display1_state = None                 # after the robot has made the last (solving) move the countdown time is cancelled
     
     if robot_stop==False:                     # repeated conditional, to re-check the condition as the previous task takes some time
         servo.fun(debug)                      # cube is rotated wing increasing and decreasing speed, just for FUN
@@ -3484,23 +3854,15 @@ def robot_solve_cube(fixWindPos, screen, device, frame, faces, edge, cube_status
                     camera_ready_time, cube_detect_time, cube_solution_time, elapsed_robot_time, deco_time, tot_time_secs
     
     if solution_Text != 'Error':              # if there are not errors from the Kocimeba solver
-        robot_done_status_display.start()     # activates visualization of cube done on robot_display2
+        display2_state = 'done'               # activates visualization of cube done on robot_display2
         
     elif solution_Text == 'Error':            # if error (tipically bad color reading, so wrong amount of facelets per color) 
         robot_show_error_status()             # feedback at robot_display2
     
     if robot_stop==False:                     # case stop_button has not being pressed   
         time.sleep(1)                         # delay
-        for i in range(2):
-            if i == 0:                        # first iteration
-                print_out=debug               # prints are set as per debug
-            else:                             # from the second iteration onward
-                print_out=False               # prints are set false
-            servo.servo_start_positions(print_out)  # top cover and cube lifter to start position
-            time.sleep(1)                     # delay
-#             servo.servo_off(print_out)        # servo is de-energized
-            servo.motor_off(print_out)        # motor is de-energized
-            robot_running = False             # robot working flag is set to False, meaning no motor/servo actions
+        robot_park()                          # top cover and cube lifter to start position, motor de-energized
+        robot_running = False                 # robot working flag is set to False, meaning no motor/servo actions
 
     return deco_info, log_data_info
 
@@ -3508,51 +3870,49 @@ def robot_solve_cube(fixWindPos, screen, device, frame, faces, edge, cube_status
 
 
 
+def robot_park(servos_off=False):
+    """Positions the top cover and the cube lifter to their start position, and de-energizes the motor (and the servos).
+    The positioning is done twice, to ensure the start position is reached; Prints (as per debug) only on the first time."""
+    
+    for i in range(2):
+        print_out = debug if i == 0 else False   # prints are set as per debug on the first iteration, false afterward
+        servo.servo_start_positions(print_out)   # top cover and cube lifter to start position
+        servo.wait_settled(1)                    # wait for the servos to be at their start positions (max 1 sec)
+        if servos_off:                           # case the servos have to be de-energized
+            servo.servo_off(print_out)           # servos are de-energized
+        servo.motor_off(print_out)               # motor is de-energized
+
+
+
+
+
+
+
 def robot_timeout_func():
     """Robot reaction mode in case of timeout.
     Cube state reading, in case of high reflection or pollutted facelets, could get stuck therefore the need for a timeout;
     This function takes care of quitting the reading status."""
     
+    global display1_state, display2_state
+    
     clear_terminal(device)
     print(f'\nTimeout for cube status detection: Check if too much reflections, or polluted facelets\n')
     
-    robot_time_display.cancel()           # robot_display1 at robot is cleared
+    display1_state = None                 # robot_display1 at robot is cleared
     
-    for i in range(2):
-        if i == 0:                        # first iteration
-            print_out=debug               # prints are set as per debug
-        else:                             # from the second iteration onward
-            print_out=False               # prints are set false
-        servo.servo_start_positions(print_out)  # top cover and cube lifter to start position
-        time.sleep(1)                     # delay
-#         servo.servo_off(print_out)        # servo is de-energized
-        servo.motor_off(print_out)        # motor is de-energized
-        robot_running = False             # robot working flag is set to False, meaning no motor/servo actions
+    robot_park()                          # top cover and cube lifter to start position, motor de-energized
+    robot_running = False                 # robot working flag is set to False, meaning no motor/servo actions
 
     
 #     close_camera(device)  # this is necessary to get rid of analog/digital gains previously blocked
     
-    try: robot_load_status.cancel()                 # reset the "loading" status at robot_display1
-    except: pass
-        
-    try: robot_time_display.cancel()                # de-activates visualization of elapsed time on robot_display1
-    except: pass
-    
-    try: robot_reading_status_display.cancel()      # de-activates visualization of cube reading status at robot_display2
-    except: pass
-    
-    try: robot_done_status_display.cancel()         # de-activates visualization of cube done on robot_display2
-    except: pass
-        
-    try: robot_press_feedback.cancel()              # de-activates the press feedback on robot_display2
-    except: pass
+    display2_state = None       # de-activates the reading status, cube done and press feedbacks on robot_display2
     
     if screen:                  # case a screen is connected
-        try: cv2.destroyAllWindows()
-        except: pass
+        cv2.destroyAllWindows() # all cv2 windows are removed
+        windows_placed.clear()  # no cv2 windows are left
     
     robot_clear_displays()      # clears displays on the robot
-    robot_clear_displays()      # repeat of clears displays on the robot
     side=6                      # side is forced to 6, to simulate the cube solving was done so that the script restart for a next cycle 
     timeout=True                # boolean variable (also global) used to manage the timeout case
     
@@ -3567,19 +3927,11 @@ def robot_timeout_func():
 def robot_show_camera_cal():
     """On display 2 of the robot, a feedback is provided when the PiCamera is under calibration."""
     
-    global robot_stop
-    
     if robot_stop==False:                        # case stop_button has not being pressed
-        robot_display2.Clear()                   # display2 is cleared
-        seconds = int(time.time() - start_time)  # time in seconds, express in integers 
-
-        if (seconds % 2) == 0:                   # every even second 
-            robot_display2.Cam()                 # the word 'CAM" is showed
-            robot_display2.Cam()                 # repeated command: the word 'CAM" is showed
-
+        if not tick_parity:                      # every even second 
+            robot_display2.show_word('Cam')      # the word 'CAM" is showed (sent only when changed)
         else:                                    # every odd second 
-            robot_display2.Cal()                 # the word 'CAL" is showed
-            robot_display2.Cal()                 # repeated command: he word 'CAL" is showed
+            robot_display2.show_word('Cal')      # the word 'CAL" is showed (sent only when changed)
 
 
 
@@ -3588,19 +3940,11 @@ def robot_show_camera_cal():
 def robot_show_read_status():
     """On display 2 of the robot, a feedback is provided when the cube is in cube reading status."""
     
-    global robot_stop
-    
     if robot_stop==False:                        # case stop_button has not being pressed
-        robot_display2.Clear()                   # display2 is cleared
-        seconds = int(time.time() - start_time)  # time in seconds, express in integers 
-
-        if (seconds % 2) == 0:                   # every even second 
-            robot_display2.Cube()                # the word 'CubE" is showed
-            robot_display2.Cube()                # repeated command: the word 'CubE" is showed
-
+        if not tick_parity:                      # every even second 
+            robot_display2.show_word('Cube')     # the word 'CubE" is showed (sent only when changed)
         else:                                    # every odd  second 
-            robot_display2.Read()                # the word 'REAd" is showed
-            robot_display2.Read()                # repeated command: he word 'REAd" is showed
+            robot_display2.show_word('Read')     # the word 'REAd" is showed (sent only when changed)
 
 
 
@@ -3608,16 +3952,10 @@ def robot_show_read_status():
 
 
 
-def robot_show_error_status():
+def _robot_show_error_status_rpi():
     """On robot_display2 of the robot, a feedback is provided when the cube solver returns an error."""
     
-    if device == 'laptop':            # case the script is running on a PC/laptop (not the robot)
-        return                        # this function is not executed
-    
-    elif device=='Rpi':               # case the script is running at the robot
-        robot_display2.Clear()        # display2 is cleared
-        robot_display2.Error()        # the word "Err" is showed
-        robot_display2.Error()        # repeated command: the word "Err" is showed
+    robot_display2.show_word('Error') # the word "Err" is showed (sent only when changed)
 
 
 
@@ -3625,24 +3963,105 @@ def robot_show_error_status():
 
 
 
-def robot_show_cube_done():
+def _robot_show_cube_done_rpi():
     """On robot_display2 of the robot, a feedback is provided when the cube is is solved."""
     
-    if device == 'laptop':                           # case the script is running on a PC/laptop (not the robot)
-        return                                       # this function is not executed
+    if robot_stop==False:                        # case stop_button has not being pressed
+        if not tick_parity:                      # every even second 
+            robot_display2.show_word('Cube')     # the word 'CubE" is showed (sent only when changed)
+        else:                                    # every odd second 
+            robot_display2.show_word('Done')     # the word 'DonE" is showed (sent only when changed)
+
+
+
+
+
+
+
+log_file = None                            # robot solver log file, opened once by the log writer thread and kept open (buffered)
+log_data_queue = queue.Queue(maxsize=64)   # records to be written to the log file by the log writer thread
+log_headers = ('Date', 'Screen', 'CV_wow', 'Debug', 'Led_usage', 'ColorAnalysisWinner', 'TotalTime(s)', 'CamWarmUpTime(s)',
+               'FaceletsDetectionTime(s)', 'CubeSolutionTime(s)', 'CollageImageTime (s)', 'RobotSolvingTime(s)',
+               'CubeStatus(BGR or HSV or BGR,HSV)', 'CubeStatus', 'CubeSolution')   # headers of the log file columns
+# tab separated template of a log file record; the four times between the cycle phases are formatted with 1 decimal
+log_record_format = '\t'.join(['{}'] * 7 + ['{:.1f}'] * 4 + ['{}'] * 4) + '\n'
+log_batch = 4                              # records kept in the file buffer before writing them to the SD card
+log_idle_flush = 10                        # seconds without new records, after which the buffered records are written anyway
+
+def flush_log(close=False):
+    """Writes the queued and buffered log data to the log file, and eventually closes it."""
     
-    elif device=='Rpi':                              # case the script is running at the robot
-        global robot_stop
-        
-        if robot_stop==False:                        # case stop_button has not being pressed
-            robot_display2.Clear()                   # display2 is cleared
-            seconds = int(time.time() - start_time)  # time in seconds, express in integers 
-            if (seconds % 2) == 0:                   # every even second 
-                robot_display2.Cube()                # the word 'CubE" is showed
-                robot_display2.Cube()                # repeated command: the word 'CubE" is showed
-            else:                                    # every odd second 
-                robot_display2.Done()                # the word 'DonE" is showed
-                robot_display2.Done()                # repeated command: the word 'DonE" is showed
+    global log_file
+    log_data_queue.join()          # waits for the log writer thread to handle all the queued records
+    if log_file is None:           # case the log file was never opened
+        return
+    try:
+        log_file.flush()           # buffered data is written to the file
+        if close:                  # case the file has to be closed
+            log_file.close()       # log file is closed
+            log_file = None        # log file will be re-opened at the next record
+    except:
+        pass
+
+
+
+
+
+
+
+def open_log_file():
+    """Opens (or generates) the log file in append mode, and writes the headers if the file is empty."""
+    
+    global log_file
+    # file will be generated if it does not exist, and data will be appended at the end; the file is kept open (buffered)
+    log_file = open(log_fname, 'a', buffering=65536)
+    
+    if log_file.tell() == 0:                             # if case the file is empty, headers are written
+        try:
+            os.chmod(log_fname, 0o666)                   # write permission to group and others (the umask turns it off at creation)
+        except:
+            pass
+        if debug:
+            print(f'\ngenerated Cubotone_solver_log_Rpi.txt file with headers')
+        log_file.write('\t'.join(log_headers) + '\n')   # tab separated string of the the headers
+
+
+
+
+
+
+
+def log_data_writer():
+    """Log writer thread: queued records are written to the log file buffer, that is flushed every log_batch records.
+    This keeps the disk I/O away from the robot loop, and makes fewer (larger) writes to the SD card when many cycles
+    are done in a session; When no record arrives for log_idle_flush seconds the buffered records are written as well,
+    so that a power cut does not lose them. The remaining records are written by flush_log, at quitting or at the script exit."""
+    
+    pending = 0                                          # records in the file buffer, not yet written to the file
+    while True:
+        try:
+            record = log_data_queue.get(timeout=log_idle_flush)   # waits for a record to be queued
+        except queue.Empty:                              # case no records arrived within log_idle_flush seconds
+            if pending and log_file is not None:         # case of records in the file buffer
+                try:
+                    log_file.flush()                     # buffered data is written to the file
+                except:
+                    print('\nissue on writing the log file')
+                pending = 0
+            continue
+        try:
+            if log_file is None:                         # case the log file hasn't been opened yet (or has been closed)
+                open_log_file()                          # log file is opened, and headers written if empty
+                pending = 0
+            log_file.write(record)                       # record is appended to the buffer
+            pending += 1
+            if pending >= log_batch:                     # case the batch of records is complete
+                log_file.flush()                         # buffered data is written to the file
+                pending = 0
+        except:
+            print('\nissue on writing the log file')
+        finally:
+            log_data_queue.task_done()                   # queued record is marked as done
 
 
 
@@ -3656,9 +4075,8 @@ def log_data(log_data_info):
     This function is called obly on the robot (Rpi), to generate a database of info usefull for debug and fun
     BGR color distance is the first approach used to detect cube status, therefore the winner if it succedes.
     HSV color approach is used when the BGR approach fails; If the HSV succedes on cube status detection it become the winner.
-    If the cube solver returns an error it means both the approaches have failed on detecting a coherent cube status."""
-    
-    import os                                            # os is imported to ensure the file presence check/make
+    If the cube solver returns an error it means both the approaches have failed on detecting a coherent cube status.
+    The record is only formatted here, and queued to the log writer thread."""
     
     device = log_data_info[0]
     timestamp = log_data_info[1]
@@ -3674,66 +4092,34 @@ def log_data(log_data_info):
     deco_time = log_data_info[11]
     tot_time_secs = log_data_info[12]
     
-    folder = pathlib.Path().resolve()                    # active folder (should be home/pi/cube)  
-    folder = os.path.join(folder,'CubesDataLog')         # folder to store the relevant cube data
-    if not os.path.exists(folder):                       # if case the folder does not exist
-        os.makedirs(folder)                              # folder is made if it doesn't exist
-    
-    fname = folder+'/Cubotone_solver_log_Rpi.txt'        # folder+filename for the cube data
-    if not os.path.exists(fname):                        # if case the file does not exist, file with headers is generated
-        if debug:
-            print(f'\ngenerated Cubotone_solver_log_Rpi.txt file with headers')
-    
-        a = 'Date'
-        b = 'Screen'
-        c = 'CV_wow'
-        d = 'Debug'
-        e = 'Led_usage'
-        f = 'ColorAnalysisWinner'
-        g = 'TotalTime(s)'
-        h = 'CamWarmUpTime(s)'
-        i = 'FaceletsDetectionTime(s)'
-        k = 'CubeSolutionTime(s)'
-        l = 'CollageImageTime (s)'
-        m = 'RobotSolvingTime(s)'
-        n = 'CubeStatus(BGR or HSV or BGR,HSV)'
-        o = 'CubeStatus'
-        p = 'CubeSolution'
-        
-        # tab separated string of the the headers
-        s = a+'\t'+b+'\t'+c+'\t'+d+'\t'+e+'\t'+f+'\t'+g+'\t'+h+'\t'+i+'\t'+k+'\t'+l+'\t'+m+'\t'+n+'\t'+o+'\t'+p+'\n'
-        
-        os.umask(0) # The default umask is 0o22 which turns off write permission of group and others
-        # 'a'means: file will be generated if it does not exist, and data will be appended at the end
-        with open(os.open(fname, os.O_CREAT | os.O_WRONLY, 0o777), 'a') as f:    # text file is temporary opened
-            f.write(s)                                   # data is appended
-
-    
-    # info to log
-    a=str(timestamp)                                     # date and time
-    b='screen'if screen else 'no screen'                 # screen presence or absence (it influences the cube detection time)
-    c='cv_wow'if cv_wow else 'no cv_wow'                 # cv_wow variable status (it influences the cube detection time)
-    d='debug'if debug else 'no debug'                    # debug variable status (it influences the cube detection time)
-    e='Led used'if led_usage else 'no led'               # led_usage variable status (it influences the cube detection time)
-    f=str(detect_winner)                                 # wich method delivered the coherent cube status
-    g=str(tot_time_secs)                                 # total time from camera warm-up to solved cube
-    h=str(round(camera_ready_time-start_time,1))         # time to get the camera gains stable and exposure time defined/set
-    i=str(round(cube_detect_time-camera_ready_time,1))   # time to read the 6 cube faces
-    k=str(round(cube_solution_time-cube_detect_time,1))  # time to get the cube solution from the solver
-    l=str(round(deco_time-cube_solution_time,1))         # time to make (and present when screen) the cube collage image
-    m=str(elapsed_robot_time)                            # time to apply the solving movements
-    n=str(facelets_data)                                 # according to which methos delivered the solution (BGR, HSV, both)
-    o=str(cube_status_string)                            # string with the detected cbe status
-    p=str(solution)                                      # solution returned by Kociemba solver
-    
-    # tab tab separated string with all the info to log
-    s = a+'\t'+b+'\t'+c+'\t'+d+'\t'+e+'\t'+f+'\t'+g+'\t'+h+'\t'+i+'\t'+k+'\t'+l+'\t'+m+'\t'+n+'\t'+o+'\t'+p+'\n'
-    
-    os.umask(0) # The default umask is 0o22 which turns off write permission of group and others
-    
-    # 'a'means: file will be generated if it does not exist, and data will be appended at the end
-    with open(os.open(fname, os.O_CREAT | os.O_WRONLY, 0o777), 'a') as f:    # text file is temporary opened
-        f.write(s)                                       # data is appended
+    # tab separated string with all the info to log, formatted in one go
+    s = log_record_format.format(
+        timestamp,                                       # date and time
+        'screen'if screen else 'no screen',              # screen presence or absence (it influences the cube detection time)
+        'cv_wow'if cv_wow else 'no cv_wow',              # cv_wow variable status (it influences the cube detection time)
+        'debug'if debug else 'no debug',                 # debug variable status (it influences the cube detection time)
+        'Led used'if led_usage else 'no led',            # led_usage variable status (it influences the cube detection time)
+        detect_winner,                                   # wich method delivered the coherent cube status
+        tot_time_secs,                                   # total time from camera warm-up to solved cube
+        camera_ready_time-start_time,                    # time to get the camera gains stable and exposure time defined/set
+        cube_detect_time-camera_ready_time,              # time to read the 6 cube faces
+        cube_solution_time-cube_detect_time,             # time to get the cube solution from the solver
+        deco_time-cube_solution_time,                    # time to make (and present when screen) the cube collage image
+        elapsed_robot_time,                              # time to apply the solving movements
+        facelets_data,                                   # according to which methos delivered the solution (BGR, HSV, both)
+        cube_status_string,                              # string with the detected cbe status
+        solution)                                        # solution returned by Kociemba solver
+    
+    while True:
+        try:
+            log_data_queue.put_nowait(s)                 # record is queued to the log writer thread, without blocking
+            break
+        except queue.Full:                               # case the writer is stuck (i.e. SD card), the oldest record is dropped
+            try:
+                log_data_queue.get_nowait()              # oldest queued record is removed
+                log_data_queue.task_done()               # the dropped record is marked as done
+            except queue.Empty:
+                pass
   
 
 
@@ -3742,15 +4128,26 @@ def log_data(log_data_info):
 
 
 
+button_pressed = threading.Event()   # event set by the GPIO interrupt when the NEW CYCLE button is pressed
+
+def button_press_callback(channel):
+    """Function called as an interrupt when the "start/stop button" is pressed, to wake up the waiting for a new cycle."""
+    button_pressed.set()
+
+
+
+
+
+
+
 def robot_set_GPIO():
     """Raspberry Pi requires some settings at the GPIO (General Purpose imput Output)
     This function sets the GPIO way of working
     This function also sets an interrupt for the start/stop button."""
     
-    global GPIO, new_cycle_button
+    global new_cycle_button
     
     if device=='Rpi':                                            # case the script is running at the robot
-        import RPi.GPIO as GPIO                                  # GPIO module
         GPIO.setwarnings(False)                                  # GPIO warning set to False to reduce effort on handling them
         GPIO.setmode(GPIO.BCM)                                   # GPIO modulesetting
         GPIO.setup(13, GPIO.IN, pull_up_down=GPIO.PUD_UP)        # start/stop button setting
@@ -3762,7 +4159,8 @@ def robot_set_GPIO():
         
 
         try:
-            GPIO.add_event_detect(13, GPIO.FALLING, callback=stop_cycle, bouncetime=100)  # interrupt usage of the same input pin, to interrupt the cy
+            GPIO.add_event_detect(13, GPIO.FALLING, callback=button_press_callback, bouncetime=500)  # interrupt to wake up the new cycle waiting
+            GPIO.add_event_callback(13, stop_cycle)              # interrupt usage of the same input pin, to interrupt the cy
         except:
             pass
 
@@ -3800,34 +4198,48 @@ def robot_set_servo(first_cycle, motors_hw):
 
 
 
+windows_opened = set()   # names of the windows ('cube' or 'Cube') seen visible by check_window_close_req
+
 def check_window_close_req(cv_wow, key):
     """Function that verifies is the ESC button is pressed when a CV2 window is opened.
     It also checks if the window closing 'X' of 'cube'or 'Cube' windows are pressed.
+    The window is considered closed by the 'X' only once it has been seen visible (windows_opened).
     The function returns True u=in case of window closig request."""
     
-    close_win = False            # close_win variable is set false
-    if cv_wow:                   # case cv_wow variable is set true on __main__
-        try:                     # method to close CV2 windows, via the mouse click on the windows bar X
-            if cv2.getWindowProperty("Cube", cv2.WND_PROP_VISIBLE) <1:  # X on top bar 
-                quit_func()      # quit function is called
-                close_win = True # close_win variable is set true
-                return close_win # close_win variable is returned
-        except:                  # except case     
-            pass                 # exception not really necessary, apart for having the try option
+    name = 'Cube' if cv_wow else 'cube'            # window to check, as per cv_wow variable set on __main__
+    try:                                           # method to close CV2 windows, via the mouse click on the windows bar X
+        visible = cv2.getWindowProperty(name, cv2.WND_PROP_VISIBLE) >= 1   # window visibility
+    except:                                        # case the window does not exist (some OpenCV versions raise)
+        visible = False
     
-    if not cv_wow:               # case cv_wow variable is set false on __main__
-        try:                     # method to close CV2 windows, via the mouse click on the windows bar X
-            if cv2.getWindowProperty("cube", cv2.WND_PROP_VISIBLE) <1:  # X on top bar 
-                quit_func()      # quit function is called
-                close_win = True # close_win variable is set true
-                return close_win # close_win variable is returned
-        except:                  # except case     
-            pass                 # exception not really necessary, apart for having the try option
+    if visible:                                    # case the window is visible
+        windows_opened.add(name)                   # window is flagged as opened
+    elif name in windows_opened:                   # case the window was opened, and it's not visible anymore (X on top bar)
+        windows_opened.discard(name)
+        quit_func()                                # quit function is called
+        return True                                # close_win is returned true
     
-    if key == 27 & 0xFF:         # ESC button method to close CV2 windows
-        quit_func()              # quit function is called
-        close_win = True         # close_win variable is set true
-        return close_win         # close_win variable is returned
+    if (key & 0xFF) == 27:                         # ESC button method to close CV2 windows
+        quit_func()                                # quit function is called
+        return True                                # close_win is returned true
+    
+    return False                                   # close_win is returned false
+
+
+
+
+
+
+
+def time_synchronized():
+    """ Returns True when the system clock is synchronized.
+        The flag file of systemd-timesyncd is checked first (a single stat call); when missing, a single
+        timedatectl process is inquired (i.e. when the synchronization is managed by another NTP service)."""
+    
+    if os.path.exists('/run/systemd/timesync/synchronized'):   # flag file made by systemd-timesyncd once synchronized
+        return True
+    res = subprocess.run(['timedatectl', 'show', '-p', 'NTPSynchronized', '--value'], stdout=subprocess.PIPE, universal_newlines=True)
+    return res.stdout.strip() == 'yes'                          # timedatectl returns yes when synchronized
 
 
 
@@ -3847,18 +4259,16 @@ def time_system_synchr():
         return                                              # this fuction is not executed
     
     elif device=='Rpi':                                     # case the script is running at the robot
-        import socket
-        
         try:
-            res = socket.getaddrinfo('google.com',80)       # trivial check if internet is available
+            s = socket.create_connection(('1.1.1.1', 53), timeout=1.0)  # check if internet is reachable (max 1 second)
+            s.close()                                       # connection is closed, as only used for the check
             print('Internet is connected')                  # feedback is printed to the terminal
             internet = True                                 # internet variable is set true
-        except:                                             # exception is used as no internet availability
+        except OSError:                                     # exception is used as no internet availability
             print('No internet connection')                 # feedback is printed to the terminal
             internet = False                                # internet variable is set false
         
         if internet:                                        # case internet is available
-            from subprocess import Popen, PIPE              # classes importing        
             once = True                                     # variable once is set true, to print a feedback only once
             i = 0                                           # iterator
             while True:                                     # infinite loop              
@@ -3866,13 +4276,7 @@ def time_system_synchr():
                     if i == 20:                             # case the iteration has been done 20 times (10 seconds)
                         break                               # while loop is interrupted
                     
-                    # inquiry to timedatectl status 
-                    ps = Popen("timedatectl status | grep 'System clock synchronized'  | grep -Eo '(yes|no)'", shell=True, stdout=PIPE)
-                    output = ps.stdout.read()                        # process output
-                    ps.stdout.close()                                # closing the pipe
-                    ps.wait()                                        # waits until the ps child completes
-                    
-                    if b'yes' in output:                             # case the timedatectl status returns true
+                    if time_synchronized():                          # case the time system is synchronized
                         date_time = dt.datetime.now().strftime('%d/%m/%Y %H:%M:%S')   # updated date and time assigned to date_time variable
                         print('Time system is synchronized: ', str(date_time))        # feedback is printed to the terminal
                         time.sleep(1.5)
@@ -3904,15 +4308,13 @@ def keep_the_show(debug):
         print('close switch at GPIO12 to keep cv_wow windows on screen') # feedback is printed to the terminal
     delay = 0.2                             # time assigned to the delay variable
     time.sleep(delay)                       # little delay to prevent switch contact bouncing from creating bad reading
-    initial_time = time.time()              # time in which this function has been called
-    time_ref = time.time()                  # time reference to monitor how long this function lasts
+    initial_time = time.monotonic()         # time in which this function has been called
     while not GPIO.input(12):               # case the GPIO12 is at level 0 (switch is closed)
-        time.sleep(delay)                   # little delay to prevent useless iterations quantity
-        if time.time() - time_ref >= 1:     # case 1 second is elapsed
-            time_ref = time.time()          # time reference is updated
+        # waits (interrupt driven) for the switch opening, max 1 second; the level is re-checked at the next iteration (bouncing)
+        if GPIO.wait_for_edge(12, GPIO.RISING, timeout=1000) is None:   # case 1 second is elapsed without the switch opening
             detection_timeout += 1          # the detection_timeout variable is increased by the time spent on this while loop
     
-    return time.time()-initial_time         # returns the time spent in this function
+    return time.monotonic()-initial_time    # returns the time spent in this function
 
 
 
@@ -3921,23 +4323,26 @@ def keep_the_show(debug):
 def test_picamera():
     """funtion to allow a quick fedback of PiCamera working fine, when the robot is not fully assembled yet."""
     
-    frame, w, h, scale = read_camera()           # video stream and frame dimensions
+    frame, w, h, scale = read_camera()           # video stream and frame dimensions (PiCamera settings don't change)
     font, fontScale, fontColor, lineType = text_font()  # font characteristics
-    font_size = fontScale*scale/100              # font size is adjusted according to the frame resizing factor            
+    font_size = fontScale*scale/100*1.2          # font size is adjusted according to the frame resizing factor            
+    text_pos = (10, int(h-12))                   # position of the countdown text, at the frame bottom
 
-    start = time.time()                          # current time is assigned to variable start
     show_time = 20
-    while time.time()-start < show_time:         # iteration until the elapsed time is smaller than show_time
-        countdown = int(show_time-(time.time()-start))  # remaining time 
-        frame, w, h, scale = read_camera()       # video stream and frame dimensions
+    deadline = time.monotonic() + show_time      # time at which the test ends
+    now = time.monotonic()                       # current time, sampled once per iteration
+    while now < deadline:                        # iteration until the deadline is reached
+        countdown = int(deadline - now)          # remaining time 
+        frame = read_camera()[0]                 # video stream (frame dimensions are the initial ones)
         text_bg(frame, w, h)                     # black background added to the frame
-        cv2.putText(frame, str('PiCamera TEST'), (10, 30), font, font_size*1.2, fontColor, lineType)
+        cv2.putText(frame, 'PiCamera TEST', (10, 30), font, font_size, fontColor, lineType)
         text = f'Closing in {countdown} seconds,   ESC to quit earlier'
-        cv2.putText(frame, text, (10, int(h-12)), font, font_size*1.2, fontColor, lineType)
+        cv2.putText(frame, text, text_pos, font, font_size, fontColor, lineType)
         cv2.imshow('PiCamera test', frame)       # shows the frame 
         key = cv2.waitKey(1)                     # refresh time is minimized (1ms), yet real time is much higher
-        if key == 27 & 0xFF:                     # ESC button method to close CV2 windows
+        if (key & 0xFF) == 27:                   # ESC button method to close CV2 windows
             break                                # while loop is interrupted
+        now = time.monotonic()                   # current time
     
     quit_func()                                  # quitting funtion is used to close all the threads and the script
 
@@ -3996,21 +4401,21 @@ def start_up():
         
     elif device == 'Rpi':                                # case the script is running at the robot
         if first_cycle:                                  # case this is the first robot cycle
-            global rm, tm1637, PiCamera, PiRGBArray, rawCapture, camera_set_gains, servo, GPIO, new_cycle_button, mp
-            global robot_reading_status_display, robot_done_status_display, robot_running, robot_stop
-            global Timer, InfiniteTimer, robot_calib_status_display, robot_load_status, robot_time_display, robot_show_press
-            global timeout, detection_timeout, path, pathlib
+            global tm1637, PiCamera, PiRGBArray, rawCapture, camera_set_gains, servo, GPIO, new_cycle_button, mp
+            global robot_running, robot_stop
+            global InfiniteTimer, display_timer, display_feedback, display1_state
+            global timeout, detection_timeout, path, display_init_thread
             
             from picamera.array import PiRGBArray        # Raspberry pi specific package for the camera, using numpy array
             from picamera import PiCamera                # Raspberry pi specific package for the camera
             import Cubotone_set_picamera_gain as camera_set_gains  # script that allows to fix some parameters at picamera        
             import Cubotone_tm1637 as tm1637             # tm1637 modified library, for 4 x 7 segments display
-            import Cubotone_moves as rm                  # RobotMoves: convert Kociemba solver solution in robot movements sequence
-            from threading import Timer                  # Timer function from threading is used to manage displays
             import multiprocessing as mp                 # multiprocessing is used to display the cube status while solving it
-            import os.path, pathlib                      # libraries for folder path management
             
-            robot_set_displays(debug, printout=True)     # initializes the two displays
+            display_init_thread = threading.Thread(target=robot_set_displays, args=(debug, True), daemon=True)  # displays init thread
+            display_init_thread.start()                  # the two displays are initialized while the camera gets ready
+            threading.Thread(target=log_data_writer, daemon=True).start()   # log writer thread, for the solver log file
+            atexit.register(flush_log, close=True)       # queued and buffered data is written, and file closed, at the script exit
             if not debug:                                # case the debug is set False
                 clear_terminal(device)                   # cleares the terminal
             time_system_synchr()  # checks the time system status (if internet connected, it waits till synchronization)
@@ -4019,23 +4424,23 @@ def start_up():
                 quit_func()                              # quitting function is called
             camera, rawCapture, width, height = webcam() # camera relevant info are returned after cropping, resizing, etc
             mp.set_start_method('spawn')                 # multiprocess method used 
+            os.makedirs(collage_folder, exist_ok=True)   # folder for the collage pictures is made once, if it doesn't exist
+            os.makedirs(log_folder, exist_ok=True)       # folder for the solver log file is made once, if it doesn't exist
             cpu_temp()                                   # cpu temp is checked at start-up
             robot_running = False                        # flag of the robot working or waiting for a new cycle start
             robot_stop = False                           # flag to stop the robot movements
             timeout = False                              # timeout flag is initialli set on False
+            ensure_displays()                            # the displays initialization is completed before using the displays
             if not picamera_test:
-                robot_load_status = InfiniteTimer(0.5, robot_loading_feedback)  # set timer thread to display a loading feedback on robot_display1
-                robot_load_status.start()                # activates display's segments as feedbacks the program has started
-                time.sleep(0.05)                         # little delay for the next timer start
-                robot_time_display = InfiniteTimer(0.5, robot_time_elapsed)     # set the timer thread for visualizing the elapsed time on robot_display1
-                time.sleep(0.05)                         # little delay for the next timer start
-                robot_show_press = InfiniteTimer(0.5, robot_press_feedback)     # set the timer thread for visualizing press when the button is enabled
-                time.sleep(0.05)                         # little delay for the next timer start
-                robot_calib_status_display = InfiniteTimer(0.5, robot_show_camera_cal) # activates visualization of robot camera calibration robot_display2
-                time.sleep(0.05)                         # little delay for the next timer start
-                robot_reading_status_display = InfiniteTimer(0.5, robot_show_read_status) # activates visualization of robot reading status on robot_display2
-                time.sleep(0.05)                         # little delay for the next timer start
-                robot_done_status_display = InfiniteTimer(0.5, robot_show_cube_done)   # activates visualization cube done on robot_display2
+                display_feedback = {'loading': robot_loading_feedback,  # loading feedback on robot_display1
+                                    'time': robot_time_elapsed,         # elapsed time on robot_display1
+                                    'press': robot_press_feedback,      # press suggestion when the button is enabled, on robot_display2
+                                    'cal': robot_show_camera_cal,       # robot camera calibration on robot_display2
+                                    'read': robot_show_read_status,     # robot reading status on robot_display2
+                                    'done': robot_show_cube_done}       # cube done on robot_display2
+                display1_state = 'loading'               # activates display's segments as feedbacks the program has started
+                display_timer = InfiniteTimer(0.5, display_tick)   # single timer thread, updating both the displays as per their state
+                display_timer.start()                    # display timer is started
             edge = 12                                    # edge dimension of each facelet used on cube sketches
             offset=int(14.2*edge)                        # left part of the frame not usable for cube facelet detection, as used to depict the cube sketches
             font, fontScale, fontColor, lineType = text_font()   # setting text font paramenters
@@ -4071,12 +4476,15 @@ def cubeAF():
         Cube solver call
         Cube solving at robot."""
     
-    global font, fontScale, fontColor, lineType, cap, width, height, h, w, device, sides, side, robot_load_status
+    global font, fontScale, fontColor, lineType, cap, width, height, h, w, device, sides, side, display1_state, display2_state
     global BGR_mean, H_mean, URFDLB_facelets_BGR_mean, offset, gap_w, gap_h, frame, cube
     global facelets, faces, start_time, servo, camera, robot_stop, fixWindPos, screen, detection_timeout, timeout
     
+    is_rpi = device == 'Rpi'                        # device check done once, as used in the per-frame and per-contour loops
+    is_laptop = device == 'laptop'                  # device check done once, as used in the per-frame and per-contour loops
+    imshow, waitKey, pollKey = cv2.imshow, cv2.waitKey, poll_key   # local references, for the calls made at each contour
     
-    if device == 'Rpi':                             # case the script is running at the robot
+    if is_rpi:                                      # case the script is running at the robot
         aligned = servo.align_motor(debug, 'read')  # servos are set to start position, prior to activate the camera   
         if not aligned:                             # case the align_motor function returns an error
             print("\nCannot align the motor (cube_holder), script is terminated")   # feedback is printed to the terminal
@@ -4089,41 +4497,64 @@ def cubeAF():
     if side == 0:                                   # case the cube side is zero (staring a new cycle)
         faces.clear()                               # empties the dict of images (6 sides) recorded during previous solving cycle 
         facelets = []                               # empties the list of contours having cube's square characteristics
-        if device=='Rpi':                           # case the script is running at the robot
-            start_time = time.time()                # initial time is stored as timer for alternating words at displays
-            robot_load_status.cancel()              # reset the "loading" status feedback at robot_display1
+        if is_rpi:                                  # case the script is running at the robot
+            start_time = time.monotonic()           # initial time is stored as timer for alternating words at displays
+            display1_state = None                   # reset the "loading" status feedback at robot_display1
             robot_clear_displays()                  # displays at robot are cleared
-            robot_time_display.start()              # activates visualization of elapsed time on robot_display1
-            robot_calib_status_display.start()      # activates visualization of PiCamera calibration status on robot_display2
+            display1_state = 'time'                 # activates visualization of elapsed time on robot_display1
+            display2_state = 'cal'                  # activates visualization of PiCamera calibration status on robot_display2
             PiCamera_param = robot_camera_warmup()  # calls the warmup function for PiCamera
             if not robot_stop:                      # case there are no requests to stop the robot
                 robot_consistent_camera_images(PiCamera_param)  # sets PiCamera to capture consistent images
             if screen:                              # case a screen is connected
                 try: cv2.destroyWindow("cube")      # windows "cube" is closed
                 except: pass                        # in case an exception is raise, nothing is done
-            camera_ready_time=time.time()           # time stored after picamera warmup and settings for consistent pictures
-            robot_calib_status_display.cancel()     # reset the "calibration" status feedback at robot_display1
+                windows_placed.discard("cube")      # cube window has to be placed again, when used
+            camera_ready_time=time.monotonic()      # time stored after picamera warmup and settings for consistent pictures
+            display2_state = None                   # reset the "calibration" status feedback at robot_display2
             robot_clear_displays()                  # displays at robot are cleared
-            robot_reading_status_display.start()    # activates visualization of robot reading status on robot_display2
+            display2_state = 'read'                 # activates visualization of robot reading status on robot_display2
             show_time = 7                           # min showing time of the unfolded cube images (its initial status)
             proceed = True                          # proceed variable is set True (variable to jump into facelet reading mode)
             
-        elif device == 'laptop':                    # case the script is running on a PC/laptop (not the robot)
+        elif is_laptop:                             # case the script is running on a PC/laptop (not the robot)
             show_time = 12                          # showing time of the unfolded cube images (its initial status)
             proceed = False                         # proceed variable is set False (variable to jump into facelet reading mode)
         
         timestamp = dt.datetime.now().strftime('%Y%m%d_%H%M%S')   # date_time variable is assigned, for file name and log purpose
 
+    frame_copy = None                               # buffer for the frame copy, allocated at the first frame and then reused
 
     while not quitting:                             # substantially the main loop, it can be interrupted by quit_func() 
         
         frame, w, h, scale = read_camera()          # video stream and frame dimensions
-        frame_copy = frame.copy()                   # frame image is duplicated, to be able to show it before and after image processing
+        now = time.monotonic()                      # current time, sampled once per frame and used for all the time checks
+        key = -1                                    # no key pressed, reset at each frame
+        if cv_wow and screen:                       # case the frame copy is shown (cv_wow and screen)
+            if frame_copy is None or frame_copy.shape != frame.shape:   # case the buffer isn't allocated yet (or frame size changed)
+                frame_copy = np.empty_like(frame)   # buffer allocated once, with the frame size
+            np.copyto(frame_copy, frame)            # frame image is duplicated, to be able to show it before and after image processing
         text_bg(frame, w, h)                        # generates a rectangle as backgroung for text in Frame
         
         if side == 0:
             side = window_for_cube_rotation(w, h, side, frame) # keeps video stream while suggesting which cube's face to show
-            det_face_time = time.time()             # used at PC to enable a delay before cube face reading
+            det_face_time = time.monotonic()        # used at PC to enable a delay before cube face reading
+        
+        if is_laptop and not proceed and not cv_wow and now < det_face_time + delay_facelets_dec:
+            # case the user is still preparing the cube side (laptop): no contours analysis, only the guidance is shown
+            facelets_text_laptop(frame, fontScale*scale/100, det_face_time)   # informative text is added on frame, as guidance
+            cube_centers_color_ref(frame)           # returns the colored centers cube (1 facelet) within the cube's frame
+            plot_colors(URFDLB_facelets_BGR_mean, edge, frame, background_h, font, fontScale, lineType) # plot a cube decoration with detected colors
+            if screen:                              # case a screen is connected
+                if fixWindPos:                      # case the fixWindPos variable is set true on __main__ 
+                    init_windows({"cube": (0, 0)})  # cube window is created and moved to (0,0), only once
+                cv2.imshow("cube", frame)           # shows the frame 
+                key=cv2.waitKey(15)                 # longer refresh time, as no analysis is done in the meantime
+                if (key & 0xFF) == 32:              # case spacebar is pressed
+                    proceed = True                  # proceed is set true (from preparing the cube to read facelets)
+            if check_window_close_req(cv_wow, key): # case of request to close the window
+                break                               # the while loop is interrupted
+            continue                                # next frame
         
         (contours, hierarchy)=read_facelets(frame, scale, det_face_time, proceed) # reads cube's facelets and returns the contours
         candidates = []                                   # empties the list of potential contours
@@ -4132,15 +4563,15 @@ def cubeAF():
             hierarchy = hierarchy[0]                      # only top level contours (no childs)
             facelets = []                                 # empties the list of contours having cube's square characteristics
             
-            if device=='Rpi':                             # case the script is running at the robot
+            if is_rpi:                                    # case the script is running at the robot
                 if timeout==True or robot_stop == True:   # in case of reached timeout or stop_button pressed
                     break                                 # script is closed
             
-            for component in zip(contours, hierarchy):    # each contour is analyzed   
-                contour, hierarchy, corners = get_approx_contours(component)   # contours are approximated
+            for c in range(len(contours)):                # each contour is analyzed   
+                contour, contour_hierarchy, corners = get_approx_contours(contours[c], hierarchy[c])   # contours are approximated
                 
-                if device=='Rpi':                         # case the script is running at the robot
-                    if  time.time()-camera_ready_time > detection_timeout:  # timeout is calculated for the robot during cube status reading
+                if is_rpi:                                # case the script is running at the robot
+                    if  now-camera_ready_time > detection_timeout:  # timeout is calculated for the robot during cube status reading
                         timeout=robot_timeout_func()      # in case the timeout is reached
                         break                             # script is closed
                     if robot_stop==True:                  # in case stop_button pressed
@@ -4148,48 +4579,49 @@ def cubeAF():
                 
                 if screen:                                # case a screen is connected
                     if cv_wow:                            # case cv_wow variable is set true on __main__
-                        cv2.namedWindow("camera")         # create the camera window
-                        cv2.moveWindow("camera", 0, gap_h)# move the camera window to (0, gap_h)
-                        cv2.imshow("camera", frame_copy)  # shows the frame copy, meaning the frame without contours and other additions 
+                        init_windows({"camera": (0, gap_h)})  # camera window is created and moved to (0, gap_h), only once
+                        imshow("camera", frame_copy)      # shows the frame copy, meaning the frame without contours and other additions 
                     elif not cv_wow:                      # case cv_wow variable is set false on __main__
                         if fixWindPos:                    # case the fixWindPos variable is set true on __main__ 
-                            cv2.namedWindow("cube")       # create the cube window
-                            cv2.moveWindow("cube", 0,0)   # move the cube window to (0,0)
-                        cv2.imshow("cube", frame)         # shows the frame 
-                    key=cv2.waitKey(1)                    # refresh time is minimized to 1ms, meaning the refresh time mostly depends from all other functions
+                            init_windows({"cube": (0, 0)})  # cube window is created and moved to (0,0), only once
+                        imshow("cube", frame)             # shows the frame 
+                    pressed = pollKey()                   # windows events are handled without waiting, as done for each contour
+                    if pressed != -1:                     # case a key has been pressed
+                        key = pressed                     # the key is kept for the rest of the frame
                     
-                if device == 'laptop':
-                    if time.time() < det_face_time + delay_facelets_dec: # case the delay time is not elapsed yet
-                        if key == 32:                     # case spacebar is pressed
+                if is_laptop:
+                    if now < det_face_time + delay_facelets_dec:  # case the delay time is not elapsed yet
+                        if (key & 0xFF) == 32:            # case spacebar is pressed
                             proceed = True                # proceed is set true (from preparing the cube to read facelets)
                         if not proceed:                   # cese proceed variable is False
                             break                         # for loop is interrupted 
                     
                 if corners==4:                            # contours with 4 corners are of interest
-                    facelets = get_facelets(facelets, contour, hierarchy)  # returns a dict with cube compatible contours
+                    facelets = get_facelets(facelets, contour, contour_hierarchy)  # returns a dict with cube compatible contours
 
                 if len(facelets)==9:                                   # 9 contours have cube compatible characteristics
-                    facelets = order_9points(facelets, new_center=[])  # contours are ordered from top left
-                    d_to_exclude = distance_deviation(facelets)        # facelets to remove due inter-distance not as regular 3x3 array
+                    facelet_arr = facelets_array(facelets)             # facelets centers and contours as structured array, made once per frame
+                    facelets, facelet_arr = order_9points(facelets, facelet_arr)  # contours are ordered from top left
+                    d_to_exclude = distance_deviation(facelet_arr)     # facelets to remove due inter-distance not as regular 3x3 array
                     
                     if len(d_to_exclude)>=1:                           # check if any contour is too far to be part of the cube
                         d_to_exclude.sort(reverse=True)                # reverse the contours order
                         for i in d_to_exclude:                         # remove the contours too faar far to be part of the cube
                             facelets.pop(i)                            # facelet is removed
+                        facelet_arr = np.delete(facelet_arr, d_to_exclude)  # same facelets removed from the structured array
 
                 if len(facelets)==9:                                   # 9 contours have cube compatible characteristics    
-                    if device == 'Rpi':                                # case the script is running at the robot
-                        robot_facelets_rotation(facelets)              # order facelets as per viewer POW (due to cube/camera rotations on robot)
-                    elif device == 'laptop':                           # case the script is running on a PC/laptop (not the robot)
+                    if is_rpi:                                         # case the script is running at the robot
+                        facelet_arr = robot_facelets_rotation(facelets, facelet_arr)  # order facelets as per viewer POW (due to cube/camera rotations on robot)
+                    elif is_laptop:                                    # case the script is running on a PC/laptop (not the robot)
                         proceed = False                                # proceed is set false, to force a delay on facelets detection at cube face changing
                     read_color(facelets, candidates, BGR_mean, H_mean, scale) # each facelet is read for color, decoration for the viewer is made
                     URFDLB_facelets_BGR_mean = URFDLB_facelets_order(BGR_mean) # facelets are ordered as per URFDLB order
                     plot_colors(URFDLB_facelets_BGR_mean, edge, frame, background_h, font, fontScale, lineType) # plot a cube decoration with detected colors                
-                    faces = face_image(frame, facelets, side, faces)   # image of the cube side is taken for later reference
+                    faces = face_image(frame, facelet_arr, side, faces)   # image of the cube side is taken for later reference
                     if screen:                                         # case a screen is connected
                         if cv_wow:                                     # case cv_wow variable is set true on __main__
-                            cv2.namedWindow('Cube')                    # create the Cube window
-                            cv2.moveWindow('Cube', 0, h+2*gap_h)       # move the Cube window to coordinates
+                            init_windows({'Cube': (0, h+2*gap_h)})     # Cube window is created and moved to coordinates, only once
                             cv2.imshow('Cube', frame)                  # shows the frame 
                             if not GPIO.input(12):                     # case the GPIO12 is at level 0 (switch is closed)
                                 showed_time = keep_the_show(debug)     # function keeping the cv_wow windows on screen if GPIO12 in at 1 (Fair show)
@@ -4198,31 +4630,35 @@ def cubeAF():
                                 
                         elif not cv_wow:                               # case cv_wow variable is set false on __main__
                             if fixWindPos:                             # case the fixWindPos variable is set true on __main__ 
-                                cv2.namedWindow('cube')                # create the cube window
-                                cv2.moveWindow('cube', 0,0)            # move the window to (0,0)
+                                init_windows({'cube': (0, 0)})         # cube window is created and moved to (0,0), only once
                             cv2.imshow('cube', frame)                  # shows the frame 
                         cv2.waitKey(1)                                 # refresh time is minimized (1ms), yet real time is much higher
                     
+                    if is_rpi and side == 6:                           # case the last cube's face is acquired at the robot
+                        solver_future = solver_executor.submit(solve_cube_status, URFDLB_facelets_BGR_mean)  # solved while the cover opens
+                    
                     robot_next_side(side)                              # cube is rotated/flipped to the next face
 
                     if side < 6:                               # actions when a face has been completely detected, and there still are other to come
                         side = window_for_cube_rotation(w, h, side, frame) # image stream while viewer has time to positione the cube for next face
-                        det_face_time = time.time()            # current time is assigned to det_face_time for timing analysis
+                        det_face_time = time.monotonic()       # current time is assigned to det_face_time for timing analysis
                         break                                  # with this break the process re-start from contour detection at the next cube face
 
 
 
                     if side == 6:   # last cube's face is acquired   
-                        cube_detect_time = time.time()         # time stored after detecting all the cube facelets
-                        
                         if screen:                             # case a screen is connected
-                            try: cv2.destroyAllWindows()       # all cv2 windows are removed
-                            except: pass                       # no actions in case of errors
-                        cube_status, HSV_detected, cube_color_sequence, HSV_analysis = cube_colors_interpreted(URFDLB_facelets_BGR_mean)  # cube string status with colors detected 
-                        cube_status_string = cube_string(cube_status)    # cube string for the solver
-                        solution, solution_Text = cube_solution(cube_status_string)   # Kociemba solver is called to have the solution string
+                            cv2.destroyAllWindows()            # all cv2 windows are removed
+                            windows_placed.clear()             # no cv2 windows are left
+                        
+                        if is_rpi:                             # case the script is running at the robot
+                            solver_result = solver_future.result()   # solution, computed while the top cover was opening
+                        else:                                  # case the script is running on a PC/laptop (not the robot)
+                            solver_result = solve_cube_status(URFDLB_facelets_BGR_mean)   # colors interpretation and solution
+                        cube_status, HSV_detected, cube_color_sequence, HSV_analysis, cube_status_string, solution, solution_Text, solve_secs = solver_result
                         detect_winner='BGR'                    # variable used to log which method gave the solution
-                        cube_solution_time=time.time()         # time stored after getting the cube solution
+                        cube_solution_time=time.monotonic()    # time stored after getting the cube solution
+                        cube_detect_time = cube_solution_time - solve_secs   # detection time, backdated by the time spent solving
                         print(f'\nCube status (via BGR color distance): {cube_status_string}\n')
                    
          
@@ -4233,7 +4669,7 @@ def cubeAF():
                             cube_status_string = cube_string(cube_status)  # cube string for the solver
                             solution, solution_Text = cube_solution(cube_status_string)   # Kociemba solver is called to have the solution string
                             detect_winner='HSV'                            # variable used to log which method give the solution
-                            cube_solution_time=time.time()                 # time stored after getting the cube solution
+                            cube_solution_time=time.monotonic()            # time stored after getting the cube solution
                             if solution_Text == 'Error':                   # in case color color detection fail also with HSV approach
                                 detect_winner='Error'                      # the winner approach goes to error, for log purpose
                                 print(f'Solver return: {solution}\n')
@@ -4245,7 +4681,7 @@ def cubeAF():
                         elif solution_Text != '0 moves  ':                 # case of interest, the cube isn't already solved
                             print(f'\nCube solution: {solution_Text}')     # nice information to print at terminal, sometime useful to copy 
                         
-                        if device == 'laptop': # case the script is running on a PC/laptop (not the robot)
+                        if is_laptop:          # case the script is running on a PC/laptop (not the robot)
                             robot_stop=False   # variable needed for compatibility with the decoration() function used also by the robot
                             
                             # tuple of variables needed for the decoration function
@@ -4260,7 +4696,7 @@ def cubeAF():
                         
                         
                         
-                        elif device == 'Rpi':   # case the script is running at the robot
+                        elif is_rpi:            # case the script is running at the robot
                             # function related to cube solving part via the robot, when the last face has been completely detected
                             print("\ncube_status_string",cube_status_string)
                             if debug:
@@ -4273,15 +4709,15 @@ def cubeAF():
                                                          HSV_detected,start_time, camera_ready_time, cube_detect_time, cube_solution_time)
                             
                             if not screen:               # case there is not  screen connected
-                                decoration(deco_info)    # the cube collage is made after the cube solving phase    
+                                deco_thread = threading.Thread(target=decoration, args=(deco_info,), daemon=True)
+                                deco_thread.start()      # the cube collage is made after the cube solving phase, during the little delay
                             
                             log_data(log_data_info)      # some relevant info are logged into a text file
                             time.sleep(3)                # little delay
-                            if device == 'Rpi' and robot_stop==False:   # case the script is running at the robot and no stopping request
-                                try:                     # try case, as isn't certain the robot has done the cube
-                                    robot_done_status_display.cancel()  # de-activates visualization of cube done on robot_display2
-                                except:                  # except case
-                                    pass                 # exception not really necessary, apart for having the try option
+                            if not screen:               # case there is not  screen connected
+                                deco_thread.join()       # the cube collage is completed before closing the cycle
+                            if is_rpi and robot_stop==False:            # case the script is running at the robot and no stopping request
+                                display2_state = None    # de-activates visualization of cube done on robot_display2
                                 robot_clear_displays()   # clears displays at robot
 
                             return                       # this return closes a successfull cycle
@@ -4289,53 +4725,29 @@ def cubeAF():
                 
                 
                 
-                if device=='laptop':                     # case the script is running on a PC/laptop (not the robot)
+                if is_laptop:                            # case the script is running on a PC/laptop (not the robot)
                     if cv_wow:                           # case cv_wow variable is set true on __main__
-                        cv2.namedWindow('Cube')          # create the Cube window
-                        cv2.moveWindow('Cube', 0, h+2*gap_h)  # move the Cube window to coordinate
-                        cv2.imshow('Cube', frame)        # shows the frame 
-                        cv2.waitKey(1)                   # refresh time is minimized (1ms), yet real time is much higher
+                        init_windows({'Cube': (0, h+2*gap_h)})  # Cube window is created and moved to coordinate, only once
+                        imshow('Cube', frame)            # shows the frame 
+                        waitKey(1)                       # refresh time is minimized (1ms), yet real time is much higher
                     elif not cv_wow:                     # case cv_wow variable is set false on __main__
                         if fixWindPos:                   # case the fixWindPos variable is set true on __main__ 
-                            cv2.namedWindow('cube')      # create the cube window
-                            cv2.moveWindow('cube', 0,0)  # move the window to (0,0)
-                        cv2.imshow('cube', frame)        # shows the frame 
-                        cv2.waitKey(1)                   # refresh time is minimized (1ms), yet real time is much higher
-
-
-
-                    ######################################################################
-                    #### below part relates to the way to interrupt the CV2 windows,  ####
-                    #### at different moment in time of the script execution          ####
-                    ######################################################################
-                    
-                    try:                  # tentative
-                        close_win = check_window_close_req(cv_wow, key)  # function that verifies if requests to close the window
-                        if close_win:     # case the function returns a booleas true
-                            break         # the for loop is interrupted
-                    except:               # case an exception is raised
-                        pass              # nothing is done
-
-
-            if device=='laptop':      # case the script is running on a PC/laptop (not the robot)
-                try:                  # tentative
-                    close_win = check_window_close_req(cv_wow, key)  # function that verifies if requests to close the window
-                    if close_win:     # case the function returns a booleas true
-                        break         # the while loop is interrupted
-                except:               # case an exception is raised
-                    pass              # nothing is done
+                            init_windows({'cube': (0, 0)})  # cube window is created and moved to (0,0), only once
+                        imshow('cube', frame)            # shows the frame 
+                        waitKey(1)                       # refresh time is minimized (1ms), yet real time is much higher
+        
         
+        ######################################################################
+        #### below part relates to the way to interrupt the CV2 windows,  ####
+        #### checked once per frame, with the key pressed along the frame ####
+        ######################################################################
         
-        if device=='laptop':      # case the script is running on a PC/laptop (not the robot)
-            try:                  # tentative
-                close_win = check_window_close_req(cv_wow, key)  # function that verifies if requests to close the window
-                if close_win:     # case the function returns a booleas true
-                    break         # the while loop is interrupted
-            except:               # case an exception is raised
-                pass              # nothing is done
+        if is_laptop:             # case the script is running on a PC/laptop (not the robot)
+            if check_window_close_req(cv_wow, key):   # case of request to close the window
+                break             # the while loop is interrupted
 
 
-        elif device=='Rpi':       # case the script is running at the robot
+        elif is_rpi:              # case the script is running at the robot
             if timeout==True or robot_stop==True:   # timeout or motor_motor check for Rpi
                 return            # the function is terminated
 
@@ -4356,50 +4768,34 @@ if __name__ == "__main__":
     
     ################    general settings on how the PC/robot is operated ############################
     device = hd_check()               # verify if the script is running at Rpi (robot), if not then it is the laptop
+    set_device_functions(device)      # device related functions are bound once to their laptop or robot version
     fixWindPos = True                 # flag to fix the CV2 windows position, starting from coordinate 0,0
     first_cycle = True                # boolean variable to execute some settings only once
 
-    debug = False                     # flag to enable/disable the debug related prints
-    if args.debug != None:            # case 'debug' argument exists
-        if args.debug:                # case the Cubotone.py has been launched with 'debug' argument
-            debug = True              # flag to enable/disable the debug related prints is set True
-    
-    cv_wow = False                    # flag to enable/disable the visualization of the image analysis used to find the facelets
-    if args.cv_wow != None:           # case 'cv_wow' argument exists
-        if args.cv_wow:               # case the Cubotone.py has been launched with 'cv_wow' argument
-            cv_wow = True             # flag to enable/disable the visualization of the image analysis used to find the facelets is set True
-    
-    led_usage = False                 # flag to enable/disable the usage of the led lights at top_cover
-    if args.led != None:              # case 'led' argument exists
-        if args.led:                  # case the Cubotone.py has been launched with 'led' argument
-            led_usage = True          # flag to enable/disable the usage of the led lights at top_cover is set True
+    # boolean flags, set True when the Cubotone.py has been launched with the related argument (store_true arguments)
+    flag_args = {'debug': 'debug',              # flag to enable/disable the debug related prints
+                 'cv_wow': 'cv_wow',            # flag to enable/disable the visualization of the image analysis used to find the facelets
+                 'led_usage': 'led',            # flag to enable/disable the usage of the led lights at top_cover
+                 'cube_scrambling': 'scramble', # flag to enable the cube scrambling before solving it
+                 'picamera_test': 'picamera_test',  # flag to enable/disable the PiCamera test
+                 'motors_off': 'no_motors'}     # flag to disable the servos and motors
+    flags = {flag: bool(getattr(args, arg, False)) for flag, arg in flag_args.items()}
+    debug, cv_wow, led_usage = flags['debug'], flags['cv_wow'], flags['led_usage']
+    cube_scrambling, picamera_test = flags['cube_scrambling'], flags['picamera_test']
+    motors_hw = not flags['motors_off']         # flag to enable/disable the servos and motors
+    if cube_scrambling:               # case the Cubotone.py has been launched with 'scramble' argument
+        cube_scrambled = False        # flag to track once the cube is scrambled is set False
     
     delay_facelets_dec = 3            # delay to prevent the facelets detection in between cube faces change 
-    if args.delay != None:            # case 'delay' argument exists
+    if args.delay is not None:        # case 'delay' argument exists
         delay_facelets_dec = abs(int(args.delay))   # delay to prevent the facelets detection in between cube faces change
         if delay_facelets_dec < 2:    # case the provided time is smaller than 2 seconds
             delay_facelets_dec = 2    # 2 seconds are assigned
         elif delay_facelets_dec > 30: # case the provided time is bigger than 30 seconds
             delay_facelets_dec = 30   # 30 seconds are assigned
-
-    cube_scrambling = False           # flag to enable the cube scrambling before solving it
-    if args.scramble != None:         # case 'scramble' argument exists
-        if args.scramble:             # case the Cubotone.py has been launched with 'scramble' argument
-            cube_scrambling = True    # flag to enable the cube scrambling test is set True
-            cube_scrambled = False    # flag to track once the cube is scrambled is set False
-    
-    picamera_test = False             # flag to enable/disable the PiCamera test
-    if args.picamera_test != None:    # case 'picamera_test' argument exists
-        if args.picamera_test:        # case the Cubotone.py has been launched with 'picamera_test' argument
-            picamera_test = True      # flag to enable/disable the PiCamera test is set True
-
-    motors_hw = True                  # flag to enable/disable the servos and motors
-    if args.no_motors != None:        # case 'picamera_test' argument exists
-        if args.no_motors:            # case the Cubotone.py has been launched with 'picamera_test' argument
-            motors_hw = False         # flag to enable/disable the servos and step motor is set False
     
     cube_size_adj = 0                 # cube_size_adj is initially set to zero (no adjustment)  
-    if args.size != None:             # case 'size' argument exists
+    if args.size is not None:         # case 'size' argument exists
         cube_size_adj = int(args.size)   # cube_size_adj (wrt default set at settings) is assigned
 
 # ###############################################################################################
@@ -4419,7 +4815,7 @@ if __name__ == "__main__":
             print(f'\nCV2 windows forced to top-left screen corner')
         if cv_wow:                    # case the cv image analysis plot is set true
             print(f'\nCv image analysis is plot on screen')   # feedback is printed to the terminal
-        if args.delay != None:        # case the argument delay has been provided
+        if args.delay is not None:    # case the argument delay has been provided
             # feedback is printed to the terminal
             print(f'\nDelay of {delay_facelets_dec} secs on detecting facelets after a cube face change (PC use)')
         print()
@@ -4489,16 +4885,9 @@ if __name__ == "__main__":
         first_cycle = False                                  # boolean variable to execute some settings only once
         if robot_stop==False and not cube_scrambling:        # case stop_button has not being pressed
             print('\n\n\nPress NEW CYCLE to start a cycle')  # print on terminal to suggest to press the robot NEW CYCLE button, as settings are done
-            robot_show_press.start()                         # suggestion on the display to press the NEW CYCLE button, as settings are done
+            display2_state = 'press'                         # suggestion on the display to press the NEW CYCLE button, as settings are done
         
         while True:                                          # infinite loop, waiting for the start button to be pressed
-            new_cycle_button = GPIO.input(13)                # GPIO input is assigned to a new_cycle_button variable
-            if cube_scrambling:                              # case the cube_scrambling is set True
-                crambling_cube()                             # scrambling_cube function is called
-                time.sleep(1)                                # little sleep time
-                robot_show_press.start()                     # suggestion on the display to press the NEW CYCLE button, as settings are done
-            cube_scrambling = False                          # cube_scrambling variable is set False
-                    
             if side == 6:                                    # this case gives the possibility to start a new cycle
                 close_camera(device)                         # this is necessary to get rid of analog/digital gains previously blocked
                 time.sleep(0.2)                              # little delay between the camera closing, and a new camera opening
@@ -4506,8 +4895,24 @@ if __name__ == "__main__":
                 side = 0                                     # side is set back to 0, that allows few other start up setting at each new cycle
                 
                 print('\n\n\nPress NEW CYCLE to start a cycle')  # print on terminal to suggest to press the robot NEW CYCLE button, as settings are done
-                robot_show_press.start()                     # suggestion on the display to press the NEW CYCLE button, as settings are done
-                robot_load_status.start()                    # start the "loading" status feedback at robot_display1
+                display2_state = 'press'                     # suggestion on the display to press the NEW CYCLE button, as settings are done
+                display1_state = 'loading'                   # start the "loading" status feedback at robot_display1
+            
+            if GPIO.input(13) and not cube_scrambling:       # case the button is not pressed (and no scrambling to be done)
+                button_pressed.wait()                        # the main thread sleeps until the button interrupt (FALLING edge callback)
+                button_pressed.clear()                       # button_pressed event is cleared
+            if quit_requested():                             # case the stop button has been pressed while the robot was running
+                robot_stop=True                              # global variable robot_stop is set True
+                quit_func()                                  # quitting function is called
+            new_cycle_button = GPIO.input(13)                # GPIO input is assigned to a new_cycle_button variable
+            if cube_scrambling:                              # case the cube_scrambling is set True
+                scrambling_cube()                            # scrambling_cube function is called
+                if quit_requested():                         # case the stop button has been pressed during the scrambling
+                    robot_stop=True                          # global variable robot_stop is set True
+                    quit_func()                              # quitting function is called
+                time.sleep(1)                                # little sleep time
+                display2_state = 'press'                     # suggestion on the display to press the NEW CYCLE button, as settings are done
+            cube_scrambling = False                          # cube_scrambling variable is set False
 
             while new_cycle_button == 0:                     # after completion of a cycle (side=6) the options are to do a new cycle or quit
                 press = robot_pressed_button(new_cycle_button)  # function that verifies the button pressing time  
@@ -4515,7 +4920,7 @@ if __name__ == "__main__":
                 if press == 'short':                         # button short pressing time starts a new cycle
                     robot_running = True                     # robot flag when servos and motor are activated
                     clear_terminal(device)                   # cleares the terminal
-                    robot_show_press.cancel()                # at robot_display2 is removed the suggestion to press the button
+                    display2_state = None                    # at robot_display2 is removed the suggestion to press the button
                     robot_display2.Clear()                   # robot_display2 is cleared
 #                     BGR_mean.clear()                         # needed???  # dictionary with read colors is cleraed
 #                     URFDLB_facelets_BGR_mean.clear()         # needed???  # disctionary with the read colors on URFDLB order is cleared
@@ -4525,7 +4930,7 @@ if __name__ == "__main__":
                     timeout=False                            # flag to limit the cube facelet detection time, to de-energize servo/motors in case
                     cubeAF()                                 # cube reading/solving function is called
                     
-                    if quitting:                             # case the global variable quitting is set True
+                    if quitting or quit_requested():         # case the global variable quitting is set True, or the stop button is pressed
                         robot_stop=True                      # global variable robot_stop is set True
                         quit_func()                          # quitting function is called
                         
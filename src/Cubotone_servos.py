@@ -38,6 +38,14 @@ srv_flipper = 14                     # GPIO pin used to control the flipper serv
 led1=13                              # GPIO pin used to control the led1 on top cover 
 led2=12                              # GPIO pin used to control the led2 on top cover 
 
+# servos settling tracking
+time_servo_settle = 0.1              # time for the servos innertia to drop, after the commanded travel time
+settle_deadline = 0.0                # time (time.monotonic) at which the servos have settled after the last commanded movement
+
+current_freq = None                  # PCA9685 output frequency currently set (60Hz for servos, 1000Hz for leds)
+
+
+
 # overall GPIO settings
 GPIO.setmode(GPIO.BCM)               # setting GPIO pins as "Broadcom SOC channel" number, these are the numbers after "GPIO"
 GPIO.setwarnings(False)              # setting GPIO to don't return allarms
@@ -56,11 +64,12 @@ def init_PCA9685():
     """ Function to initialize the PCA9685 board.
         Adafruit 16-Channel 12-bit PWM/Servo Driver - I2C interface - PCA9685."""
     
-    global pwm
+    global pwm, current_freq
 
     try:
         pwm = Adafruit_PCA9685.PCA9685()     # Initialise the PCA9685 using the default address (0x40).
         pwm.set_pwm_freq(60)                 # sets the frequency to 60hz, good for servos.
+        current_freq = 60                    # current PCA9685 frequency is stored
         pwm.set_pwm(srv_cover, 0, 0)         # servo is forced off
         pwm.set_pwm(srv_flipper, 0, 0)       # servo is forced off
         pwm.set_pwm(led1, 0, 0)              # led1 is forced off, 60Hz is ok to set the output off for the led
@@ -205,12 +214,16 @@ def extra_rotation_adj(debug, cube_size_adj):
 
 
 def servo_freq(debug):
-    """sets the PCA9685 output frequency for the servo. Servo require tipically 60Hz."""
+    """sets the PCA9685 output frequency for the servo. Servo require tipically 60Hz.
+    The board is re-configured only when the frequency differs from the current one."""
     
-    if not motors:
+    global current_freq
+    
+    if not motors or current_freq == 60:        # case no motors or frequency already set for the servos
         return
     
     pwm.set_pwm_freq(60)                        # sets the frequency to 60Hz
+    current_freq = 60                           # current PCA9685 frequency is stored
     time.sleep(0.05)                            # little time sleep to let the parameter change to get processed by the PCA 9685 board
 #     if debug:                                   # case the variable debug is set True
 #         print('frequency to 60Hz to PCA 9685 board, for servo control') # feedback is printed to the terminal
@@ -220,13 +233,17 @@ def servo_freq(debug):
 
 
 def led_freq(debug):
-    """sets the PCA9685 output frequency for the leds. PWM Leds at 60Hz is bad for the camera, and at least 1KHz needed."""
+    """sets the PCA9685 output frequency for the leds. PWM Leds at 60Hz is bad for the camera, and at least 1KHz needed.
+    The board is re-configured only when the frequency differs from the current one."""
     
-    if not motors:
+    global current_freq
+    
+    if not motors or current_freq == 1000:      # case no motors or frequency already set for the leds
         return
     
     servo_off(debug=False)                      # set the servo to off, to prevent unexpected reaction at the frequency change
     pwm.set_pwm_freq(1000)                      # sets the frequency to 1000Hz
+    current_freq = 1000                         # current PCA9685 frequency is stored
     time.sleep(0.05)                            # little time sleep to let the parameter change to get processed by the PCA 9685 board
 #     if debug:                                   # case the variable debug is set True
 #         print('frequency set to 1000Hz to PCA 9685 board, for led control') # feedback is printed to the terminal
@@ -254,13 +271,35 @@ def servo_start_positions(debug,wait_time=True):
 
 
 
+def servo_moved():
+    """sets the settle deadline at time_servo_settle from the last servo movement.
+    Called once the servo travel time has elapsed, so that waiting for the deadline (wait_settled) replaces fixed delays."""
+    
+    global settle_deadline
+    settle_deadline = time.monotonic() + time_servo_settle   # servos are settled from this time on
+
+
+
+
+
+def wait_settled(max_wait):
+    """waits for the servos to settle after the last movement, for max_wait secs at most."""
+    
+    remaining = settle_deadline - time.monotonic()   # time left to the settle deadline
+    if remaining > 0:                                # case the servos have not settled yet
+        sleep(min(remaining, max_wait))              # waits until the deadline, or for max_wait secs
+
+
+
+
+
 def servo_off(debug):
     """disable the servo."""
     
     if not motors:
         return
     
-    time.sleep(0.2)                        # some little wait time to ensure servos have completed the eventual movement, prior removing the PWM
+    wait_settled(0.2)                      # wait for the servos to complete the eventual movement (max 0.2 secs), prior removing the PWM
     pwm.set_pwm(srv_cover, 0, 0)           # servo is forced off, in case the target wasn't reached in time (blocked movement)
     pwm.set_pwm(srv_flipper, 0, 0)         # servo is forced off, in case the target wasn't reached in time (blocked movement)
     if debug:                              # case the variable debug is set True
@@ -326,6 +365,7 @@ def read_cover():
     
     pwm.set_pwm(srv_cover, 0, cover_read)   # pwm to the servo to reach the target position
     sleep(time_cover_reading)  # (AF 0.18)  # time necessary to servo to reach the target
+    servo_moved()              # servos settling time starts
 
 
 
@@ -339,10 +379,12 @@ def open_cover(fast_speed=False):
     if fast_speed==True:
         pwm.set_pwm(srv_cover, 0, cover_open)    # pwm to the servo to reach the target position, without sleep time afterward
         sleep(time_cover_opening-0.05)           # (AF 0.1)   # time necessary to servo to get the top_cover out from the cube
+        servo_moved()                            # servos settling time starts
     
     else:
         pwm.set_pwm(srv_cover, 0, cover_open)    # pwm to the servo to reach the target position, followed by a sleep time
         sleep(time_cover_opening)  # (AF 0.15)   # time necessary to servo to reach the target
+        servo_moved()              # servos settling time starts
 
 
 
@@ -355,6 +397,7 @@ def close_cover():
     
     pwm.set_pwm(srv_cover, 0, cover_close)       # pwm to the servo to reach the target position
     sleep(time_cover_closing)  # (AF 0.22)       # time necessary to servo to reach the target
+    servo_moved()              # servos settling time starts
 
 
 
@@ -367,6 +410,7 @@ def cube_flipper_high(time_flipper_high):
     
     pwm.set_pwm(srv_flipper, 0, flipper_high)     # pwm to the servo to reach the target position
     sleep(time_flipper_high)  # (AF 0.35)         # time necessary to servo to reach the target
+    servo_moved()             # servos settling time starts
 
 
 
@@ -379,6 +423,7 @@ def cube_flipper_low(time_flipper_low):
         
     pwm.set_pwm(srv_flipper, 0, flipper_low)      # pwm to the servo to reach the target position
     sleep(time_flipper_low)   # (AF 0.35)         # time necessary to servo to reach the target
+    servo_moved()             # servos settling time starts
 
 
 